@@ -35,6 +35,31 @@ def two_players():
     conn.send(["quit", {}])
     server_proc.join()
 
+def batch(args):
+    from sequtus.game import batch
+    from sequtus.defaults import sim
+    
+    sim_class = sim.TestSim
+    if args.ais:
+        sim_class = sim.DefaultSim
+    
+    jobs = batch.make_jobs(args.scenarios or [batch.default_scenario], args.matches, args.ais, args.seed)
+    
+    rows = batch.run_batch(
+        jobs,
+        game_data = args.game_data,
+        config = args.config,
+        image_sizes = args.images,
+        max_ticks = args.max_ticks,
+        workers = args.workers,
+        sim_class = sim_class,
+        ai_pool_workers = args.ai_pool_workers,
+    )
+    
+    batch.save_results(rows, args.output)
+    print(batch.summarise(rows))
+    print("Results saved to %s" % args.output)
+
 def default():
     two_players()
 
@@ -44,6 +69,19 @@ if __name__ == '__main__':
     parser.add_argument('-v', dest="verbose", action="store_true", help='Verbose mode')
     parser.add_argument('-a', dest="all", action="store_true", help='all mode means everything is run', required=False)
     
+    # Batch mode
+    parser.add_argument('--scenario', dest="scenarios", action="append", help='scenario to play in batch mode, can be given more than once')
+    parser.add_argument('--game-data', dest="game_data", default="sequtus/defaults/game_data.json", help='game data for batch mode')
+    parser.add_argument('--config', dest="config", default=None, help='sim config for batch mode')
+    parser.add_argument('--images', dest="images", default="sequtus/defaults/image_sizes.json", help='image size manifest for batch mode')
+    parser.add_argument('--ai', dest="ais", action="append", help='AI to try on every AI team in batch mode, can be given more than once')
+    parser.add_argument('--matches', dest="matches", type=int, default=10, help='matches per scenario and AI combination')
+    parser.add_argument('--workers', dest="workers", type=int, default=multiprocessing.cpu_count(), help='processes to run matches in')
+    parser.add_argument('--ai-pool', dest="ai_pool_workers", type=int, default=0, help='processes to host the AIs of every match in, 0 gives each AI its own')
+    parser.add_argument('--max-ticks', dest="max_ticks", type=int, default=10000, help='ticks before a match is called a draw')
+    parser.add_argument('--seed', dest="seed", type=int, default=0, help='random seed of the first match')
+    parser.add_argument('--output', dest="output", default="batch_results.json", help='where to save the results')
+    
     # If no args then default mode
     if len(sys.argv) > 1:
         args = parser.parse_args()
@@ -67,6 +105,10 @@ if __name__ == '__main__':
         from profile_lib import profiler
         profiler.view(args)
     
+    # Play lots of headless matches
+    elif args.mode == 'batch':
+        batch(args)
+    
     # Run default function
     else:
         default()
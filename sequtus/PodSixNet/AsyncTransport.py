@@ -0,0 +1,233 @@
+"""
+Channel, Server and EndPoint on top of asyncio rather than asyncore and
+asynchat, which are deprecated and were removed in Python 3.12. Python 3
+only, import it directly (it isn't imported by the rest of PodSixNet).
+sequtus.game.async_server and async_client are the game's server and
+client on top of it.
+
+They work the way the asyncore versions do. A message like
+{"action": "hello", ...} calls Network_hello and Network on the channel
+it arrived on. Send queues a message and Pump writes out everything
+queued as one block. Server.Connected(channel, addr) is called for every
+new client, and an EndPoint queues up what it receives for GetQueue.
+
+Messages are framed the same way as on the asyncore Channel (see
+Framing), so an EndPoint here can connect to an asyncore Server and the
+other way around.
+
+A Server never polls. It runs when data arrives and, if it has a
+tick_delay, on a timer calling Tick. Any number of servers can share one
+event loop, see serve.
+"""
+import asyncio
+
+from .Framing import Framing
+
+class Channel(Framing, asyncio.Protocol):
+    def __init__(self, server=None):
+        self._server = server
+        self.transport = None
+        self.addr = ()
+        self._reset_framing()
+    
+    # asyncio.Protocol
+    def connection_made(self, transport):
+        # asyncio turns on TCP_NODELAY for us
+        self.transport = transport
+        self.addr = transport.get_extra_info("peername")
+        
+        if self._server is not None:
+            self._server._add_channel(self)
+        elif hasattr(self, "Connected"):
+            self.Connected()
+    
+    def data_received(self, data):
+        self._ibuffer.extend(data)
+        self._read_messages()
+        
+        # Send any replies now rather than waiting for the next Pump
+        if self._server is not None:
+            self._server.Pump()
+    
+    def connection_lost(self, exc):
+        # Nothing to tell anybody if we closed it ourselves
+        if self.transport is not None:
+            self.transport = None
+            
+            if exc is not None and hasattr(self, "Error"):
+                self.Error(exc)
+            
+            if hasattr(self, "Close"):
+                self.Close()
+        
+        if self._server is not None:
+            self._server._remove_channel(self)
+    
+    def Pump(self):
+        if self.sendqueue and self.transport is not None:
+            self.transport.write(b"".join(self.sendqueue))
+            self.sendqueue = []
+    
+    def close(self):
+        if self.transport is not None:
+            transport = self.transport
+            self.transport = None
+            transport.close()
+
+class Server(object):
+    channelClass = Channel
+    
+    # Seconds between calls to Tick, None for no timer
+    tick_delay = None
+    
+    def __init__(self, channelClass=None, localaddr=("127.0.0.1", 31425)):
+        if channelClass:
+            self.channelClass = channelClass
+        
+        self.localaddr = localaddr
+        self.channels = []
+        
+        self._listener = None
+        self._tick_handle = None
+        self._closed = None
+    
+    async def start(self):
+        """Starts listening on the running event loop, localaddr with
+        port 0 picks a free port, see address"""
+        loop = asyncio.get_running_loop()
+        
+        self._closed = asyncio.Event()
+        self._listener = await loop.create_server(lambda: self.channelClass(server=self), *self.localaddr)
+        
+        if self.tick_delay is not None:
+            self._next_tick = loop.time() + self.tick_delay
+            self._tick_handle = loop.call_at(self._next_tick, self._tick)
+    
+    @property
+    def address(self):
+        return self._listener.sockets[0].getsockname()[:2]
+    
+    def _tick(self):
+        loop = asyncio.get_running_loop()
+        
+        if hasattr(self, "Tick"):
+            self.Tick()
+        self.Pump()
+        
+        # Tick might have closed us
+        if self._listener is None:
+            return
+        
+        # Keep to a fixed step but if we've fallen behind carry on from
+        # now rather than running a burst of ticks to catch up
+        self._next_tick += self.tick_delay
+        if self._next_tick <= loop.time():
+            self._next_tick = loop.time() + self.tick_delay
+        
+        self._tick_handle = loop.call_at(self._next_tick, self._tick)
+    
+    def _add_channel(self, channel):
+        self.channels.append(channel)
+        channel.Send({"action": "connected"})
+        channel.OfferFraming()
+        
+        if hasattr(self, "Connected"):
+            self.Connected(channel, channel.addr)
+        
+        channel.Pump()
+    
+    def _remove_channel(self, channel):
+        if channel in self.channels:
+            self.channels.remove(channel)
+    
+    def Pump(self):
+        [c.Pump() for c in self.channels]
+    
+    def close(self):
+        """Stops listening and closes every channel"""
+        if self._listener is None:
+            return
+        
+        if self._tick_handle is not None:
+            self._tick_handle.cancel()
+        
+        self.Pump()
+        self._listener.close()
+        self._listener = None
+        
+        [c.close() for c in list(self.channels)]
+        self.channels = []
+        
+        self._closed.set()
+    
+    async def wait_closed(self):
+        await self._closed.wait()
+
+async def serve(servers):
+    """Starts the servers on the running loop and returns once all of
+    them have been closed"""
+    for s in servers:
+        await s.start()
+    
+    await asyncio.gather(*[s.wait_closed() for s in servers])
+
+class EndPoint(Channel):
+    """
+    The client end, for programs with their own main loop rather than
+    an event loop. Each Pump runs the endpoint's event loop once without
+    blocking and queues up all network events for other classes to read.
+    """
+    def __init__(self, address=("127.0.0.1", 31425), loop=None):
+        Channel.__init__(self)
+        self.address = address
+        self.isConnected = False
+        self.queue = []
+        
+        if loop is None:
+            loop = asyncio.new_event_loop()
+        self._loop = loop
+    
+    def DoConnect(self, address=None):
+        if address:
+            self.address = address
+        
+        connecting = self._loop.create_task(self._loop.create_connection(lambda: self, *self.address))
+        connecting.add_done_callback(self._connect_done)
+    
+    def _connect_done(self, connecting):
+        if connecting.cancelled():
+            return
+        
+        error = connecting.exception()
+        if error is not None:
+            self.Error(error.args)
+    
+    def GetQueue(self):
+        return self.queue
+    
+    def Pump(self):
+        Channel.Pump(self)
+        self.queue = []
+        
+        # Runs whatever is ready, the stop callback is queued behind it
+        self._loop.call_soon(self._loop.stop)
+        self._loop.run_forever()
+    
+    # methods to add network data to the queue depending on network events
+    
+    def Close(self):
+        self.isConnected = False
+        self.close()
+        self.queue.append({"action": "disconnected"})
+    
+    def Connected(self):
+        self.queue.append({"action": "socketConnect"})
+    
+    def Network_connected(self, data):
+        self.isConnected = True
+    
+    def Network(self, data):
+        self.queue.append(data)
+    
+    def Error(self, error):
+        self.queue.append({"action": "error", "error": error})
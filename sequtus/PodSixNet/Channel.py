@@ -1,45 +1,40 @@
-import sys, traceback
+import sys, traceback, socket
 
-from async import asynchat
-from rencode import loads, dumps
+from .asyncwrapper import asynchat
+from .Framing import Framing, frame_header, RENCODE
 
-class Channel(asynchat.async_chat):
-    endchars = '\0---\0'
+class Channel(Framing, asynchat.async_chat):
+    # Read and write in big pieces, Pump sends everything queued since the
+    # last Pump as one block so a busy tick goes out in a single write
+    ac_in_buffer_size = 65536
+    ac_out_buffer_size = 65536
+    
     def __init__(self, conn=None, addr=(), server=None, map=None):
         asynchat.async_chat.__init__(self, conn, map)
         self.addr = addr
         self._server = server
-        self._ibuffer = ""
-        self.set_terminator(self.endchars)
-        self.sendqueue = []
-    
-    def collect_incoming_data(self, data):
-        self._ibuffer += data
+        self._reset_framing()
     
-    def found_terminator(self):
-        data = loads(self._ibuffer)
-        self._ibuffer = ""
+    def handle_read(self):
+        try:
+            data = self.recv(self.ac_in_buffer_size)
+        except socket.error as why:
+            self.handle_error()
+            return
         
-        if type(dict()) == type(data) and data.has_key('action'):
-            [getattr(self, n)(data) for n in ('Network', 'Network_' + data['action']) if hasattr(self, n)]
-        else:
-            print "OOB data (no such Network_action):", data
+        self._ibuffer.extend(data)
+        self._read_messages()
     
     def Pump(self):
-        [asynchat.async_chat.push(self, d) for d in self.sendqueue]
-        self.sendqueue = []
-    
-    def Send(self, data):
-        """Returns the number of bytes sent after enoding."""
-        outgoing = dumps(data) + self.endchars
-        self.sendqueue.append(outgoing)
-        return len(outgoing)
+        if self.sendqueue:
+            asynchat.async_chat.push(self, b"".join(self.sendqueue))
+            self.sendqueue = []
     
     def handle_connect(self):
         if hasattr(self, "Connected"):
             self.Connected()
         else:
-            print "Unhandled Connected()"
+            print("Unhandled Connected()")
     
     def handle_error(self):
         try:
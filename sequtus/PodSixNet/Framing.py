@@ -0,0 +1,146 @@
+"""
+How messages are turned into bytes and back, whatever carries them.
+Channel (asyncore) and AsyncTransport.Channel (asyncio) both mix this in
+so either kind of end can talk to the other.
+
+Every connection starts out with rencoded messages separated by endchars.
+The server offers binary framing when a client connects and if both ends
+have a codec they switch to it, each message is then a frame_header and
+a body packed by the codec, or rencoded if the codec can't pack it.
+"""
+
+import struct
+
+from .rencode import loads, dumps
+
+# Binary framing puts this in front of each message, the length of the
+# body and its type. Type 0 is a rencoded dict, anything else is for the
+# channel's codec to decode.
+frame_header = struct.Struct("!IB")
+RENCODE = 0
+
+class Framing(object):
+    endchars = b'\0---\0'
+    
+    # A module with encode(data) and decode(message_type, body) used to
+    # pack common messages with binary framing, e.g. sequtus.libs.wire_lib
+    codec = None
+    
+    def _reset_framing(self):
+        self.sendqueue = []
+        
+        # Incoming data waits here until there's a whole message, messages
+        # are decoded straight out of it and it's only trimmed once a read
+        self._ibuffer = bytearray()
+        
+        # How far into _ibuffer we've already looked for endchars
+        self._scanned = 0
+        
+        # Every connection starts out with rencode and terminators, see
+        # OfferFraming for switching to binary
+        self._framing_in = "rencode"
+        self._framing_out = "rencode"
+    
+    @property
+    def framings(self):
+        """The framings this channel can use in order of preference"""
+        if self.codec is None:
+            return ("rencode",)
+        return ("binary", "rencode")
+    
+    def _read_messages(self):
+        """Decodes and dispatches every whole message in the buffer, the
+        start of a message that hasn't all arrived stays for next time"""
+        buf = self._ibuffer
+        start = 0
+        
+        while True:
+            if self._framing_in == "binary":
+                if len(buf) - start < frame_header.size:
+                    self._scanned = start
+                    break
+                
+                length, message_type = frame_header.unpack_from(buf, start)
+                end = start + frame_header.size + length
+                if len(buf) < end:
+                    self._scanned = start
+                    break
+                
+                body = bytes(buf[start + frame_header.size:end])
+                start = end
+                
+                if message_type == RENCODE:
+                    data = loads(body)
+                else:
+                    data = self.codec.decode(message_type, body)
+            
+            else:
+                # Don't search again through what we searched last read
+                end = buf.find(self.endchars, max(start, self._scanned))
+                if end == -1:
+                    self._scanned = max(start, len(buf) - len(self.endchars) + 1)
+                    break
+                
+                data = loads(bytes(buf[start:end]))
+                start = end + len(self.endchars)
+            
+            self._dispatch(data)
+        
+        del buf[:start]
+        self._scanned -= start
+    
+    def _dispatch(self, data):
+        if type(dict()) == type(data) and data.get('action') == "framing":
+            self._handle_framing(data)
+        
+        if type(dict()) == type(data) and 'action' in data:
+            [getattr(self, n)(data) for n in ('Network', 'Network_' + data['action']) if hasattr(self, n)]
+        else:
+            print("OOB data (no such Network_action): %s" % (data,))
+    
+    def Send(self, data):
+        """Returns the number of bytes sent after enoding."""
+        if self._framing_out == "binary":
+            encoded = self.codec.encode(data)
+            if encoded is None:
+                encoded = RENCODE, dumps(data)
+            
+            message_type, body = encoded
+            outgoing = frame_header.pack(len(body), message_type) + body
+        else:
+            outgoing = dumps(data) + self.endchars
+        
+        self.sendqueue.append(outgoing)
+        return len(outgoing)
+    
+    def OfferFraming(self):
+        """Tells the other end which framings we can use. If it can use
+        one we prefer it tells us it's switching to it and we switch too,
+        an end that doesn't know about framing ignores the offer and
+        everything stays as rencode."""
+        self.Send({"action": "framing", "offer": list(self.framings)})
+    
+    def _handle_framing(self, data):
+        # An offer, pick the first framing we both have
+        if "offer" in data:
+            for f in self.framings:
+                if f in data['offer']:
+                    self._switch_framing_out(f)
+                    break
+        
+        # The other end has switched what it sends, everything after this
+        # message is in the new framing
+        if "mode" in data:
+            self._framing_in = data['mode']
+            
+            if data['mode'] in self.framings:
+                self._switch_framing_out(data['mode'])
+    
+    def _switch_framing_out(self, mode):
+        if self._framing_out == mode:
+            return
+        
+        # This goes out in the old framing so the other end knows to
+        # switch before reading anything after it
+        self.Send({"action": "framing", "mode": mode})
+        self._framing_out = mode
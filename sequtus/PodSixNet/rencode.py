@@ -93,15 +93,35 @@ import struct
 
 from threading import Lock
 
-from types import (StringType,
-                   UnicodeType,
-                   IntType,
-                   LongType,
-                   DictType,
-                   ListType,
-                   TupleType,
-                   FloatType,
-                   NoneType)
+# Works on Python 2 and 3. Everything is encoded to and decoded from bytes,
+# strings are sent as UTF-8 and come back as str. On Python 3 a string that
+# isn't UTF-8 comes back as bytes.
+try:
+    UnicodeType = unicode
+    LongType = long
+except NameError:
+    UnicodeType = str
+    LongType = int
+
+# Decoding looks at one byte at a time, that's a 1 character str on
+# Python 2 and an int on Python 3, _key turns a typecode into one
+if bytes is str:
+    _chr = chr
+    _key = lambda c: c
+else:
+    def _chr(i):
+        return bytes((i,))
+    _key = ord
+
+if bytes is str:
+    def _text(s):
+        return s
+else:
+    def _text(s):
+        try:
+            return s.decode('utf-8')
+        except UnicodeDecodeError:
+            return s
 
 class AlreadyRegistered(Exception): pass
 
@@ -115,15 +135,14 @@ class NotRegistered(Exception):
 
 class NotSerializable(Exception): pass
 
-def add_class_name(func):
+def add_class_name(cls, func):
 
-    if inspect.ismethod(func):
-        def decorate(*args, **kargs):
-            result = func(*args, **kargs)
-            result = (str(func.im_class.__name__),) + result
-            return result
+    def decorate(*args, **kargs):
+        result = func(*args, **kargs)
+        result = (str(cls.__name__),) + result
+        return result
 
-        return decorate
+    return decorate
 
 class _SerializableRegistry(object):
 
@@ -137,7 +156,7 @@ class _SerializableRegistry(object):
         return self._registry[key]
 
     def register(self, cls):
-        '''   '''
+        
         if inspect.isclass(cls):
 
             if cls.__name__ in self._registry:
@@ -145,17 +164,17 @@ class _SerializableRegistry(object):
                 raise AlreadyRegistered(msg)
 
             try:
-                if inspect.ismethod(cls._pack):
-                    cls._pack = add_class_name(cls._pack)
+                if callable(cls._pack):
+                    cls._pack = add_class_name(cls, cls._pack)
                     self._registry[cls.__name__] = cls
-            except AttributeError, err:
+            except AttributeError as err:
                 raise NotSerializable(err)
 
     def unregister(self, cls):
-        '''   '''
+        
         if inspect.isclass(cls):
 
-            if cls in self._registry:
+            if cls.__name__ in self._registry:
                 del self._registry[cls.__name__]
             else: 
                 raise NotRegistered(cls.__name__)
@@ -171,20 +190,22 @@ MAX_INT_LENGTH = 64
 # The bencode 'typecodes' such as i, d, etc have been extended and
 # relocated on the base-256 character set.
 # Can't be used chr(48) to chr(57) because they are manually set
-CHR_INSTANCE = chr(47) 
-CHR_TUPLE = chr(58)
-CHR_LIST = chr(59)
-CHR_DICT = chr(60)
-CHR_INT = chr(61)
-CHR_INT1 = chr(62)
-CHR_INT2 = chr(63)
-CHR_INT4 = chr(64)
-CHR_INT8 = chr(65)
-CHR_FLOAT = chr(66)
-CHR_TRUE = chr(67)
-CHR_FALSE = chr(68)
-CHR_NONE = chr(69)
-CHR_TERM = chr(127)
+CHR_INSTANCE = _chr(47) 
+CHR_TUPLE = _chr(58)
+CHR_LIST = _chr(59)
+CHR_DICT = _chr(60)
+CHR_INT = _chr(61)
+CHR_INT1 = _chr(62)
+CHR_INT2 = _chr(63)
+CHR_INT4 = _chr(64)
+CHR_INT8 = _chr(65)
+CHR_FLOAT = _chr(66)
+CHR_TRUE = _chr(67)
+CHR_FALSE = _chr(68)
+CHR_NONE = _chr(69)
+CHR_TERM = _chr(127)
+
+TERM = _key(CHR_TERM)
 
 # Positive integers with value embedded in typecode.
 INT_POS_FIXED_START = 0
@@ -218,11 +239,11 @@ def decode_int(x, f):
     try:
         n = int(x[f:newf])
     except (OverflowError, ValueError):
-        n = long(x[f:newf])
-    if x[f] == '-':
-        if x[f + 1] == '0':
+        n = LongType(x[f:newf])
+    if x[f] == _key(b'-'):
+        if x[f+1] == _key(b'0'):
             raise ValueError
-    elif x[f] == '0' and newf != f+1:
+    elif x[f] == _key(b'0') and newf != f+1:
         raise ValueError
     return (n, newf+1)
 
@@ -254,33 +275,33 @@ def decode_float(x, f):
         raise ValueError
 
 def decode_string(x, f):
-    colon = x.index(':', f)
+    colon = x.index(b':', f)
     try:
         n = int(x[f:colon])
     except (OverflowError, ValueError):
-        n = long(x[f:colon])
-    if x[f] == '0' and colon != f+1:
+        n = LongType(x[f:colon])
+    if x[f] == _key(b'0') and colon != f+1:
         raise ValueError
     colon += 1
-    return (b64decode(x[colon:colon+n]), colon+n)
+    return (_text(b64decode(x[colon:colon+n])), colon+n)
 
 def decode_list(x, f):
     r, f = [], f+1
-    while x[f] != CHR_TERM:
+    while x[f] != TERM:
         v, f = decode_func[x[f]](x, f)
         r.append(v)
     return (r, f + 1)
 
 def decode_tuple(x, f):
     r, f = [], f+1
-    while x[f] != CHR_TERM:
+    while x[f] != TERM:
         v, f = decode_func[x[f]](x, f)
         r.append(v)
     return (tuple(r), f + 1)
 
 def decode_dict(x, f):
     r, f = {}, f+1
-    while x[f] != CHR_TERM:
+    while x[f] != TERM:
         k, f = decode_func[x[f]](x, f)
         r[k], f = decode_func[x[f]](x, f)
     return (r, f + 1)
@@ -296,7 +317,7 @@ def decode_none(x, f):
 
 def decode_instance(x, f):
     f += 1
-    while x[f] != CHR_TERM:
+    while x[f] != TERM:
         v, f = decode_func[x[f]](x, f)
     if v[0] in serializable:
         r = serializable[v[0]](*v[1:])
@@ -305,37 +326,37 @@ def decode_instance(x, f):
     return (r, f+1)
 
 decode_func = {}
-decode_func['0'] = decode_string
-decode_func['1'] = decode_string
-decode_func['2'] = decode_string
-decode_func['3'] = decode_string
-decode_func['4'] = decode_string
-decode_func['5'] = decode_string
-decode_func['6'] = decode_string
-decode_func['7'] = decode_string
-decode_func['8'] = decode_string
-decode_func['9'] = decode_string
-decode_func[CHR_LIST ] = decode_list
-decode_func[CHR_TUPLE] = decode_tuple
-decode_func[CHR_DICT ] = decode_dict
-decode_func[CHR_INT  ] = decode_int
-decode_func[CHR_INT1 ] = decode_intb
-decode_func[CHR_INT2 ] = decode_inth
-decode_func[CHR_INT4 ] = decode_intl
-decode_func[CHR_INT8 ] = decode_intq
-decode_func[CHR_FLOAT] = decode_float
-decode_func[CHR_TRUE ] = decode_true
-decode_func[CHR_FALSE] = decode_false
-decode_func[CHR_NONE ] = decode_none
-decode_func[CHR_INSTANCE] = decode_instance
+decode_func[_key(b'0')] = decode_string
+decode_func[_key(b'1')] = decode_string
+decode_func[_key(b'2')] = decode_string
+decode_func[_key(b'3')] = decode_string
+decode_func[_key(b'4')] = decode_string
+decode_func[_key(b'5')] = decode_string
+decode_func[_key(b'6')] = decode_string
+decode_func[_key(b'7')] = decode_string
+decode_func[_key(b'8')] = decode_string
+decode_func[_key(b'9')] = decode_string
+decode_func[_key(CHR_LIST) ] = decode_list
+decode_func[_key(CHR_TUPLE)] = decode_tuple
+decode_func[_key(CHR_DICT) ] = decode_dict
+decode_func[_key(CHR_INT)  ] = decode_int
+decode_func[_key(CHR_INT1) ] = decode_intb
+decode_func[_key(CHR_INT2) ] = decode_inth
+decode_func[_key(CHR_INT4) ] = decode_intl
+decode_func[_key(CHR_INT8) ] = decode_intq
+decode_func[_key(CHR_FLOAT)] = decode_float
+decode_func[_key(CHR_TRUE) ] = decode_true
+decode_func[_key(CHR_FALSE)] = decode_false
+decode_func[_key(CHR_NONE) ] = decode_none
+decode_func[_key(CHR_INSTANCE)] = decode_instance
 
 def make_fixed_length_string_decoders():
     def make_decoder(slen):
         def f_fixed_string(x, f):
-            return (b64decode(x[f+1:f+1+slen]), f+1+slen)
+            return (_text(b64decode(x[f+1:f+1+slen])), f+1+slen)
         return f_fixed_string
     for i in range(STR_FIXED_COUNT):
-        decode_func[chr(STR_FIXED_START+i)] = make_decoder(i)
+        decode_func[_key(_chr(STR_FIXED_START+i))] = make_decoder(i)
 
 make_fixed_length_string_decoders()
 
@@ -349,7 +370,7 @@ def make_fixed_length_list_decoders():
             return (r, f)
         return f_fixed_list
     for i in range(LIST_FIXED_COUNT):
-        decode_func[chr(LIST_FIXED_START+i)] = make_decoder(i)
+        decode_func[_key(_chr(LIST_FIXED_START+i))] = make_decoder(i)
 
 make_fixed_length_list_decoders()
 
@@ -363,7 +384,7 @@ def make_fixed_length_tuple_decoders():
             return (tuple(r), f)
         return f_fixed_tuple
     for i in range(TUPLE_FIXED_COUNT):
-        decode_func[chr(TUPLE_FIXED_START+i)] = make_decoder(i)
+        decode_func[_key(_chr(TUPLE_FIXED_START+i))] = make_decoder(i)
 
 make_fixed_length_tuple_decoders()
 
@@ -373,9 +394,9 @@ def make_fixed_length_int_decoders():
             return (j, f+1)
         return f
     for i in range(INT_POS_FIXED_COUNT):
-        decode_func[chr(INT_POS_FIXED_START+i)] = make_decoder(i)
+        decode_func[_key(_chr(INT_POS_FIXED_START+i))] = make_decoder(i)
     for i in range(INT_NEG_FIXED_COUNT):
-        decode_func[chr(INT_NEG_FIXED_START+i)] = make_decoder(-1-i)
+        decode_func[_key(_chr(INT_NEG_FIXED_START+i))] = make_decoder(-1-i)
 
 make_fixed_length_int_decoders()
 
@@ -389,11 +410,13 @@ def make_fixed_length_dict_decoders():
             return (r, f)
         return f
     for i in range(DICT_FIXED_COUNT):
-        decode_func[chr(DICT_FIXED_START+i)] = make_decoder(i)
+        decode_func[_key(_chr(DICT_FIXED_START+i))] = make_decoder(i)
 
 make_fixed_length_dict_decoders()
 
 def loads(x):
+    if type(x) != bytes:
+        x = bytes(x)
     try:
         r, l = decode_func[x[0]](x, 0)
     except (IndexError, KeyError):
@@ -404,9 +427,9 @@ def loads(x):
 
 def encode_int(x, r):
     if 0 <= x < INT_POS_FIXED_COUNT:
-        r.append(chr(INT_POS_FIXED_START+x))
+        r.append(_chr(INT_POS_FIXED_START+x))
     elif -INT_NEG_FIXED_COUNT <= x < 0:
-        r.append(chr(INT_NEG_FIXED_START-1-x))
+        r.append(_chr(INT_NEG_FIXED_START-1-x))
     elif -128 <= x < 128:
         r.extend((CHR_INT1, struct.pack('!b', x)))
     elif -32768 <= x < 32768:
@@ -416,7 +439,7 @@ def encode_int(x, r):
     elif -9223372036854775808 <= x < 9223372036854775808:
         r.extend((CHR_INT8, struct.pack('!q', x)))
     else:
-        s = str(x)
+        s = str(x).encode('ascii')
         if len(s) >= MAX_INT_LENGTH:
             raise ValueError('overflow')
         r.extend((CHR_INT, s, CHR_TERM))
@@ -430,21 +453,23 @@ def encode_float(x, r):
         raise ValueError
 
 def encode_bool(x, r):
-    r.extend({False: CHR_FALSE, True: CHR_TRUE}[bool(x)])
+    r.append({False: CHR_FALSE, True: CHR_TRUE}[bool(x)])
 
 def encode_none(x, r):
-    r.extend(CHR_NONE)
+    r.append(CHR_NONE)
 
 def encode_string(x, r):
+    if type(x) == UnicodeType:
+        x = x.encode('utf-8')
     x = b64encode(x)
     if len(x) < STR_FIXED_COUNT:
-        r.extend((chr(STR_FIXED_START + len(x)), x))
+        r.extend((_chr(STR_FIXED_START + len(x)), x))
     else:
-        r.extend((str(len(x)), ':', x))
+        r.extend((str(len(x)).encode('ascii'), b':', x))
 
 def encode_list(x, r):
     if len(x) < LIST_FIXED_COUNT:
-        r.append(chr(LIST_FIXED_START + len(x)))
+        r.append(_chr(LIST_FIXED_START + len(x)))
         for i in x:
             encode_func.get(type(i), encode_instance)(i, r)
     else:
@@ -456,7 +481,7 @@ def encode_list(x, r):
 
 def encode_tuple(x, r):
     if len(x) < TUPLE_FIXED_COUNT:
-        r.append(chr(TUPLE_FIXED_START + len(x)))
+        r.append(_chr(TUPLE_FIXED_START + len(x)))
         for i in x:
             encode_func.get(type(i), encode_instance)(i, r)
     else:
@@ -467,7 +492,7 @@ def encode_tuple(x, r):
 
 def encode_dict(x,r):
     if len(x) < DICT_FIXED_COUNT:
-        r.append(chr(DICT_FIXED_START + len(x)))
+        r.append(_chr(DICT_FIXED_START + len(x)))
         for k, v in x.items():
             encode_func[type(k)](k, r)
             encode_func[type(v)](v, r)
@@ -479,21 +504,17 @@ def encode_dict(x,r):
         r.append(CHR_TERM)
 
 encode_func = {}
-encode_func[IntType] = encode_int
+encode_func[int] = encode_int
 encode_func[LongType] = encode_int
-encode_func[FloatType] = encode_float
-encode_func[StringType] = encode_string
+encode_func[float] = encode_float
+encode_func[bytes] = encode_string
+encode_func[str] = encode_string
 encode_func[UnicodeType] = encode_string
-encode_func[ListType] = encode_list
-encode_func[TupleType] = encode_tuple
-encode_func[DictType] = encode_dict
-encode_func[NoneType] = encode_none
-
-try:
-    from types import BooleanType
-    encode_func[BooleanType] = encode_bool
-except ImportError:
-    pass
+encode_func[list] = encode_list
+encode_func[tuple] = encode_tuple
+encode_func[dict] = encode_dict
+encode_func[type(None)] = encode_none
+encode_func[bool] = encode_bool
 
 def encode_instance(x, r):
     if hasattr(x, '_pack'):
@@ -514,7 +535,7 @@ def dumps(x):
     r = []
     encode_func.get(type(x), encode_instance)(x, r)
     lock.release()
-    return ''.join(r)
+    return b''.join(r)
 
 def test():
     f1 = struct.unpack('!f', struct.pack('!f', 25.5))[0]
@@ -555,7 +576,7 @@ def test():
     serializable.register(A)
 
     instance = [A(1,2,3), 1, A(1,3,4), 'sss']
-    print loads(dumps(instance))
+    print(loads(dumps(instance)))
 
 if __name__ == '__main__':
   test()
@@ -1,5 +1,5 @@
-import render
-import defaults
-import game
-import libs
-import tests
+from . import render
+from . import defaults
+from . import game
+from . import libs
+from . import tests
@@ -0,0 +1,303 @@
+"""
+A fixed set of worker processes each hosting any number of AIs. Without
+a pool every AI gets a process of its own, with one the cost of starting
+an AI is a message and the CPU used by AIs is capped at the number of
+workers no matter how many matches are running.
+
+Messages are tagged with the id of the AI they're for. The queues handed
+back by make_ai look the same to the sim as the multiprocessing queues
+from core_ai.make_ai.
+
+Several processes can share one pool. Each gets a PoolClient with an
+outbox of its own when it's started, the workers send everything from an
+AI to the outbox of the client that made it.
+"""
+
+import collections
+import multiprocessing
+import time
+
+try:
+    import queue
+except ImportError:
+    import Queue as queue
+
+from sequtus.ai import core_ai
+
+# How long an idle worker sleeps on its inbox when it has no AIs
+idle_timeout = 1
+
+class LocalQueue (object):
+    """The in_queue of an AI inside a worker, the worker fills it and the
+    AI reads it without ever blocking"""
+    def __init__(self):
+        super(LocalQueue, self).__init__()
+        self.items = collections.deque()
+    
+    def put(self, item):
+        self.items.append(item)
+    
+    def empty(self):
+        return len(self.items) == 0
+    
+    def get_nowait(self):
+        if len(self.items) == 0:
+            raise queue.Empty()
+        return self.items.popleft()
+    
+    def get(self, block=True, timeout=None):
+        return self.get_nowait()
+
+class TaggedQueue (object):
+    """Puts items onto a shared queue tagged with the id of the AI"""
+    def __init__(self, target, ai_id):
+        super(TaggedQueue, self).__init__()
+        self.target = target
+        self.ai_id = ai_id
+    
+    def put(self, item):
+        self.target.put((self.ai_id, item))
+
+class PoolReceiver (object):
+    """What the sim reads from, pulls everything waiting in the client's
+    outbox and hands back only the items for this AI"""
+    def __init__(self, pool, ai_id):
+        super(PoolReceiver, self).__init__()
+        self.pool = pool
+        self.ai_id = ai_id
+    
+    def empty(self):
+        self.pool.pump()
+        return len(self.pool.results[self.ai_id]) == 0
+    
+    def get(self, block=True, timeout=None):
+        results = self.pool.results[self.ai_id]
+        self.pool.pump()
+        
+        if block and len(results) == 0:
+            # pump returns as soon as anything arrives for any AI so we
+            # may need to wait several times
+            end = None
+            if timeout != None:
+                end = time.time() + timeout
+            
+            while len(results) == 0:
+                wait = idle_timeout
+                if end != None:
+                    wait = end - time.time()
+                    if wait <= 0: break
+                
+                self.pool.pump(wait)
+        
+        if len(results) == 0:
+            raise queue.Empty()
+        
+        return results.popleft()
+
+def _worker_process(inbox, outboxes):
+    ais = {}
+    running = True
+    
+    # ai_id -> the outbox of the client that made it
+    replies = {}
+    
+    try:
+        while running:
+            # Sleep until a message arrives or the next AI is due
+            if ais == {}:
+                timeout = idle_timeout
+            else:
+                next_cycle = min([a.next_cycle for a in ais.values()])
+                timeout = max(0, next_cycle - time.time())
+            
+            messages = []
+            try:
+                if timeout > 0:
+                    messages.append(inbox.get(True, timeout))
+                else:
+                    messages.append(inbox.get_nowait())
+                
+                while True:
+                    messages.append(inbox.get_nowait())
+            except queue.Empty:
+                pass
+            
+            for ai_id, data in messages:
+                if ai_id is None:
+                    if data['cmd'] == "spawn":
+                        outbox = replies[data['ai_id']] = outboxes[data['client']]
+                        a = data['ai_class'](LocalQueue(), TaggedQueue(outbox, data['ai_id']))
+                        ais[data['ai_id']] = a
+                        a.out_queue.put({"data_type":"prefs","prefs":a.prefs})
+                    elif data['cmd'] == "quit":
+                        running = False
+                
+                elif ai_id in ais:
+                    ais[ai_id].in_queue.put(data)
+            
+            for ai_id in sorted(ais):
+                a = ais[ai_id]
+                a.core_cycle(block=False)
+                
+                if not a.running:
+                    del(ais[ai_id])
+                    replies.pop(ai_id).put((None, {"cmd": "stopped", "ai_id": ai_id}))
+    
+    except KeyboardInterrupt as e:
+        pass
+
+class PoolClient (object):
+    """The part of a pool a sim talks to. It only holds queues so it can
+    be handed to another process as that process is started, every AI it
+    makes replies to its outbox alone."""
+    def __init__(self, inboxes, outbox, client_id=0):
+        super(PoolClient, self).__init__()
+        
+        self.inboxes = inboxes
+        self.outbox = outbox
+        self.client_id = client_id
+        
+        # How many of our AIs each worker is hosting
+        self.counts = [0] * len(inboxes)
+        
+        # ai_id -> deque of items from the AI
+        self.results = {}
+        
+        # ai_id -> index of the worker hosting it
+        self.hosts = {}
+        self._next_id = 0
+    
+    def make_ai(self, class_name, snapshot=None):
+        """Same as core_ai.make_ai but hosted in one of the workers. The
+        workers are already running so they can't be given a snapshot,
+        the sim should feed pooled AIs through their queues."""
+        if class_name not in core_ai.ai_classes:
+            raise KeyError("No AI class by name of %s" % class_name)
+        
+        if snapshot != None:
+            raise ValueError("Pooled AIs cannot share a snapshot")
+        
+        # Unique across every client of the pool
+        ai_id = (self.client_id, self._next_id)
+        self._next_id += 1
+        self.results[ai_id] = collections.deque()
+        
+        # Place it with the worker hosting the fewest of our AIs, clients
+        # start at different workers so between them they spread out
+        order = [(self.client_id + i) % len(self.inboxes) for i in range(len(self.inboxes))]
+        worker = min(order, key=lambda w: self.counts[w])
+        self.counts[worker] += 1
+        self.hosts[ai_id] = worker
+        
+        inbox = self.inboxes[worker]
+        inbox.put((None, {
+            "cmd":      "spawn",
+            "ai_id":    ai_id,
+            "client":   self.client_id,
+            "ai_class": core_ai.ai_classes[class_name],
+        }))
+        
+        return TaggedQueue(inbox, ai_id), PoolReceiver(self, ai_id)
+    
+    def pump(self, timeout=None):
+        """Sorts everything waiting in the outbox into the results of the
+        AI it came from, if timeout is given waits up to that long for
+        the first item"""
+        try:
+            if timeout != None:
+                self._route(*self.outbox.get(True, timeout))
+            
+            while True:
+                self._route(*self.outbox.get_nowait())
+        except queue.Empty:
+            pass
+    
+    def _route(self, ai_id, data):
+        if ai_id is not None:
+            self.results[ai_id].append(data)
+        
+        # An AI has quit, its worker has room for another
+        elif data['cmd'] == "stopped":
+            worker = self.hosts.pop(data['ai_id'])
+            self.counts[worker] -= 1
+
+class AIPool (object):
+    def __init__(self, workers=2, clients=1):
+        super(AIPool, self).__init__()
+        
+        outboxes = [multiprocessing.Queue() for i in range(clients)]
+        
+        self.workers = []
+        inboxes = []
+        for i in range(workers):
+            inbox = multiprocessing.Queue()
+            
+            # Daemons so they go with us rather than needing a time to live
+            p = multiprocessing.Process(target=_worker_process, args=(inbox, outboxes))
+            p.daemon = True
+            p.start()
+            
+            self.workers.append(p)
+            inboxes.append(inbox)
+        
+        # Clients for other processes, the first is used by this one
+        self.clients = [PoolClient(inboxes, outboxes[i], i) for i in range(clients)]
+    
+    def make_ai(self, class_name, snapshot=None):
+        return self.clients[0].make_ai(class_name, snapshot)
+    
+    def pump(self, timeout=None):
+        self.clients[0].pump(timeout)
+    
+    def close(self):
+        for inbox in self.clients[0].inboxes:
+            inbox.put((None, {"cmd": "quit"}))
+        
+        for p in self.workers:
+            p.join()
+        
+        self.workers = []
+
+class LocalHost (object):
+    """Hosts AIs in the sim's own process. Rather than cycling on the
+    clock they're stepped by the sim once per tick, so a match played
+    with the same seed always plays out the same way (see headless)."""
+    def __init__(self):
+        super(LocalHost, self).__init__()
+        self.ais = []
+    
+    def make_ai(self, class_name, snapshot=None):
+        """Same as core_ai.make_ai, the snapshot is read in this process"""
+        if class_name not in core_ai.ai_classes:
+            raise KeyError("No AI class by name of %s" % class_name)
+        
+        a = core_ai.ai_classes[class_name](LocalQueue(), LocalQueue(), snapshot)
+        a.out_queue.put({"data_type":"prefs","prefs":a.prefs})
+        self.ais.append(a)
+        
+        return a.in_queue, a.out_queue
+    
+    def step(self):
+        """Gives each AI that's still running one cycle"""
+        for a in self.ais:
+            if a.running:
+                a.step()
+
+# Shared by every sim in the process, see get_pool
+_pool = None
+
+def set_pool(pool):
+    """Makes every sim in this process use pool, an AIPool or one of its
+    PoolClients. batch uses this to have the sims in all of its worker
+    processes share the one pool."""
+    global _pool
+    _pool = pool
+
+def get_pool(workers=2):
+    """Returns the pool shared by every sim in this process, it's made the
+    first time it's asked for unless set_pool has been given one. A pool
+    made here is only shared within this process."""
+    global _pool
+    if _pool is None:
+        _pool = AIPool(workers)
+    return _pool
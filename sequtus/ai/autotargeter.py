@@ -5,8 +5,6 @@ strategic actions or anything beyond handling simple micromanagement.
 It is designed to have a direct link to the simulation and not perform
 long-running calculations."""
 
-import weakref
-
 from sequtus.libs import vectors
 
 class Autotargeter (object):
@@ -18,25 +16,43 @@ class Autotargeter (object):
         
         self.next_update = 0
         
-        self.enemy_actors = []
+        # Only used when the sim has no spatial hash, built the first time
+        # update_actor needs it after each refresh
+        self.enemy_actors = None
     
     def update(self):
         self.next_update -= 1
         if self.next_update > 0: return
         
-        self.enemy_actors = []
-        
-        for aid, a in self.sim.actors.items():
-            if a.team != self.team:
-                self.enemy_actors.append(weakref.ref(a)())
-        
+        self.enemy_actors = None
         self.next_update = 10
     
+    def _all_enemies(self):
+        if self.enemy_actors is None:
+            self.enemy_actors = [a for a in self.sim.actors.values() if a.team != self.team]
+        return self.enemy_actors
+    
     def update_actor(self, the_actor):
-        the_actor.enemy_targets = []
+        """Sets the enemy targets of the actor to all enemies within
+        its attack range, closest first"""
+        max_range = the_actor.max_attack_range
+        
+        # The sim's spatial hash lets us only look at actors near us
+        # rather than every enemy on the map
+        spatial_hash = getattr(self.sim, "spatial_hash", None)
+        if spatial_hash != None:
+            candidates = spatial_hash.query_radius(the_actor.pos, max_range)
+        else:
+            candidates = self._all_enemies()
+        
+        enemies = [a for a in candidates if a.team != self.team]
+        dists = vectors.distances(the_actor.pos, [a.pos for a in enemies])
+        
+        in_range = []
+        for a, dist in zip(enemies, dists):
+            if dist <= max_range:
+                in_range.append((dist, a.oid, a))
         
-        for a in self.enemy_actors:
-            dist = vectors.distance(a.pos, the_actor.pos)
-            
-            if dist <= the_actor.max_attack_range:
-                the_actor.enemy_targets.append(a)
+        # Ties are broken on oid so every client picks the same target
+        in_range.sort(key=lambda t: (t[0], t[1]))
+        the_actor.enemy_targets = [a for dist, oid, a in in_range]
@@ -3,8 +3,8 @@ import traceback
 import sys
 import random
 
-from engine.ai import core_ai
-from sequtus.libs import actor_lib, vectors
+from sequtus.ai import core_ai
+from sequtus.libs import actor_lib, ai_lib, vectors
 
 line_match = re.compile(r"(([0-9])\* )?(.*)")
 
@@ -25,6 +25,16 @@ class BasicComputerAI (core_ai.AICore):
         
         self.enemy_actors = {}
         self.own_actors = {}
+        
+        # base name -> set of the oids of our actors inside it, kept up
+        # to date from changed_oids by update_bases
+        self.base_members = {}
+        
+        # oid -> list of the bases that actor is inside
+        self.actor_bases = {}
+        
+        # oids of our actors that can construct buildings
+        self.constructors = set()
     
     def _init(self, **kwargs):
         super(BasicComputerAI, self)._init(**kwargs)
@@ -41,6 +51,13 @@ class BasicComputerAI (core_ai.AICore):
         base_setup = {
             "location":     base_data['location'],
             "size":         base_data['size'],
+            "area":         (
+                base_data['location'][0] - base_data['size'][0],
+                base_data['location'][1] - base_data['size'][1],
+                
+                base_data['location'][0] + base_data['size'][0],
+                base_data['location'][1] + base_data['size'][1],
+            ),
             "attacks":      {},
             "buildings":    [],
             
@@ -83,18 +100,41 @@ class BasicComputerAI (core_ai.AICore):
                     base_setup['attacks'][attack_id].append(actor_type)
         
         self.bases[base_name] = base_setup
+        self.base_members[base_name] = set()
+        
+        # Anything we already have needs placing in the new base
+        self.changed_oids.update(self.own_actors)
+    
+    def update_bases(self):
+        """Moves the actors that have come, gone or moved since the last
+        cycle into the right bases so the rest of the cycle never needs to
+        look at every actor we own"""
+        for oid in self.changed_oids:
+            for base_name in self.actor_bases.pop(oid, []):
+                self.base_members[base_name].discard(oid)
+            
+            a = self.own_actors.get(oid)
+            if a is None:
+                self.constructors.discard(oid)
+                continue
+            
+            if self.actor_types[a.actor_type]['can_construct']:
+                self.constructors.add(oid)
+            
+            inside = []
+            for base_name, base_data in self.bases.items():
+                if actor_lib.is_inside(a, base_data['area']):
+                    self.base_members[base_name].add(oid)
+                    inside.append(base_name)
+            
+            if inside != []:
+                self.actor_bases[oid] = inside
+        
+        self.changed_oids.clear()
     
     def inspect_bases(self):
         # First find out which buildings we are missing
         for base_name, base_data in self.bases.items():
-            base_area = (
-                base_data['location'][0] - base_data['size'][0],
-                base_data['location'][1] - base_data['size'][1],
-                
-                base_data['location'][0] + base_data['size'][0],
-                base_data['location'][1] + base_data['size'][1],
-            )
-            
             buildings_needed = set(base_data['buildings'])
             
             # Reset this now
@@ -110,14 +150,14 @@ class BasicComputerAI (core_ai.AICore):
             for b in base_data['buildings']:
                 total_needed[b] += 1
             
-            # Loop through all actors and see what we've got
-            for i, a in self.own_actors.items():
-                if actor_lib.is_inside(a, base_area):
-                    if a.actor_type in buildings_needed:
-                        found_buildings[a.actor_type] += 1
-                        
-                        if a.completion >= 100:
-                            base_data['current_buildings'].append(a.oid)
+            # Loop through the actors in the base and see what we've got
+            for oid in sorted(self.base_members[base_name]):
+                a = self.own_actors[oid]
+                if a.actor_type in buildings_needed:
+                    found_buildings[a.actor_type] += 1
+                    
+                    if a.completion >= 100:
+                        base_data['current_buildings'].append(a.oid)
             
             # Now also loop through all the buildings_in_progress
             # Use a range loop so we can update the list as we go
@@ -148,38 +188,34 @@ class BasicComputerAI (core_ai.AICore):
             # Narrow down our list of builders so we don't later iterate over
             # non-builders more than once
             builders = []
-            builders_used = []
-            for aid, a in self.own_actors.items():
-                if self.actor_types[a.actor_type]['can_construct']:
-                    if a.current_order[0] == "stop":
-                        builders.append(a)
+            for aid in sorted(self.constructors):
+                a = self.own_actors[aid]
+                if a.current_order[0] == "stop":
+                    builders.append(a)
             
-            # Now we work out which buildings we can build and who is closest to it
-            for building_type, amount in missing.items():
-                for i in range(amount):
-                    target_pos = base_data['location']
-                    
-                    closest_builder = None, 9999999
-                    for b in builders:
-                        if b in builders_used: continue
-                        if actor_lib.can_build(
-                            builder_type = self.actor_types[b.actor_type],
-                            item_type = self.actor_types[building_type],
-                            build_lists = self.build_lists,
-                        ):
-                            # If they are closest we want them to go build it
-                            dist = vectors.distance(target_pos, b.pos)
-                            
-                            if dist < closest_builder[1]:
-                                closest_builder = b, dist
-                    
-                    # Now remove them from the pool and issue the build order
-                    if closest_builder[0] != None:
-                        builders_used.append(closest_builder[0])
-                        self.issue_orders(closest_builder[0].oid, cmd="build", pos=target_pos, target=building_type)
-                        
-                        base_data['buildings_in_progress'].append([building_type, buildings_in_progress_ttl])
+            if builders == []:
+                continue
             
+            # One task per building we need, every building goes at the
+            # base location for now
+            target_pos = base_data['location']
+            tasks = []
+            for building_type in sorted(missing):
+                tasks.extend([building_type] * missing[building_type])
+            
+            # Work out who can build what and how far they have to go then
+            # share the buildings out between the builders in one go
+            dists = vectors.distances(target_pos, [b.pos for b in builders])
+            costs = []
+            for b, dist in zip(builders, dists):
+                costs.append([dist if self.can_build(b.actor_type, t) else None for t in tasks])
+            
+            for b, t in ai_lib.assign(costs):
+                building_type = tasks[t]
+                self.issue_orders(builders[b].oid, cmd="build", pos=target_pos, target=building_type)
+                
+                base_data['buildings_in_progress'].append([building_type, buildings_in_progress_ttl])
+    
     def plan_attacks(self):
         for base_name, base_data in self.bases.items():
             
@@ -206,12 +242,9 @@ class BasicComputerAI (core_ai.AICore):
                     is_buildable = False
                     for b in base_data['current_buildings']:
                         the_builder = self.own_actors[b].actor_type
-                        if actor_lib.can_build(
-                            builder_type = self.actor_types[the_builder],
-                            item_type = self.actor_types[a],
-                            build_lists = self.build_lists,
-                        ):
+                        if self.can_build(the_builder, a):
                             is_buildable = True
+                            break
                     
                     if is_buildable:
                         buildable_units.add(a)
@@ -266,11 +299,7 @@ class BasicComputerAI (core_ai.AICore):
                     builders[a_type] = []
                     for b in the_base['current_buildings']:
                         the_builder = self.own_actors[b].actor_type
-                        if actor_lib.can_build(
-                            builder_type = self.actor_types[the_builder],
-                            item_type = self.actor_types[a_type],
-                            build_lists = self.build_lists,
-                        ):
+                        if self.can_build(the_builder, a_type):
                             builders[a_type].append(b)
                     
                     # Now we find out if any of them have a slot in their queue free
@@ -287,6 +316,7 @@ class BasicComputerAI (core_ai.AICore):
         
     
     def cycle(self):
+        self.update_bases()
         self.inspect_bases()
         self.plan_attacks()
         
@@ -1,7 +1,21 @@
 import multiprocessing
 import time
 
-from sequtus.libs import vectors, ai_lib
+try:
+    import queue
+except ImportError:
+    import Queue as queue
+
+from sequtus.libs import vectors, ai_lib, actor_lib, snapshot_lib
+
+# Messages that replace everything the AI knows about the actors, if
+# several are waiting only the newest needs handling along with any
+# deltas sent after it
+full_actor_cmds = ("actors", "snapshot")
+actor_cmds = full_actor_cmds + ("actors_delta",)
+
+# Seconds between timing reports sent back to the sim
+timing_report_interval = 1
 
 ai_classes = {}
 def register_ai(class_name, class_template):
@@ -13,7 +27,7 @@ def register_ai(class_name, class_template):
 class AICore (object):
     """This forms the basis of an AI that runs a team."""
     
-    def __init__(self, in_queue, out_queue):
+    def __init__(self, in_queue, out_queue, snapshot=None):
         super(AICore, self).__init__()
         
         self.running = True
@@ -22,12 +36,34 @@ class AICore (object):
         self.in_queue = in_queue
         self.out_queue = out_queue
         
+        # Shared memory snapshot_lib.Snapshot the sim publishes the
+        # actors our team can see into, when used the sim only tells us
+        # when it's been updated
+        self.snapshot = snapshot
+        self.snapshot_version = None
+        self.actor_type_names = []
+        
         self.next_update = 0
         
         self.enemy_actors = []
         self.own_actors = []
         self.terrain = {}
         
+        # Every actor we know about keyed by oid, deltas are applied to
+        # these in place
+        self.known_actors = {}
+        
+        # oids that have appeared, gone, moved or changed team since the
+        # AI last looked, AIs that index actors by position clear it once
+        # they've caught up
+        self.changed_oids = set()
+        
+        self.actor_types = {}
+        self.build_lists = {}
+        
+        # builder type -> set of the types it can build, see can_build
+        self.buildable = {}
+        
         self.next_cycle = time.time()
         ai_lib.set_speed(self, 100)
         
@@ -35,6 +71,8 @@ class AICore (object):
             "_default":     self._default_data_handler,
             "init":         self._init,
             "actors":       self._recieve_actors,
+            "actors_delta": self._recieve_actors_delta,
+            "snapshot":     self._recieve_snapshot,
             "actor_types":  self._recieve_actor_types,
             "build_lists":  self._recieve_build_lists,
             "quit":         self._quit,
@@ -43,6 +81,10 @@ class AICore (object):
         # Flags
         self.actors_updated = False
         
+        # Timing since the last report
+        self._timing = None
+        self._reset_timing()
+        
         self.prefs = {
             "actor_format": "list",
         }
@@ -54,6 +96,27 @@ class AICore (object):
             print("Error reading in from in_queue")
             raise
         
+        self.handle_data(data)
+    
+    def drain_queue(self, timeout=0):
+        """Waits up to timeout seconds for a message and then takes
+        anything else already waiting, returns a list of them"""
+        messages = []
+        
+        try:
+            if timeout > 0:
+                messages.append(self.in_queue.get(True, timeout))
+            else:
+                messages.append(self.in_queue.get_nowait())
+            
+            while True:
+                messages.append(self.in_queue.get_nowait())
+        except queue.Empty:
+            pass
+        
+        return messages
+    
+    def handle_data(self, data):
         cmd = data['cmd']
         del(data['cmd'])
         
@@ -80,33 +143,118 @@ class AICore (object):
         # anything it needs to do differently
         self.actors_updated = True
         
+        old_actors = self.known_actors
+        
+        if type(actor_list) == dict:
+            self.known_actors = dict(actor_list)
+        else:
+            self.known_actors = dict([(a.oid, a) for a in actor_list])
+        
+        changed = self.changed_oids
+        changed.update(set(old_actors) - set(self.known_actors))
+        for oid, a in self.known_actors.items():
+            old = old_actors.get(oid)
+            if old is None or old.team != a.team or old.pos != a.pos:
+                changed.add(oid)
+        
+        self._split_actors()
+    
+    def _recieve_actors_delta(self, spawned, removed, changed):
+        """Applies the changes since the last update to the actors we
+        already have, the own/enemy views are only rebuilt if actors
+        have come or gone"""
+        self.actors_updated = True
+        known = self.known_actors
+        
+        rebuild = spawned != [] or removed != []
+        
+        for a in spawned:
+            known[a.oid] = a
+            self.changed_oids.add(a.oid)
+        
+        for oid in removed:
+            if oid in known:
+                del(known[oid])
+            self.changed_oids.add(oid)
+        
+        for oid, fields in changed.items():
+            a = known.get(oid)
+            if a is None: continue
+            
+            for k, v in fields.items():
+                if k in actor_lib.vector_attribs:
+                    v = vectors.V(v)
+                setattr(a, k, v)
+            
+            if "team" in fields:
+                rebuild = True
+            
+            if "team" in fields or "pos" in fields:
+                self.changed_oids.add(oid)
+        
+        if rebuild:
+            self._split_actors()
+    
+    def _split_actors(self):
+        """Sorts known_actors into own_actors and enemy_actors in the
+        format the AI asked for"""
         if self.prefs['actor_format'] == "dict":
-            return self._recieve_actors_as_dict(actor_list)
+            return self._split_actors_as_dict()
         
         self.enemy_actors = []
         self.own_actors = []
         
-        for a in actor_list:
+        for oid in sorted(self.known_actors):
+            a = self.known_actors[oid]
             if a.team == self.team:
                 self.own_actors.append(a)
             else:
                 self.enemy_actors.append(a)
     
-    def _recieve_actors_as_dict(self, actor_list):
+    def _split_actors_as_dict(self):
         self.enemy_actors = {}
         self.own_actors = {}
         
-        for aid, a in actor_list.items():
+        for aid, a in self.known_actors.items():
             if a.team == self.team:
                 self.own_actors[aid] = a
             else:
                 self.enemy_actors[aid] = a
     
+    def _recieve_snapshot(self, version, orders):
+        """The sim has published a new snapshot, orders holds the order
+        state of our own actors keyed by oid"""
+        read_version, actors = self.snapshot.read(self.actor_type_names)
+        
+        # The sim was writing the whole time we tried to read it, there
+        # will be another snapshot along shortly
+        if actors is None:
+            return
+        
+        self.snapshot_version = read_version
+        
+        for a in actors:
+            if a.oid in orders:
+                a.current_order, a.order_queue, a.build_queue = orders[a.oid]
+        
+        if self.prefs['actor_format'] == "dict":
+            self._recieve_actors(dict([(a.oid, a) for a in actors]))
+        else:
+            self._recieve_actors(actors)
+    
     def _recieve_actor_types(self, actor_types):
         self.actor_types = actor_types
+        self.actor_type_names = snapshot_lib.type_names(actor_types)
+        self.buildable = actor_lib.build_matrix(self.actor_types, self.build_lists)
     
     def _recieve_build_lists(self, build_lists):
         self.build_lists = build_lists
+        self.buildable = actor_lib.build_matrix(self.actor_types, self.build_lists)
+    
+    def can_build(self, builder_type, item_type):
+        """Looks up in the matrix built from our actor_types and
+        build_lists if builder_type can build item_type, both are names"""
+        return item_type in self.buildable.get(builder_type, ())
     
     def issue_orders(self, actor_id, cmd, pos=None, target=None):
         self.out_queue.put({
@@ -128,28 +276,100 @@ class AICore (object):
             self.own_actors[actor_id].current_order = cmd, pos, target
             if cmd == "build": self.own_actors[actor_id].build_queue.append(target)
     
-    def core_cycle(self):
-        """The central loop for the AI"""
+    def core_cycle(self, block=True):
+        """The central loop for the AI. Sleeps on the queue until either
+        something arrives or it's time for the next cycle so an idle AI
+        doesn't use any CPU. An AI sharing a process with others (see
+        ai_pool) passes block as False and leaves the waiting to the
+        pool."""
+        timeout = 0
+        if block:
+            timeout = max(0, self.next_cycle - time.time())
+        
+        messages = self.drain_queue(timeout)
+        
+        start = time.time()
+        for data in coalesce_messages(messages):
+            self.handle_data(data)
         
-        # If there's stuff in the queue then we'll read it in
-        while not self.in_queue.empty():
-            self.read_queue()
+        self._timing['messages'] += len(messages)
+        self._timing['handle_time'] += time.time() - start
         
-        if time.time() > self.next_cycle:
+        now = time.time()
+        if now >= self.next_cycle:
             self.cycle()
+            taken = time.time() - now
+            
+            self._timing['cycles'] += 1
+            self._timing['cycle_time'] += taken
+            self._timing['max_cycle_time'] = max(self._timing['max_cycle_time'], taken)
+            
+            # If we've fallen behind don't try to catch up
+            self.next_cycle = max(self.next_cycle + self._cycle_delay, now)
+        
+        if now - self._timing['since'] >= timing_report_interval:
+            self.report_timing()
+    
+    def step(self):
+        """Handles everything waiting and then cycles whatever the time,
+        used by ai_pool.LocalHost to run the AI in step with the sim"""
+        for data in coalesce_messages(self.drain_queue()):
+            self.handle_data(data)
+        
+        if self.running:
+            self.cycle()
+    
+    def _reset_timing(self):
+        self._timing = {
+            "since":            time.time(),
+            "cycles":           0,
+            "cycle_time":       0,
+            "max_cycle_time":   0,
+            "messages":         0,
+            "handle_time":      0,
+        }
+    
+    def report_timing(self):
+        """Sends how long we've spent cycling and handling messages since
+        the last report back to the sim"""
+        t = self._timing
+        self.out_queue.put({
+            "data_type":        "timing",
+            "period":           time.time() - t['since'],
+            "cycles":           t['cycles'],
+            "cycle_time":       t['cycle_time'],
+            "max_cycle_time":   t['max_cycle_time'],
+            "messages":         t['messages'],
+            "handle_time":      t['handle_time'],
+        })
+        self._reset_timing()
     
     def cycle(self):
         """This is intended to be overwritten by the subclass"""
         pass
 
-def _ai_process(ai_class, in_queue, out_queue):
+def coalesce_messages(messages):
+    """Drops actor updates made obsolete by a later full update, the
+    order of everything else is kept"""
+    last_full = None
+    for i, data in enumerate(messages):
+        if data['cmd'] in full_actor_cmds:
+            last_full = i
+    
+    if last_full is None:
+        return messages
+    
+    return [data for i, data in enumerate(messages)
+        if i >= last_full or data['cmd'] not in actor_cmds]
+
+def _ai_process(ai_class, in_queue, out_queue, snapshot=None):
     # Added to prevent memory leaks if the program doesn't
     # exit correctly
     start_time = time.time()
     time_to_live = 60 * 10# 10 Minutes
     
     try:
-        a = ai_class(in_queue, out_queue)
+        a = ai_class(in_queue, out_queue, snapshot)
         out_queue.put({"data_type":"prefs","prefs":a.prefs})
         time_to_live -= 1
         
@@ -161,8 +381,9 @@ def _ai_process(ai_class, in_queue, out_queue):
     except Exception as e:
         raise
 
-def make_ai(class_name):
-    """Returns the ai in and out queues"""
+def make_ai(class_name, snapshot=None):
+    """Returns the ai in and out queues, the snapshot must be created
+    before the process so it can be shared with it"""
     if class_name not in ai_classes:
         raise KeyError("No AI class by name of %s" % class_name)
     
@@ -171,7 +392,7 @@ def make_ai(class_name):
     
     ai_class = ai_classes[class_name]
     
-    p = multiprocessing.Process(target=_ai_process, args=(ai_class, ai_in_queue, ai_out_queue))
+    p = multiprocessing.Process(target=_ai_process, args=(ai_class, ai_in_queue, ai_out_queue, snapshot))
     p.start()
     
     return ai_in_queue, ai_out_queue
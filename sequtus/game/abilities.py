@@ -121,11 +121,14 @@ class Ability (object):
         if self.charge < self.required_charge:
             return False
         
-        # Check aim
-        if type(target) in (list, tuple):
-            target_facing = vectors.angle(self.actor.pos, target)
-        else:
-            target_facing = vectors.angle(self.actor.pos, target.pos)
+        # Check aim, the actor may have already worked out the facing
+        # for all of its abilities in one go
+        target_facing = kwargs.get("target_facing")
+        if target_facing is None:
+            if type(target) in (list, tuple):
+                target_facing = vectors.angle(self.actor.pos, target)
+            else:
+                target_facing = vectors.angle(self.actor.pos, target.pos)
         
         if not self.check_aim(target_facing):
             return False
@@ -164,12 +167,15 @@ class WeaponAbility (Ability):
         if not super(WeaponAbility, self).can_use(target, **kwargs):
             return False
         
-        if vectors.distance(self.actor.pos, target.pos) > self.max_range:
+        dist = kwargs.get("target_distance")
+        if dist is None:
+            dist = vectors.distance(self.actor.pos, target.pos)
+        
+        if dist > self.max_range:
             return False
         
-        if self.min_range > 0:
-            if vectors.distance(self.actor.pos, target.pos) < self.min_range:
-                return False
+        if dist < self.min_range:
+            return False
         
         if self.actor.team == target.team:
             return False
@@ -374,7 +380,7 @@ class MassDriver (ProjectileWeapon):
             direction = vectors.angle(origin_pos, target.pos)
             target_pos = target.pos
         
-        velocity = vectors.move_to_vector(direction, self.bullet['velocity'])
+        velocity = vectors.move_to_vector(direction, self.bullet['velocity'], self.actor.trig)
         velocity[2] = math_lib.calc_trajectory(0.1, vectors.distance(origin_pos, target_pos), self.bullet['velocity'])
         
         the_bullet = bullets.Shell(
@@ -1,11 +1,11 @@
-import actors
+from sequtus.game import actors
 
 class Building (actors.Actor):
     speed = 0
     
     def update(self):
         super(Building, self).update()
-        self.velocity = [0,0,0]
+        self.velocity *= 0
     
     def issue_command(self, cmd, pos=None, target=None):
         if cmd == "move":
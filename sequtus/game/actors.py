@@ -42,6 +42,10 @@ class Actor (object_base.ObjectBase):
     optimum_heal_range    = 100
     max_heal_range        = 100
     
+    # How far away the actor can see other actors, used to decide what
+    # the AI of the team gets told about
+    sight_radius            = 300
+    
     construction_rate       = 1
     repair_rate             = 1
     
@@ -202,6 +206,8 @@ class Actor (object_base.ObjectBase):
         self.max_heal_range         = data.get("max_heal_range", self.max_heal_range)
         self.optimum_heal_range     = data.get("optimum_heal_range", self.optimum_heal_range)
         
+        self.sight_radius           = data.get("sight_radius", self.sight_radius)
+        
         self.does_damage            = data.get("does_damage", self.does_damage)
         self.can_construct          = data.get("can_construct", self.can_construct)
         self.can_repair             = data.get("can_repair", self.can_repair)
@@ -395,7 +401,7 @@ class Actor (object_base.ObjectBase):
         self._help_ai()
         
         if cmd == "stop" or cmd == "hold position":
-            self.velocity = vectors.V(0,0,0)
+            self.velocity *= 0
             
             if target == 0:
                 self.next_order()
@@ -417,7 +423,7 @@ class Actor (object_base.ObjectBase):
                 # If not then we need to get closer
                 target_distance = vectors.distance(self.pos, target.pos)
                 if target_distance > self.optimum_attack_range:
-                    attack_pos = vectors.get_midpoint(self.pos, target.pos, self.optimum_attack_range)
+                    attack_pos = vectors.get_midpoint(self.pos, target.pos, self.optimum_attack_range, self.trig)
                     self._move_ai(attack_pos)
                 else:
                     # If we are close enough then we can slow down
@@ -432,7 +438,7 @@ class Actor (object_base.ObjectBase):
                 dist = vectors.distance(self.pos, target.pos)
                 
                 if dist > self.optimum_heal_range:
-                    target_pos = vectors.get_midpoint(self.pos, target.pos, self.optimum_heal_range)
+                    target_pos = vectors.get_midpoint(self.pos, target.pos, self.optimum_heal_range, self.trig)
                     self._move_ai(target_pos)
                 else:
                     self._decelerate_ai()
@@ -497,33 +503,36 @@ class Actor (object_base.ObjectBase):
             self.facing = target_angle
             return True
         
+        # Facing may be a copy if it is held in an actor store so we
+        # assign it back rather than altering it in place
+        facing = self.facing
         if diff < 0:
-            self.facing[0] -= self.turn_speed
+            facing[0] -= self.turn_speed
             for a in self.abilities: a.facing[0] += self.turn_speed
         else:
-            self.facing[0] += self.turn_speed
+            facing[0] += self.turn_speed
             for a in self.abilities: a.facing[0] -= self.turn_speed
         
+        self.facing = facing
         return False
     
     def _accelerate_ai(self, target):
         dist = vectors.distance(self.pos, target)
         
         if dist > self.max_velocity:
-            self.velocity = vectors.move_to_vector(self.pos.angle(target), self.max_velocity)
+            self.velocity = vectors.move_to_vector(self.pos.angle(target), self.max_velocity, self.trig)
         else:
-            self.velocity = vectors.move_to_vector(self.pos.angle(target), dist)
+            self.velocity = vectors.move_to_vector(self.pos.angle(target), dist, self.trig)
     
     def _decelerate_ai(self):
         total_velocity = self.velocity.magnitude()
         
+        # Scale in place rather than building a new vector each tick
         if total_velocity <= self.deceleration:
-            self.velocity = vectors.V(0,0,0)
+            self.velocity *= 0
         else:
             new_vel = total_velocity - self.deceleration
-            div = total_velocity / new_vel
-            
-            self.velocity = vectors.V([v / div for v in self.velocity])
+            self.velocity *= new_vel / total_velocity
         
     
     def _help_ai(self):
@@ -552,11 +561,16 @@ class Actor (object_base.ObjectBase):
                 a.turn(self.facing)
             return
         
+        # Every ability shares the same target so we only need to work
+        # out where it is once
+        target_facing = vectors.angle(self.pos, target.pos)
+        target_distance = vectors.distance(self.pos, target.pos)
+        
         for a in self.abilities:
             # Turn the ability towards it's target
-            a.turn(vectors.angle(self.pos, target.pos))
+            a.turn(target_facing)
             
-            if a.can_use(target):
+            if a.can_use(target, target_facing=target_facing, target_distance=target_distance):
                 a.use(target)
     
     def _passive_ai(self):
@@ -14,10 +14,87 @@ from sequtus.libs import vectors
 root_path = re.compile(r"(.*/)?[a-zA-Z_]*\.py")
 file_name = re.compile(r".*/(.*?)\.[a-zA-Z]*")
 
+class Scheduler (object):
+    """Works out when the main loop should run logic cycles and when it
+    should redraw. Logic runs on a fixed step of 1/cps seconds no matter
+    how long drawing takes, if the loop falls behind it runs up to
+    max_catch_up cycles in a row to get back on time and past that it
+    gives up on the missed time rather than spiral. When there is
+    nothing to do it sleeps until the next cycle or frame is due."""
+    
+    def __init__(self, cps, fps, max_catch_up=5, now=time.time, sleep=time.sleep):
+        super(Scheduler, self).__init__()
+        
+        self.cycle_delay = 1/cps
+        self.frame_delay = 1/fps
+        self.max_catch_up = max_catch_up
+        
+        self._now = now
+        self._sleep = sleep
+        
+        self.next_cycle = None
+        self.next_frame = None
+        
+        # How many cycles we've given up on to stay responsive
+        self.dropped_cycles = 0
+    
+    def reset(self):
+        """Start timing from now, used at startup and after anything
+        that blocks the loop for a long time (e.g. loading)"""
+        now = self._now()
+        self.next_cycle = now
+        self.next_frame = now
+    
+    def cycles_due(self):
+        """Returns how many logic cycles to run now and moves the
+        schedule on by that many"""
+        if self.next_cycle is None: self.reset()
+        
+        now = self._now()
+        if now < self.next_cycle:
+            return 0
+        
+        due = int((now - self.next_cycle) / self.cycle_delay) + 1
+        
+        if due > self.max_catch_up:
+            self.dropped_cycles += due - self.max_catch_up
+            due = self.max_catch_up
+            self.next_cycle = now + self.cycle_delay
+        else:
+            self.next_cycle += due * self.cycle_delay
+        
+        return due
+    
+    def frame_due(self):
+        """Returns True if it's time to redraw, frames are never caught
+        up on, a late one just pushes back the next"""
+        if self.next_frame is None: self.reset()
+        
+        now = self._now()
+        if now < self.next_frame:
+            return False
+        
+        self.next_frame += self.frame_delay
+        if self.next_frame <= now:
+            self.next_frame = now + self.frame_delay
+        
+        return True
+    
+    def wait(self):
+        """Sleeps until the next cycle or frame is due"""
+        if self.next_cycle is None: self.reset()
+        
+        delay = min(self.next_cycle, self.next_frame) - self._now()
+        if delay > 0:
+            self._sleep(delay)
+
 class EngineV4 (object):
     fps = 30# Frames per second
     cps = 30# Cycles per second (the running speed of the game)
     
+    # Most logic cycles to run back to back when we've fallen behind
+    max_catch_up = 5
+    
     def __init__(self):
         super(EngineV4, self).__init__()
         
@@ -32,6 +109,8 @@ class EngineV4 (object):
         
         # Image cache
         self.images = {}
+        
+        self.scheduler = Scheduler(self.cps, self.fps, self.max_catch_up)
     
     def quit(self, event=None):
         """Close everything down"""
@@ -66,6 +145,9 @@ class EngineV4 (object):
             self.startup()
             self.set_screen(screen, **kwargs)
             
+            # Loading can take a while, don't try to catch up on it
+            self.scheduler.reset()
+            
             while True:
                 for event in pygame.event.get():# Event handlers
                     if event.type == ACTIVEEVENT:       self.current_screen._handle_active(event)
@@ -80,8 +162,13 @@ class EngineV4 (object):
                 self.current_screen._handle_keyhold()
                 
                 # Update and redraw calls
-                self.current_screen._update()
-                self.current_screen._redraw()
+                for i in range(self.scheduler.cycles_due()):
+                    self.current_screen._update()
+                
+                if self.scheduler.frame_due():
+                    self.current_screen._redraw()
+                
+                self.scheduler.wait()
             
             # If anything goes wrong we want to try to kill pygame gracefully
         except Exception as e:
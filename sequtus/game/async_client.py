@@ -0,0 +1,45 @@
+"""
+The client for async_server on PodSixNet's asyncio transport, Python 3
+only. It has the same interface as client.Client so a sim can use either,
+but it owns its EndPoint rather than sharing PodSixNet's connection
+singleton.
+"""
+
+from __future__ import division
+
+from sequtus.PodSixNet.AsyncTransport import EndPoint
+from sequtus.game import client_core
+from sequtus.libs import wire_lib
+
+class Client (client_core.ClientHandlers):
+    def __init__(self, sim, address, port, debug=False):
+        super(Client, self).__init__()
+        self.sim = sim
+        self.debug = debug
+        
+        self.connection = EndPoint((address, port))
+        self.connection.codec = wire_lib
+        self.connection.DoConnect()
+    
+    def Send(self, data):
+        if self.debug:
+            print(data)
+        
+        self.connection.Send(data)
+    
+    def quit(self, event=None):
+        self.running = False
+        self.connection.Send({'action': 'quit'})
+    
+    def Pump(self):
+        for data in self.connection.GetQueue():
+            [getattr(self, n)(data) for n in ("Network_" + data['action'], "Network") if hasattr(self, n)]
+    
+    def update(self):
+        self.connection.Pump()
+        self.Pump()
+    
+    def close(self):
+        """Closes the connection and the EndPoint's event loop"""
+        self.connection.close()
+        self.connection._loop.close()
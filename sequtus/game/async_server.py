@@ -0,0 +1,49 @@
+"""
+The game server on PodSixNet's asyncio transport, Python 3 only. Each
+match is a MatchServer listening on its own port. They can all share one
+event loop in one process, and each only wakes up for network traffic or
+its tick. That lets a single process host dozens of matches.
+"""
+
+from __future__ import division
+
+import asyncio
+
+from sequtus.PodSixNet.AsyncTransport import Channel, Server, serve
+from sequtus.game import server_core
+from sequtus.libs import wire_lib
+
+class ClientChannel(server_core.PlayerHandlers, Channel):
+    codec = wire_lib
+    
+    def __init__(self, *args, **kwargs):
+        Channel.__init__(self, *args, **kwargs)
+        
+        # points of the player
+        self.points = 0
+        self.player_id = 0
+
+class MatchServer(server_core.Match, Server):
+    channelClass = ClientChannel
+    tick_delay = 1/30
+    
+    def __init__(self, *args, **kwargs):
+        Server.__init__(self, *args, **kwargs)
+        self.setup_match()
+    
+    def Tick(self):
+        if not self.running:
+            self.close()
+            return
+        
+        self.send_orders()
+
+def make_matches(count, address="127.0.0.1", first_port=0):
+    """count MatchServers on consecutive ports starting at first_port, a
+    first_port of 0 lets each pick a free port"""
+    return [MatchServer(localaddr=(address, first_port + i if first_port else 0)) for i in range(count)]
+
+def run_matches(count, address="127.0.0.1", first_port=31500):
+    """Hosts count matches in this process until all of them have quit"""
+    matches = make_matches(count, address, first_port)
+    asyncio.run(serve(matches))
@@ -0,0 +1,221 @@
+"""
+Plays lots of headless matches across several processes and gathers up
+the results, used for balance testing and for spotting changes in how
+matches play out. Results are saved in columns, one list per field with
+an entry per match.
+"""
+
+from __future__ import division
+
+import itertools
+import json
+import multiprocessing
+import random
+import time
+
+from sequtus.ai import ai_pool
+from sequtus.game import headless
+from sequtus.defaults import sim as default_sim
+
+# Played when no scenario is given, an AI on each of two teams so a match
+# lasts until one of them wins or it's called a draw
+default_scenario = "sequtus/defaults/batch_scenario.json"
+
+# The sim methods we time separately, everything else is only counted
+# as part of the total time spent in update
+subsystems = (
+    "update_ai_queues",
+    "read_ai_queues",
+    "send_recieve_orders",
+    "issue_orders",
+    "find_collisions",
+)
+
+def _timed(method, name, timings):
+    def timed_method(*args, **kwargs):
+        start = time.time()
+        try:
+            return method(*args, **kwargs)
+        finally:
+            timings[name] += time.time() - start
+    return timed_method
+
+def time_subsystems(sim, names=subsystems):
+    """Wraps the named methods of this sim so the time spent in each is
+    added up, returns the dict the totals are kept in"""
+    timings = dict([(name, 0) for name in names])
+    
+    for name in names:
+        setattr(sim, name, _timed(getattr(sim, name), name, timings))
+    
+    return timings
+
+def make_jobs(scenarios, matches, ais=None, seed=0):
+    """One job per match. Each scenario is played matches times for every
+    way of giving its AI teams one of the ais, without ais the scenario's
+    own AIs are used."""
+    jobs = []
+    
+    for scenario in scenarios:
+        combinations = [None]
+        
+        if ais:
+            teams = sorted(headless._load(scenario).get('ais', {}).keys())
+            combinations = [dict(zip(teams, c)) for c in itertools.product(ais, repeat=len(teams))]
+        
+        for ai_types in combinations:
+            for i in range(matches):
+                jobs.append({
+                    "match":    len(jobs),
+                    "scenario": scenario,
+                    "ais":      ai_types,
+                    "seed":     seed + len(jobs),
+                })
+    
+    return jobs
+
+def run_job(job, game_data, config=None, image_sizes=None, max_ticks=10000, sim_class=default_sim.TestSim):
+    """Plays out a single match, returns a dict of its results"""
+    random.seed(job['seed'])
+    
+    scenario = headless._load(job['scenario'])
+    if job['ais']:
+        scenario = dict(scenario)
+        scenario['ais'] = dict([(team, dict(scenario['ais'][team], type=ai_type))
+            for team, ai_type in job['ais'].items()])
+    
+    start = time.time()
+    sim = headless.make_sim(scenario, game_data, config, image_sizes, sim_class)
+    load_time = time.time() - start
+    
+    try:
+        timings = time_subsystems(sim, ("update",) + subsystems)
+        
+        start = time.time()
+        headless.play_out(sim, max_ticks)
+        run_time = time.time() - start
+        
+        result = headless.match_result(sim)
+    finally:
+        sim.quit()
+    
+    row = {
+        "match":        job['match'],
+        "scenario":     job['scenario'] if type(job['scenario']) != dict else None,
+        "ais":          job['ais'],
+        "seed":         job['seed'],
+        "winner":       result['winner'],
+        "ticks":        result['tick'],
+        "teams":        result['teams'],
+        "load_time":    load_time,
+        "run_time":     run_time,
+    }
+    
+    for name, t in timings.items():
+        row["time_%s" % name] = t
+    
+    return row
+
+def _worker_process(jobs, results, settings, pool_client=None):
+    if pool_client != None:
+        ai_pool.set_pool(pool_client)
+    
+    while True:
+        job = jobs.get()
+        if job is None:
+            return
+        
+        try:
+            results.put(run_job(job, **settings))
+        except Exception as e:
+            results.put({"match": job['match'], "error": "%s: %s" % (type(e).__name__, e)})
+
+def run_batch(jobs, game_data, config=None, image_sizes=None, max_ticks=10000, workers=4, sim_class=default_sim.TestSim, ai_pool_workers=0):
+    """Runs the jobs across workers processes, returns the result rows in
+    match order. The workers are normal processes rather than a Pool as
+    daemonic processes can't start the AI processes a sim wants.
+    
+    With ai_pool_workers above 0 the AIs of every match are hosted by one
+    ai_pool.AIPool of that many processes, made here and shared by all the
+    workers. Otherwise each AI gets a process of its own."""
+    settings = {
+        "game_data":    headless._load(game_data),
+        "config":       headless._load(config),
+        "image_sizes":  headless._load(image_sizes),
+        "max_ticks":    max_ticks,
+        "sim_class":    sim_class,
+    }
+    
+    job_queue = multiprocessing.Queue()
+    result_queue = multiprocessing.Queue()
+    
+    for j in jobs:
+        job_queue.put(j)
+    
+    process_count = max(1, min(workers, len(jobs)))
+    
+    # The pool has to exist before the workers so each can be started
+    # with a client of it
+    pool = None
+    if ai_pool_workers > 0:
+        pool = ai_pool.AIPool(ai_pool_workers, clients=process_count)
+        settings['config'] = dict(settings['config'] or {}, ai_pool_workers=ai_pool_workers)
+    
+    processes = []
+    for i in range(process_count):
+        job_queue.put(None)
+        
+        pool_client = pool.clients[i] if pool != None else None
+        p = multiprocessing.Process(target=_worker_process, args=(job_queue, result_queue, settings, pool_client))
+        p.start()
+        processes.append(p)
+    
+    rows = [result_queue.get() for j in jobs]
+    
+    for p in processes:
+        p.join()
+    
+    if pool != None:
+        pool.close()
+    
+    rows.sort(key=lambda r: r['match'])
+    return rows
+
+def columns(rows):
+    """Turns a list of result dicts into a dict of lists, rows missing a
+    field get None for it"""
+    names = set()
+    for r in rows:
+        names.update(r.keys())
+    
+    return dict([(n, [r.get(n) for r in rows]) for n in sorted(names)])
+
+def save_results(rows, file_path):
+    with open(file_path, "w") as f:
+        f.write(json.dumps(columns(rows), indent=4, sort_keys=True))
+
+def summarise(rows):
+    """A line of text per winner and an average tick count"""
+    wins = {}
+    errors = 0
+    ticks = []
+    
+    for r in rows:
+        if "error" in r:
+            errors += 1
+            continue
+        
+        wins[r['winner']] = wins.get(r['winner'], 0) + 1
+        ticks.append(r['ticks'])
+    
+    lines = []
+    for winner in sorted(wins, key=str):
+        lines.append("Winner %s: %d" % (winner, wins[winner]))
+    
+    if ticks != []:
+        lines.append("Average ticks: %.1f" % (sum(ticks) / len(ticks)))
+    
+    if errors > 0:
+        lines.append("Errors: %d" % errors)
+    
+    return "\n".join(lines)
@@ -1,10 +1,10 @@
-from __future__ import division
-
 """
 BattleSim is the subclass that runs the battle itself.
 The sim is expected to be subclassed so as to program in the game rules.
 """
 
+from __future__ import division
+
 import time
 import sys
 import json
@@ -12,9 +12,9 @@ import weakref
 
 import pygame
 
-from sequtus.libs import actor_lib, vectors, sim_lib, ai_lib
-from sequtus.game import actor_subtypes, teams, client
-from sequtus.ai import autotargeter, core_ai
+from sequtus.libs import actor_lib, vectors, sim_lib, ai_lib, spatial_lib, store_lib, snapshot_lib, visibility_lib, order_lib
+from sequtus.game import actor_subtypes, teams, bullets
+from sequtus.ai import autotargeter, core_ai, ai_pool
 
 def handle_number(v):
     if type(v) not in (int, float):
@@ -24,6 +24,14 @@ def handle_number(v):
     
     return v
 
+def handle_string(v):
+    if type(v) not in (str, type(u"")):
+        raise Exception("%s (%s) is not a string but needs to be cast as one" % (
+            v, type(v)
+        ))
+    
+    return str(v)
+
 def handle_boolean(v):
     if type(v) != bool:
         raise Exception("%s (%s) is not a boolean but needs to be cast as one" % (
@@ -35,10 +43,24 @@ def handle_boolean(v):
 attribute_handlers = {
     "number":   handle_number,
     "boolean":  handle_boolean,
+    "string":   handle_string,
 }
 
 attribute_list = (
     ("collision_interval",  "_collision_interval",  "number"),
+    ("collision_cell_size", "_collision_cell_size", "number"),
+    ("collision_strategy",  "_collision_strategy",  "string"),
+    ("use_actor_store",     "_use_actor_store",     "boolean"),
+    ("actor_store_capacity","_actor_store_capacity","number"),
+    ("trig_resolution",     "_trig_resolution",     "number"),
+    ("use_ai_snapshot",     "_use_ai_snapshot",     "boolean"),
+    ("ai_snapshot_capacity","_ai_snapshot_capacity","number"),
+    ("ai_update_interval",  "_ai_update_interval",  "number"),
+    ("ai_resync_interval",  "_ai_resync_interval",  "number"),
+    ("fog_of_war",          "_fog_of_war",          "boolean"),
+    ("ai_pool_workers",     "_ai_pool_workers",     "number"),
+    ("step_ais",            "_step_ais",            "boolean"),
+    ("async_client",        "_async_client",        "boolean"),
     ("scroll_speed",        "scroll_speed",         "number"),
     ("allow_mouse_scroll",  "allow_mouse_scroll",   "boolean"),
     ("scroll_delay",        "scroll_delay",         "number"),
@@ -79,13 +101,35 @@ class BattleSim (object):
             self.orders[i] = []
             self.q_orders[i] = []
         
+        # Group orders (see order_lib) to send and those the server has
+        # sent back keyed by the tick they're for
+        self.group_orders_to_send = []
+        self.g_orders = {}
+        
         # How many cycles between collision checks
         self._collision_interval = 5
         self._collision_inverval_count = 0
         
-        # CPS (update rate)
-        self._next_update = 0
-        self._update_delay = 1/engine.cps
+        # Broad phase for collisions and placement, actors keep their own
+        # entry up to date as they move
+        self._collision_cell_size = 64
+        self.spatial_hash = spatial_lib.SpatialHash(self._collision_cell_size)
+        
+        # Which broad phase find_collisions uses, one of
+        # "spatial_hash", "sweep_and_prune" or "brute_force"
+        self._collision_strategy = "spatial_hash"
+        self.sweep_and_prune = sim_lib.SweepAndPrune()
+        
+        # Optional NumPy backed store for actor kinematics, when used the
+        # store moves every actor at the start of the tick
+        self._use_actor_store = False
+        self._actor_store_capacity = 1024
+        self.actor_store = None
+        
+        # Resolution in degrees of the sin/cos lookup table actors use
+        # for movement, 0 means use math.sin etc directly
+        self._trig_resolution = 0
+        self.trig = None
         
         # Vars
         self.running = True
@@ -104,6 +148,42 @@ class BattleSim (object):
         self.autotargeters = {}
         self.out_queues = {}
         self.in_queues = {}
+        
+        # AIs read actors from a shared memory snapshot rather than
+        # having them pickled into each of their queues
+        self._use_ai_snapshot = True
+        self._ai_snapshot_capacity = 2048
+        self._ai_update_interval = 30
+        
+        # When above 0 AIs are hosted by the process wide ai_pool rather
+        # than getting a process each
+        self._ai_pool_workers = 0
+        
+        # AIs run in our own process and are stepped once per tick rather
+        # than pacing themselves on the clock, see ai_pool.LocalHost
+        self._step_ais = False
+        self.ai_host = None
+        
+        # Connect with async_client (PodSixNet on asyncio) rather than
+        # client, needed from Python 3.12 where asyncore is gone
+        self._async_client = False
+        
+        # AI team -> the snapshot its AI reads, each holds only the
+        # actors that team can see
+        self.snapshots = {}
+        self._actor_type_ids = {}
+        
+        # Without the snapshot AIs are sent what has changed since the
+        # last update, every so many updates they get everything again
+        # in case they've drifted
+        self._ai_resync_interval = 10
+        self._ai_update_count = 0
+        self._ai_sent_states = {}
+        self._ai_synced = set()
+        
+        # AIs are only told about actors their team can see
+        self._fog_of_war = True
+        self.visibility = visibility_lib.Visibility()
         self.cycle_count = [0, 0]
         
         # Used to signal that we may need to update a menu
@@ -119,6 +199,9 @@ class BattleSim (object):
         
         self.ai_prefs = {}
         
+        # The latest timing report from each AI
+        self.ai_timing = {}
+        
         # Now load it all up, if we error here we want to kill our threads
         try:
             self.load_all(player_team, scenario, game_data, config)
@@ -131,7 +214,13 @@ class BattleSim (object):
             self.connect(address, port)
     
     def connect(self, address, port):
-        self.connection = client.Client(self, address, port)
+        # Imported here so only the one we use needs its transport
+        if self._async_client:
+            from sequtus.game import async_client
+            self.connection = async_client.Client(self, address, port)
+        else:
+            from sequtus.game import client
+            self.connection = client.Client(self, address, port)
     
     # These are the "public" handles to queue orders to be sent to the server
     def add_order(self, the_actor, command, pos=None, target=None):
@@ -158,6 +247,19 @@ class BattleSim (object):
         
         self.orders_to_queue.append((the_actor, command, pos, target))
     
+    def add_group_order(self, actors, command, pos=None, target=None, queued=False, formation=None):
+        """Gives the same order to a list of actors in a single message,
+        formation spreads a move out around pos (see order_lib)"""
+        actors = [a if type(a) == int else a.oid for a in actors]
+        
+        if type(target) != int and target != None:
+            target = target.oid
+        
+        if actors == []:
+            return
+        
+        self.group_orders_to_send.append((actors, command, pos, target, queued, formation))
+    
     # These functions actually add the order when the network says so
     def _real_issue_order(self, tick, actor_id, command, pos, target):
         the_actor = self.actors[actor_id]
@@ -171,6 +273,23 @@ class BattleSim (object):
             self.q_orders[tick] = []
         self.q_orders[tick].append((the_actor, command, pos, target))
     
+    def _real_group_order(self, tick, actor_ids, command, pos, target, queued, formation):
+        if tick not in self.g_orders:
+            self.g_orders[tick] = []
+        self.g_orders[tick].append((actor_ids, command, pos, target, queued, formation))
+    
+    def _real_orders(self, orders, groups=()):
+        """Takes lists of order and group order tuples as unpacked by
+        order_lib"""
+        for actor_id, command, pos, target, tick, queued in orders:
+            if queued:
+                self._real_queue_order(tick, actor_id, command, pos, target)
+            else:
+                self._real_issue_order(tick, actor_id, command, pos, target)
+        
+        for actor_ids, command, pos, target, tick, queued, formation in groups:
+            self._real_group_order(tick, actor_ids, command, pos, target, queued, formation)
+    
     def quit(self, event=None):
         for k, q in self.out_queues.items():
             q.put({"cmd":"quit"})
@@ -179,13 +298,10 @@ class BattleSim (object):
             self.connection.Send({'action': 'quit'})
     
     def _update(self):
-        """Wrapper around update to not update too fast"""
-        if time.time() < self._next_update: return
-        
+        """Called by the engine's scheduler once per logic cycle (see
+        application_core.Scheduler)"""
         if self.running:
             self.update()
-        
-        self._next_update = time.time() + self._update_delay
     
     def data_dump(self, file_path=None):
         """Dumps data for debugging purposes"""
@@ -203,7 +319,7 @@ class BattleSim (object):
             data.append("velocity: %s" % a.velocity)
         
         data.append("\n**** Collisions **** ")
-        data.append(str(sim_lib.get_collisions(self.actors)))
+        data.append(str(self.find_collisions()))
         
         data = "\n".join(data)
         
@@ -217,6 +333,18 @@ class BattleSim (object):
     
     def issue_orders(self):
         """Issues the orders that have been stored in the delayed storage"""
+        # Group orders are expanded now, anything that's died since the
+        # order was given is left out
+        for actor_ids, cmd, pos, target, queued, formation in self.g_orders.pop(self.tick, []):
+            alive = [oid for oid in actor_ids if oid in self.actors]
+            
+            expanded = order_lib.expand_group(alive, cmd, pos, target, formation)
+            
+            if queued:
+                self.q_orders[self.tick].extend([(self.actors[o], c, p, t) for o, c, p, t in expanded])
+            else:
+                self.orders[self.tick].extend([(self.actors[o], c, p, t) for o, c, p, t in expanded])
+        
         for a, cmd, pos, target in self.orders[self.tick]:
             a.issue_command(cmd, pos, target)
         
@@ -233,11 +361,15 @@ class BattleSim (object):
         all run the sim at the same speed. Make sure to add tests for it.
         """
         
-        for the_actor, cmd, pos, target in self.orders_to_send:
-            self.connection.Send({'action': 'issue_order', "cmd":cmd, "pos":pos, "target":target, "actor":the_actor, "tick":self.tick + self.tick_jump})
+        # Everything for this tick goes in one message
+        tick = self.tick + self.tick_jump
+        orders = [(a, cmd, pos, target, tick, False) for a, cmd, pos, target in self.orders_to_send]
+        orders.extend([(a, cmd, pos, target, tick, True) for a, cmd, pos, target in self.orders_to_queue])
+        groups = [(actors, cmd, pos, target, tick, queued, formation)
+            for actors, cmd, pos, target, queued, formation in self.group_orders_to_send]
         
-        for the_actor, cmd, pos, target in self.orders_to_queue:
-            self.connection.Send({'action': 'issue_order', "cmd":cmd, "pos":pos, "target":target, "actor":the_actor, "tick":self.tick + self.tick_jump})
+        if orders != [] or groups != []:
+            self.connection.Send(order_lib.pack_orders(orders, groups))
         
         # if self.orders_to_send != [] or self.orders_to_queue != []:
         #     print(self.orders_to_send)
@@ -245,6 +377,7 @@ class BattleSim (object):
         
         self.orders_to_send = []
         self.orders_to_queue = []
+        self.group_orders_to_send = []
     
     def read_ai_queues(self):
         for t, q in self.in_queues.items():
@@ -259,6 +392,9 @@ class BattleSim (object):
                     self.add_order(a, data['cmd'], pos=data['pos'], target=data['target'])
                 elif data['data_type'] == "prefs":
                     self.ai_prefs[t] = data['prefs']
+                elif data['data_type'] == "timing":
+                    del(data['data_type'])
+                    self.ai_timing[t] = data
                 else:
                     raise Exception("No handler for AI cmd of %s (full data: %s)" % (
                         data['data_type'], str(data))
@@ -266,32 +402,96 @@ class BattleSim (object):
                 
     
     def update_ai_queues(self):
-        actor_list = []
-        actor_dict = {}
-        for aid, a in self.actors.items():
-            sa = actor_lib.strip_actor(a)
+        if self._fog_of_war:
+            ai_teams = [int(t) for t in self.out_queues]
+            self.visibility.update(self.actors, ai_teams, self.spatial_hash)
+        
+        if self.snapshots != {}:
+            versions = {}
+            for t, snapshot in self.snapshots.items():
+                if self._fog_of_war:
+                    visible = self.visibility.visible.get(int(t), set())
+                    team_actors = [self.actors[oid] for oid in sorted(visible)]
+                else:
+                    team_actors = self.actors
+                
+                versions[t] = snapshot.publish(team_actors, self._actor_type_ids)
             
-            actor_list.append(sa)
-            actor_dict[a.oid] = sa
+            # Too many actors to fit, fall back to the queues
+            if None not in versions.values():
+                # Should we fall back later the AIs will need everything
+                self._ai_synced = set()
+                return self._send_snapshot_notices(versions)
+        
+        resync = self._ai_update_count % self._ai_resync_interval == 0
+        self._ai_update_count += 1
         
-        # TODO - Make it so that each AI only gets a list of actors
-        # that it can actually see. That way it can't cheat
+        if resync:
+            self._ai_synced = set()
         
+        states = {}
+        for aid, a in self.actors.items():
+            states[aid] = actor_lib.actor_state(a)
+        
+        # Each AI only gets told about the actors it can see
+        stripped = {}
         for t, q in self.out_queues.items():
             if t not in self.ai_prefs: continue
-            if self.ai_prefs[t].get("actor_format", "list") == "list":
-                data = [{
-                    "cmd":          "actors",
-                    "actor_list":   actor_list,
-                }]
+            
+            if self._fog_of_war:
+                visible = self.visibility.visible.get(int(t), set())
+                team_states = dict([(oid, states[oid]) for oid in visible if oid in states])
+            else:
+                team_states = states
+            
+            # Only send what has changed to AIs that have had everything
+            if t in self._ai_synced:
+                spawned, removed, changed = actor_lib.state_delta(
+                    self._ai_sent_states.get(t, {}), team_states, self.actors)
+                
+                if spawned != [] or removed != [] or changed != {}:
+                    q.put({
+                        "cmd":      "actors_delta",
+                        "spawned":  spawned,
+                        "removed":  removed,
+                        "changed":  changed,
+                    })
+            
             else:
-                data = [{
+                for oid in team_states:
+                    if oid not in stripped:
+                        stripped[oid] = actor_lib.strip_actor(self.actors[oid])
+                
+                if self.ai_prefs[t].get("actor_format", "list") == "list":
+                    actor_list = [stripped[oid] for oid in sorted(team_states)]
+                else:
+                    actor_list = dict([(oid, stripped[oid]) for oid in team_states])
+                
+                q.put({
                     "cmd":          "actors",
-                    "actor_list":   actor_dict,
-                }]
+                    "actor_list":   actor_list,
+                })
+                
+                self._ai_synced.add(t)
             
-            for d in data:
-                q.put(d)
+            self._ai_sent_states[t] = team_states
+    
+    def _send_snapshot_notices(self, versions):
+        """Tells each AI there's a new snapshot along with the orders of
+        its own actors, the only part that doesn't fit in the snapshot"""
+        orders = {}
+        for aid, a in self.actors.items():
+            if a.team not in orders:
+                orders[a.team] = {}
+            orders[a.team][aid] = snapshot_lib.order_state(a)
+        
+        for t, q in self.out_queues.items():
+            if t not in self.ai_prefs: continue
+            q.put({
+                "cmd":      "snapshot",
+                "version":  versions[t],
+                "orders":   orders.get(int(t), {}),
+            })
     
     def update(self):
         """The core function of the sim, this is where the 'magic happens'"""
@@ -299,12 +499,15 @@ class BattleSim (object):
         self.next_ai_update -= 1
         if self.next_ai_update <= 0:
             self.update_ai_queues()
-            self.next_ai_update = 30
+            self.next_ai_update = self._ai_update_interval
         
         # Update our network connection
         if self.connection == None: return
         self.connection.update()
         
+        if self.ai_host != None:
+            self.ai_host.step()
+        
         self.read_ai_queues()
         
         self.tick += 1
@@ -325,6 +528,11 @@ class BattleSim (object):
         for t, a in self.autotargeters.items():
             a.update()
         
+        # Move everything held in the store in one go, the actors
+        # then skip their own movement
+        if self.actor_store != None:
+            self.actor_store.step()
+        
         # Update the actors themselves
         to_remove = []
         to_add = []
@@ -345,7 +553,7 @@ class BattleSim (object):
                     a_type = self.actor_types[type_name]
             
                     new_rect = pygame.Rect(pos[0], pos[1], a_type['size'][0], a_type['size'][1])
-                    building_rect = ai_lib.place_actor(self.actors, new_rect, [50, 100, 200], self.battlefield['size'])
+                    building_rect = ai_lib.place_actor(self.actors, new_rect, [50, 100, 200], self.battlefield['size'], self.spatial_hash)
                     
                     if building_rect != None:
                         posx = building_rect.left + building_rect.width/2
@@ -373,7 +581,7 @@ class BattleSim (object):
                     new_rect_pos = vectors.add_vectors(a.pos, a.build_offset)
                     new_rect = pygame.Rect(new_rect_pos[0], new_rect_pos[1], a_type['size'][0], a_type['size'][1])
                 
-                    if not sim_lib.test_possible_collision(self.actors, new_rect):
+                    if not sim_lib.test_possible_collision(self.actors, new_rect, spatial_hash=self.spatial_hash):
                         to_add.append((a, {
                             "type": a.build_queue[0],
                             "pos":  new_rect_pos,
@@ -384,24 +592,32 @@ class BattleSim (object):
                         del(a.build_queue[0])
             
             if a.hp <= 0: to_remove.insert(0, aid)
-        for i in to_remove: del(self.actors[i])
+        for i in to_remove:
+            self.spatial_hash.remove(self.actors[i])
+            if self.actor_store != None:
+                self.actor_store.detach(self.actors[i])
+            del(self.actors[i])
         for builder, new_actor in to_add:
             new_target = self.place_actor(new_actor)
             builder.issue_command("aid", target=new_target)
         
-        # Bullets too
+        # Bullets too, everything that landed this tick explodes at once
         to_delete = []
+        dead_bullets = []
         for i, b in enumerate(self.bullets):
             b.update()
             
             if b.dead:
-                new_effect = b.explode(self.actors)
-                if new_effect != None:
-                    self.effects.append(new_effect)
+                dead_bullets.append(b)
                 to_delete.insert(0, i)
         for i in to_delete:
             del(self.bullets[i])
         
+        if dead_bullets != []:
+            for new_effect in bullets.explode_all(dead_bullets, self.actors, self.spatial_hash):
+                if new_effect != None:
+                    self.effects.append(new_effect)
+        
         # And lastly effects
         to_delete = []
         for i, e in enumerate(self.effects):
@@ -419,14 +635,26 @@ class BattleSim (object):
         
         if self._collision_inverval_count < 1:
             self._collision_inverval_count = self._collision_interval
-            collisions = sim_lib.get_collisions(self.actors)
+            collisions = self.find_collisions()
             
-            # We now have a list of all the collisions
-            for obj1, obj2 in collisions:
-                # We order them based on aid, this way we always deal with the same
-                # actor in the same way and the order the collison was found is
-                # irrelevant
-                actor_lib.handle_pathing_collision(min(obj1, obj2), max(obj1, obj2))
+            # We now have a list of all the collisions, resolve_collisions
+            # orders each pair by oid so the order they were found in is
+            # irrelevant
+            actor_lib.resolve_collisions(collisions)
+    
+    def find_collisions(self):
+        """Runs the collision pass using the selected strategy"""
+        if self._collision_strategy == "spatial_hash":
+            return sim_lib.get_collisions(self.actors, self.spatial_hash)
+        
+        elif self._collision_strategy == "sweep_and_prune":
+            return self.sweep_and_prune.get_collisions(self.actors)
+        
+        elif self._collision_strategy == "brute_force":
+            return sim_lib.get_collisions(self.actors)
+        
+        else:
+            raise KeyError("No collision strategy by the name of '%s'" % self._collision_strategy)
     
     def place_actor_from_click(self, event, drag, actor_data):
         self.place_image = None
@@ -604,6 +832,13 @@ class BattleSim (object):
         
         # Load battlefield
         self.battlefield = data['battlefield']
+        self.spatial_hash = spatial_lib.SpatialHash(self._collision_cell_size)
+        
+        if self._use_actor_store:
+            self.actor_store = store_lib.ActorStore(int(self._actor_store_capacity), self.spatial_hash.cell_size)
+        
+        if self._trig_resolution > 0:
+            self.trig = vectors.TrigTable(self._trig_resolution)
         
         # Load team objects
         for team_id, team_data in data['teams'].items():
@@ -611,7 +846,21 @@ class BattleSim (object):
             self.teams[team_id] = teams.Team(team_id, self)
             self.teams[team_id].apply_data(team_data)
         
-        # Load AIs (AIs are optional)
+        # Load AIs (AIs are optional), a snapshot has to exist before
+        # its AI's process is started so pooled AIs can't use one
+        make_ai = core_ai.make_ai
+        use_snapshots = self._use_ai_snapshot
+        if self._step_ais:
+            self.ai_host = ai_pool.LocalHost()
+            make_ai = self.ai_host.make_ai
+        
+        elif self._ai_pool_workers > 0:
+            make_ai = ai_pool.get_pool(int(self._ai_pool_workers)).make_ai
+            use_snapshots = False
+        
+        if use_snapshots:
+            self._actor_type_ids = snapshot_lib.type_ids(self.actor_types)
+        
         for ai_team, ai_data in data.get('ais', {}).items():
             # Annoyingly we need to convert it from a unicode dict
             # into a standard one
@@ -621,7 +870,12 @@ class BattleSim (object):
             
             new_data['team'] = ai_team
             new_data['cmd'] = "init"
-            out_queue, in_queue = core_ai.make_ai(new_data['type'])
+            
+            snapshot = None
+            if use_snapshots:
+                snapshot = self.snapshots[ai_team] = snapshot_lib.Snapshot(int(self._ai_snapshot_capacity))
+            
+            out_queue, in_queue = make_ai(new_data['type'], snapshot)
             
             self.out_queues[ai_team] = out_queue
             self.in_queues[ai_team] = in_queue
@@ -653,8 +907,23 @@ class BattleSim (object):
         self.loaded = True
     
     def add_actor(self, a):
-        a.rect = self.engine.images[a.image].get_rect()
+        # The size comes from the template so the image itself is
+        # never needed
+        a.rect = pygame.Rect(0, 0, a.size[0], a.size[1])
+        a.rect.topleft = (
+            a.pos[0] - a.rect.width/2,
+            a.pos[1] - a.rect.height/2
+        )
+        
         a.oid = self._current_actor_id
         self._current_actor_id += 1
         self.actors[a.oid] = a
+        
+        a.spatial_hash = self.spatial_hash
+        self.spatial_hash.insert(a)
+        
+        a.trig = self.trig
+        
+        if self.actor_store != None:
+            self.actor_store.attach(a)
     
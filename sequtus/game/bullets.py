@@ -77,16 +77,46 @@ class Bullet (object_base.ObjectBase):
         """Sometimes the bullet will explode, this is the way to return the effect"""
         return None
     
-    def explode(self, actors):
-        for a in actors:
-            if vectors.distance(self.pos, a.pos) <= self.blast_radius:
+    def explode(self, actors, spatial_hash=None):
+        return explode_all([self], actors, spatial_hash)[0]
+    
+    def apply_blast(self, targets, dists):
+        """Damages each of the targets within the blast radius, dists are
+        the distance to each of them"""
+        for a, dist in zip(targets, dists):
+            if dist <= self.blast_radius:
                 actor_lib.apply_damage(a, dissipate(
-                    self.damage, vectors.distance(self.pos, a.pos),
+                    self.damage, dist,
                     self.blast_radius, self.dissipation_func)
                 )
-        return self.generate_effect()
     
     
+def explode_all(bullets, actors, spatial_hash=None):
+    """Explodes all of the bullets, returns a list of their effects (some
+    of which may be None) in the same order.
+    
+    With a spatial hash each bullet only looks at actors near its blast,
+    without one the distance from every bullet to every actor is worked
+    out in a single pairwise_distances call."""
+    # A blast radius of 0 can't hurt anything
+    blasts = [b for b in bullets if b.blast_radius > 0]
+    
+    if spatial_hash != None:
+        for b in blasts:
+            targets = spatial_hash.query_radius(b.pos, b.blast_radius)
+            b.apply_blast(targets, vectors.distances(b.pos, [a.pos for a in targets]))
+    
+    elif blasts != []:
+        if type(actors) == dict:
+            actors = [actors[k] for k in sorted(actors)]
+        
+        positions = [a.pos for a in actors]
+        dist_matrix = vectors.pairwise_distances([b.pos for b in blasts], positions)
+        for b, dists in zip(blasts, dist_matrix):
+            b.apply_blast(actors, dists)
+    
+    return [b.generate_effect() for b in bullets]
+
 class Shell (Bullet):
     def __init__(self, pos, velocity, size=[1,1], image="", blast_radius=0, damage={}, dissipation_func="linear"):
         super(Shell, self).__init__(blast_radius, damage, dissipation_func)
@@ -0,0 +1,42 @@
+"""
+The parts of the game client that don't care how messages get to and
+from the server. client (PodSixNet on asyncore) and async_client
+(PodSixNet's asyncio transport) mix these into their Client classes.
+"""
+
+from __future__ import division
+
+from sequtus.libs import order_lib
+
+skip_set = ('issue_order', 'queue_order', 'orders', 'framing', 'socketConnect', 'player_number')
+
+class ClientHandlers (object):
+    """Network handlers passing the server's messages on to self.sim"""
+    
+    # Used to pick up missed network commands
+    def Network(self, data):
+        if data['action'] not in skip_set:
+            action = data['action']
+            del(data['action'])
+            print("Client unhandled %s: %s" % (action, str(data)))
+    
+    def Network_other(self, data):
+        raise Exception("")
+    
+    def Network_player_number(self, data):
+        self.sim.player = data['number']
+    
+    def Network_error(self, data):
+        # Only some errors say where they came from
+        raise Exception("%s, source: %s" % (data['error'], data.get('source')))
+    
+    def Network_issue_order(self, data):
+        if self.debug:
+            print(data)
+        self.sim._real_issue_order(tick=data['tick'], actor_id=data['actor'], command=data['cmd'], pos=data['pos'], target=data['pos'])
+    
+    def Network_queue_order(self, data):
+        self.sim._real_queue_order(tick=data['tick'], actor_id=data['actor'], command=data['cmd'], pos=data['pos'], target=data['pos'])
+    
+    def Network_orders(self, data):
+        self.sim._real_orders(order_lib.unpack_orders(data), order_lib.unpack_groups(data))
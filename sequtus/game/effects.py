@@ -29,8 +29,11 @@ class Effect (object):
 class Beam (Effect):
     def __init__(self, origin, target, colour, duration=None, degrade=(0,0,0)):
         super(Beam, self).__init__()
-        self.origin = origin
-        self.target = target
+        
+        # Positions are updated in place as actors move, the beam stays
+        # where it was fired from
+        self.origin = list(origin)
+        self.target = list(target)
         self.colour = colour
         
         self.degrade = degrade
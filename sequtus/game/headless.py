@@ -0,0 +1,172 @@
+"""
+Runs a BattleSim without a display or any loaded images so matches can be
+played out on machines with no X server, e.g. for balance testing. The
+sim only uses images for the size of an actor's rect, a headless engine
+gets those sizes from the actor templates (a "size" entry) or from an
+image size manifest saved by a normal engine with save_manifest.
+
+Unless the config says otherwise the AIs are hosted in the sim's process
+and stepped once per tick (see ai_pool.LocalHost) rather than pacing
+themselves on the clock, so a match played with the same seed always
+plays out the same way.
+"""
+
+from __future__ import division
+
+import json
+
+import pygame
+
+from sequtus.game import battle_sim
+from sequtus.libs import order_lib
+
+class SizedImage (object):
+    """Stands in for a loaded image, the sim only ever asks for its rect"""
+    __slots__ = ("size",)
+    
+    def __init__(self, size):
+        super(SizedImage, self).__init__()
+        self.size = tuple(size)
+    
+    def get_rect(self):
+        return pygame.Rect((0, 0), self.size)
+
+def image_manifest(images):
+    """Takes an engine's image cache and returns a dict of image name ->
+    [width, height]"""
+    return dict([(name, list(img.get_rect().size)) for name, img in images.items()])
+
+def save_manifest(images, file_path):
+    with open(file_path, "w") as f:
+        f.write(json.dumps(image_manifest(images), indent=4, sort_keys=True))
+
+def load_manifest(file_path):
+    with open(file_path) as f:
+        return json.loads(f.read())
+
+class HeadlessEngine (object):
+    """Has the parts of EngineV4 the sim uses without starting pygame"""
+    fps = 30
+    cps = 30
+    
+    def __init__(self, image_sizes=None):
+        super(HeadlessEngine, self).__init__()
+        
+        self.screens = {}
+        self.current_screen = None
+        
+        self.images = {}
+        if image_sizes != None:
+            for name, size in image_sizes.items():
+                self.images[name] = SizedImage(size)
+    
+    def get_image(self, image_name, frame=0):
+        return self.images[image_name]
+    
+    def quit(self, event=None):
+        pass
+
+class LocalConnection (object):
+    """Takes the place of the client connection for a sim with nobody to
+    talk to, orders are handed straight back to the sim for the tick
+    they were sent for just as the server would"""
+    def __init__(self, sim):
+        super(LocalConnection, self).__init__()
+        self.sim = sim
+    
+    def update(self):
+        pass
+    
+    def Send(self, data):
+        if data['action'] == "orders":
+            self.sim._real_orders(order_lib.unpack_orders(data), order_lib.unpack_groups(data))
+        
+        elif data['action'] == "issue_order":
+            self.sim._real_issue_order(
+                tick = data['tick'],
+                actor_id = data['actor'],
+                command = data['cmd'],
+                pos = data['pos'],
+                target = data['target'],
+            )
+        
+        elif data['action'] == "queue_order":
+            self.sim._real_queue_order(
+                tick = data['tick'],
+                actor_id = data['actor'],
+                command = data['cmd'],
+                pos = data['pos'],
+                target = data['target'],
+            )
+
+def _load(data):
+    if type(data) in (str, type(u"")):
+        with open(data) as f:
+            return json.loads(f.read())
+    return data
+
+def make_sim(scenario, game_data, config=None, image_sizes=None, sim_class=battle_sim.BattleSim):
+    """Creates a sim ready to be updated, scenario, game_data and config
+    can be dicts or paths to their json files. image_sizes is a manifest
+    dict or the path to one."""
+    engine = HeadlessEngine(_load(image_sizes))
+    
+    config = dict(_load(config) or {})
+    config.setdefault("step_ais", True)
+    
+    sim = sim_class(
+        engine = engine,
+        player_team = -1,
+        scenario = _load(scenario),
+        game_data = _load(game_data),
+        config = config,
+    )
+    sim.connection = LocalConnection(sim)
+    
+    return sim
+
+def teams_alive(sim):
+    return set([a.team for a in sim.actors.values() if a.hp > 0])
+
+def match_result(sim):
+    """Summary of where a match has got to"""
+    teams = {}
+    for a in sim.actors.values():
+        if a.team not in teams:
+            teams[a.team] = {"actors": 0, "hp": 0}
+        
+        teams[a.team]['actors'] += 1
+        teams[a.team]['hp'] += a.hp
+    
+    alive = teams_alive(sim)
+    winner = None
+    if len(alive) == 1:
+        winner = list(alive)[0]
+    
+    return {
+        "tick":     sim.tick,
+        "winner":   winner,
+        "teams":    teams,
+    }
+
+def play_out(sim, max_ticks=10000):
+    """Updates the sim as fast as possible until only one team has actors
+    left or it reaches max_ticks"""
+    while sim.tick < max_ticks and sim.running:
+        sim.update()
+        
+        if len(teams_alive(sim)) < 2:
+            break
+
+def run_match(scenario, game_data, config=None, image_sizes=None, max_ticks=10000, sim_class=battle_sim.BattleSim):
+    """Plays a match out with play_out. Returns match_result for the end
+    of the match, with the AIs stepped by the sim the same seed always
+    gives the same result."""
+    sim = make_sim(scenario, game_data, config, image_sizes, sim_class)
+    
+    try:
+        play_out(sim, max_ticks)
+        return match_result(sim)
+    
+    finally:
+        sim.quit()
@@ -13,6 +13,14 @@ class ObjectBase (object):
     flags               = []
     size                = (0,0)
     
+    # Set when the object's kinematics live in a store_lib.ActorStore,
+    # the store moves the object rather than the object moving itself
+    _store              = None
+    _slot               = None
+    
+    # The sim's vectors.TrigTable if it uses one
+    trig                = None
+    
     def __init__(self):
         super(ObjectBase, self).__init__()
         
@@ -21,6 +29,9 @@ class ObjectBase (object):
         self.facing     = [0,0]# XY, Z
         
         self.oid = 0
+        
+        # Set by the sim if the object is tracked in its spatial hash
+        self.spatial_hash = None
     
     # These allow us to order actors based on their aid
     def __lt__(self, other): return self.oid < other.oid
@@ -43,6 +54,9 @@ class ObjectBase (object):
         self.rect = self.image.get_rect()
 
     def update(self):
+        if self._store != None:
+            return
+        
         self.pos += self.velocity
         
         # Set rect
@@ -50,4 +64,7 @@ class ObjectBase (object):
             self.pos[0] - self.rect.width/2,
             self.pos[1] - self.rect.height/2
         )
+        
+        if self.spatial_hash != None:
+            self.spatial_hash.update(self)
     
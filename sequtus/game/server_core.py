@@ -0,0 +1,93 @@
+"""
+The parts of the game server that don't care how messages get to and
+from the clients. server (PodSixNet on asyncore) and async_server
+(PodSixNet's asyncio transport) mix these into their channel and server
+classes.
+"""
+
+from __future__ import division
+
+from sequtus.libs import order_lib
+
+skip_set = ('issue_order', 'queue_order', 'orders', 'framing')
+
+class PlayerHandlers (object):
+    """Network handlers for a single connection with a client, this can
+    also represent a player"""
+    
+    # Used to pick up missed network commands
+    def Network(self, data):
+        if data['action'] not in skip_set:
+            action = data['action']
+            del(data['action'])
+            print("Server unhandled %s: %s" % (action, str(data)))
+    
+    def Network_issue_order(self, data):
+        self._server.issue_order(the_actor=data['actor'], cmd=data['cmd'], pos=data['pos'], target=data['target'], tick=data['tick'])
+    
+    def Network_queue_order(self, data):
+        self._server.queue_order(the_actor=data['actor'], cmd=data['cmd'], pos=data['pos'], target=data['target'], tick=data['tick'])
+    
+    def Network_orders(self, data):
+        self._server.add_orders(order_lib.unpack_orders(data), order_lib.unpack_groups(data))
+    
+    def Network_quit(self, data=None):
+        self._server.running = False
+    
+    def Network_move(self, data):
+        x, y = int(data['x']), int(data['y'])
+        
+        self._server.make_move(self.player_id, x, y)
+    
+    def Network_player_number(self, data):
+        print("Recieved player number")
+
+class Match (object):
+    """The state of a single match, call setup_match from __init__"""
+    def setup_match(self):
+        # Game state
+        self.state = [-1 for x in range(9)]
+        self.turn = 0
+        
+        self.users = {} # maps user names to Chat instances
+        
+        self.timeout = 0
+        self.running = True
+        
+        self.players = []
+        
+        # Orders waiting to go out, see order_lib for the layout
+        self.orders = []
+        self.group_orders = []
+    
+    # function called on every connection
+    def Connected(self, player, addr):
+        print("Player connected at {}, using port {}".format(addr[0], addr[1]))
+        
+        # add player to the list
+        player.player_id = len(self.players)
+        self.players.append(player)
+        
+        # send to the player their number
+        player.Send({'action': 'player_number', 'number': len(self.players)-1})
+    
+    # this send to all clients the same data
+    def send_to_all(self, data):
+        [p.Send(data) for p in self.players]
+    
+    def send_orders(self):
+        """Distribute orders back to connected sims, one message each"""
+        if self.orders != [] or self.group_orders != []:
+            self.send_to_all(order_lib.pack_orders(self.orders, self.group_orders))
+            self.orders = []
+            self.group_orders = []
+    
+    def issue_order(self, the_actor, cmd, pos, target, tick):
+        self.orders.append((the_actor, cmd, pos, target, tick, False))
+    
+    def queue_order(self, the_actor, cmd, pos, target, tick):
+        self.orders.append((the_actor, cmd, pos, target, tick, True))
+    
+    def add_orders(self, orders, groups=()):
+        self.orders.extend(orders)
+        self.group_orders.extend(groups)
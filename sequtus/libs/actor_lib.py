@@ -22,21 +22,78 @@ def strip_actor(the_actor):
     for a in attribs:
         setattr(sa, a, getattr(the_actor, a))
     
-    # Orders can contain a target and we don't want to pass around a
-    # reference to a whole actor by mistake
-    def _strip_order(order):
-        cmd, pos, target = order
+    # Vectors are altered in place by the sim so the stripped actor
+    # needs its own copy
+    sa.pos = vectors.V(the_actor.pos)
+    sa.velocity = vectors.V(the_actor.velocity)
+    
+    sa.current_order = strip_order(the_actor.current_order)
+    sa.order_queue = [strip_order(o) for o in the_actor.order_queue]
+    
+    return sa
+
+# Sent as tuples in a delta, the AI turns them back into vectors
+vector_attribs = ("pos", "velocity")
+
+def actor_state(the_actor):
+    """Everything strip_actor copies as plain values, used to work out
+    which fields have changed since the AIs were last sent them"""
+    state = {}
+    for a in attribs:
+        state[a] = getattr(the_actor, a)
+    
+    pos = the_actor.pos
+    vel = the_actor.velocity
+    state['pos'] = (float(pos[0]), float(pos[1]), float(pos[2]))
+    state['velocity'] = (float(vel[0]), float(vel[1]), float(vel[2]))
+    state['facing'] = list(the_actor.facing)
+    state['offence_flags'] = set(the_actor.offence_flags)
+    state['defence_flags'] = set(the_actor.defence_flags)
+    state['build_queue'] = list(the_actor.build_queue)
+    
+    state['current_order'] = strip_order(the_actor.current_order)
+    state['order_queue'] = [strip_order(o) for o in the_actor.order_queue]
+    
+    return state
+
+def state_delta(old_states, new_states, actors):
+    """Compares two sets of actor_state results keyed by oid. Returns a
+    tuple of (spawned, removed, changed); spawned is a list of stripped
+    actors, removed a list of oids and changed a dict of oid -> {field:
+    new value} for only the fields that differ."""
+    spawned = []
+    changed = {}
+    
+    for oid in sorted(new_states):
+        state = new_states[oid]
+        old = old_states.get(oid)
+        
+        if old is None:
+            spawned.append(strip_actor(actors[oid]))
+            continue
         
-        if target != None:
-            if type(target) not in (int, str, unicode, list, tuple):
-                target = target.oid
+        fields = {}
+        for k, v in state.items():
+            if old[k] != v:
+                fields[k] = v
         
-        return cmd, pos, target
+        if fields != {}:
+            changed[oid] = fields
     
-    sa.current_order = _strip_order(the_actor.current_order)
-    sa.order_queue = [_strip_order(o) for o in the_actor.order_queue]
+    removed = sorted([oid for oid in old_states if oid not in new_states])
     
-    return sa
+    return spawned, removed, changed
+
+def strip_order(order):
+    """Orders can contain a target and we don't want to pass around a
+    reference to a whole actor by mistake"""
+    cmd, pos, target = order
+    
+    if target != None:
+        if type(target) not in (int, str, type(u""), list, tuple):
+            target = target.oid
+    
+    return cmd, pos, target
 
 def build_template_cache(template, engine, sim):
     """Takes the template of the actor and creates some cache data"""
@@ -119,7 +176,11 @@ def build_template_cache(template, engine, sim):
     for k, v in template['repair_cost'].items():
         template['_part_repair_cost'][k] = v/repair_cycles
     
-    if "image" in template:
+    # A size in the template saves needing the image loaded, e.g. for
+    # a sim running without a display (see headless)
+    if "size" in template:
+        template['size'] = tuple(template['size'])
+    elif "image" in template:
         temp_img = engine.images[template['image']]
         template['size'] = temp_img.get_rect().size
     else:
@@ -135,90 +196,101 @@ def apply_damage(the_actor, damage):
     return the_actor.hp <= 0
 
 
-# Trying out a new method
+# Gap left between two actors once they've been pushed apart, rect
+# collisions include the edge so touching actors still collide
+separation_margin = 1
+
 def handle_pathing_collision(a1, a2):
+    for a, x, y in _pair_moves(a1, a2):
+        _apply_move(a, x, y)
+
+def resolve_collisions(pairs):
+    """Separates every pair from a collision pass in one go. Each actor's
+    moves are added up and applied at the end so the result doesn't
+    depend on the order the pairs are in. Returns the number of actors
+    moved."""
+    moves = {}
+    for a1, a2 in pairs:
+        # Always deal with the same actor in the same way
+        if a2.oid < a1.oid:
+            a1, a2 = a2, a1
+        
+        for a, x, y in _pair_moves(a1, a2):
+            if a.oid in moves:
+                m = moves[a.oid]
+                m[1] += x
+                m[2] += y
+            else:
+                moves[a.oid] = [a, x, y]
+    
+    for oid in sorted(moves):
+        a, x, y = moves[oid]
+        _apply_move(a, x, y)
+    
+    return len(moves)
+
+def _pair_moves(a1, a2):
+    """Returns a list of (actor, x, y) moves needed to separate the pair,
+    only actors that can move are pushed"""
     if a1.max_velocity > 0 and a2.max_velocity > 0:
-        _bounce_both(a1, a2)
+        return _bounce_both(a1, a2)
     elif a1.max_velocity <= 0:
-        _bounce_one(a2, a1)
+        return _bounce_one(a2, a1)
     elif a2.max_velocity <= 0:
-        _bounce_one(a1, a2)
+        return _bounce_one(a1, a2)
     else:
         raise Exception("Neither actor can move")
 
+def _apply_move(a, x, y):
+    pos = a.pos
+    a.pos = vectors.V(pos[0] + x, pos[1] + y, pos[2])
+
+def _min_translation(a1, a2, extra=0):
+    """The smallest (x, y) move of a1 that stops it overlapping a2, plus
+    extra in the same direction. Sizes are centred on pos. Returns None if
+    they don't overlap.
+    
+    Rather than stepping them apart we push them out along whichever axis
+    they overlap least on, the same as a minimum translation vector for
+    any pair of axis aligned boxes."""
+    dx = a1.pos[0] - a2.pos[0]
+    dy = a1.pos[1] - a2.pos[1]
+    
+    overlap_x = (a1.size[0] + a2.size[0])/2 - abs(dx)
+    overlap_y = (a1.size[1] + a2.size[1])/2 - abs(dy)
+    
+    if overlap_x < 0 or overlap_y < 0:
+        return None
+    
+    # Dead on top of each other pushes a1 right/down, a1 is always the
+    # lower oid so every client makes the same choice
+    if overlap_x <= overlap_y:
+        x = overlap_x + extra
+        return (x if dx >= 0 else -x), 0
+    else:
+        y = overlap_y + extra
+        return 0, (y if dy >= 0 else -y)
+
 def _bounce_one(a1, a2):
-    # Bounces a1
-    dir_angle = vectors.angle(a2.pos, a1.pos)
-    
-    vel_angle = vectors.angle(a1.velocity)
-    
-    # If they are head on then we want to swivel them a little
-    if vectors.bound_angle(dir_angle[0]+180) == vel_angle[0]:
-        dir_angle[0] = vectors.bound_angle(dir_angle[0] + 40)
-    
-    # Keep trying distances further and further apart until they're
-    # not going to be overlapping any more
-    overlapping = True
-    dist = vectors.total_velocity(a1.velocity)
-    
-    a2_rect = (a2.pos[0], a2.pos[1], a2.size[0], a2.size[1])
-    
-    while overlapping:
-        new_pos = vectors.add_vectors(a1.pos, vectors.move_to_vector(
-            dir_angle, dist
-        ))
-        
-        new_rect = (new_pos[0], new_pos[1], a1.size[0], a1.size[1])
-        
-        if not geometry.rect_collision(new_rect, a2_rect, True):
-            overlapping = False
-        
-        dist += 1
+    # Bounces a1, a2 stays put. Add a bit to be safe as a1 is likely
+    # still heading into a2.
+    mtv = _min_translation(a1, a2,
+        separation_margin + vectors.total_velocity(a1.velocity))
     
-    # Add a bit to be safe
-    new_pos = vectors.add_vectors(a1.pos, vectors.move_to_vector(
-        dir_angle, dist + vectors.total_velocity(a1.velocity)
-    ))
+    if mtv is None:
+        return []
     
-    a1.pos = new_pos
+    return [(a1, mtv[0], mtv[1])]
 
 def _bounce_both(a1, a2):
-    # These are the angles directly away from each other
-    angle1 = vectors.angle(a2.pos, a1.pos)
-    angle2 = vectors.angle(a1.pos, a2.pos)
+    # Each moves half of the way
+    mtv = _min_translation(a1, a2, separation_margin)
     
-    vel_angle1 = vectors.angle(a1.velocity)
-    vel_angle2 = vectors.angle(a2.velocity)
+    if mtv is None:
+        return []
     
-    # If they are head on then we want to swivel them a little
-    if vel_angle1[0] == angle2[0] and vel_angle2[0] == angle1[0]:
-        angle1[0] = vectors.bound_angle(angle1[0] + 20)
-        angle2[0] = vectors.bound_angle(angle2[0] + 20)
-    
-    # Keep trying distances further and further apart until they're
-    # not going to be overlapping any more
-    overlapping = True
-    dist_multiplier = 0.1
-    
-    while overlapping:
-        dist_multiplier += 0.1
-        
-        new_pos1 = vectors.add_vectors(a1.pos, vectors.move_to_vector(
-            angle1, max(a1.size) * dist_multiplier
-        ))
-        
-        new_pos2 = vectors.add_vectors(a2.pos, vectors.move_to_vector(
-            angle2, max(a2.size) * dist_multiplier
-        ))
-        
-        new_rect1 = (new_pos1[0], new_pos1[1], a1.size[0], a1.size[1])
-        new_rect2 = (new_pos2[0], new_pos2[1], a2.size[0], a2.size[1])
-        
-        if not geometry.rect_collision(new_rect1, new_rect2):
-            overlapping = False
-    
-    a1.pos = new_pos1
-    a2.pos = new_pos2
+    x, y = mtv
+    return [(a1, x/2, y/2), (a2, -x/2, -y/2)]
 
 def _will_collide(a1, a2, target=None):
     """Answers if a2 will collide with a1's movement target"""
@@ -248,6 +320,28 @@ def can_build(builder_type, item_type, build_lists):
     
     return False
 
+def build_matrix(actor_types, build_lists):
+    """Works out up front what can_build would say for every pairing of
+    actor types. Returns a dict of builder type -> set of the types it
+    can build, types with tech requirements are left out as can_build
+    has no way to handle them."""
+    matrix = {}
+    
+    for builder_name, builder_type in actor_types.items():
+        buildable = set()
+        
+        for f in builder_type.get('flags', []):
+            for item_name in build_lists.get(f, []):
+                item_type = actor_types.get(item_name)
+                if item_type is None: continue
+                if item_type.get('required_techs', []) != []: continue
+                
+                buildable.add(item_name)
+        
+        matrix[builder_name] = buildable
+    
+    return matrix
+
 def is_inside(the_actor, rect):
     if rect[0] <= the_actor.pos[0] <= rect[2]:
         if rect[1] <= the_actor.pos[1] <= rect[3]:
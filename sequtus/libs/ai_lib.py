@@ -1,5 +1,13 @@
+from __future__ import division
+
+import heapq
+
 from sequtus.libs import sim_lib
 
+# Above this many workers or tasks assign() falls back to the greedy
+# solver, the optimal one is O(n^3)
+optimal_assignment_limit = 30
+
 def set_speed(sim, cycles_per_second):
     sim.cycles_per_second = cycles_per_second
     sim._cycle_delay = 1 / cycles_per_second
@@ -22,10 +30,10 @@ def send_static_data(screen, queue):
     # Send build lists
     queue.put({"cmd":"build_lists", "build_lists":dict(screen.build_lists)})
 
-def place_actor(actor_list, building_rect, distance=100, boundries=None):
+def place_actor(actor_list, building_rect, distance=100, boundries=None, spatial_hash=None):
     if type(distance) == list:
         for d in distance:
-            r = place_actor(actor_list, building_rect, d, boundries)
+            r = place_actor(actor_list, building_rect, d, boundries, spatial_hash)
             if r != None:
                 return r
         return None
@@ -52,7 +60,7 @@ def place_actor(actor_list, building_rect, distance=100, boundries=None):
         building_rect.left = ox + x * distance
         building_rect.top = oy + y * distance
         
-        if not sim_lib.test_possible_collision(actor_list, building_rect, True):
+        if not sim_lib.test_possible_collision(actor_list, building_rect, True, spatial_hash):
             
             if boundries != None:
                 if 0 < building_rect.left and building_rect.right < boundries[0]:
@@ -63,3 +71,123 @@ def place_actor(actor_list, building_rect, distance=100, boundries=None):
     
     return None
 
+
+def assign_greedy(costs):
+    """Takes a cost matrix with a row per worker and a column per task,
+    None meaning that worker can't do that task. Repeatedly hands out the
+    cheapest pairing left, returns a list of (worker, task) indexes."""
+    heap = []
+    for w, row in enumerate(costs):
+        for t, c in enumerate(row):
+            if c is not None:
+                heap.append((c, w, t))
+    heapq.heapify(heap)
+    
+    used_workers = set()
+    used_tasks = set()
+    result = []
+    
+    while heap:
+        c, w, t = heapq.heappop(heap)
+        if w in used_workers or t in used_tasks:
+            continue
+        
+        used_workers.add(w)
+        used_tasks.add(t)
+        result.append((w, t))
+    
+    result.sort()
+    return result
+
+def assign_optimal(costs):
+    """Same as assign_greedy but finds the pairing with the lowest total
+    cost out of those that get the most tasks done (the Hungarian
+    algorithm). Only use it for small matrices."""
+    if costs == [] or costs[0] == []:
+        return []
+    
+    # The algorithm wants no more rows than columns
+    transposed = len(costs) > len(costs[0])
+    if transposed:
+        costs = [list(col) for col in zip(*costs)]
+    
+    rows, cols = len(costs), len(costs[0])
+    
+    # Anything not allowed costs more than every allowed pairing put
+    # together so it only gets used when there's nothing else
+    forbidden = 1 + sum([abs(c) for row in costs for c in row if c is not None])
+    matrix = [[forbidden if c is None else c for c in row] for row in costs]
+    
+    inf = float("inf")
+    u = [0] * (rows + 1)
+    v = [0] * (cols + 1)
+    
+    # match[col] is the row (1 based) in that column, 0 for none
+    match = [0] * (cols + 1)
+    way = [0] * (cols + 1)
+    
+    for r in range(1, rows + 1):
+        match[0] = r
+        c0 = 0
+        min_v = [inf] * (cols + 1)
+        used = [False] * (cols + 1)
+        
+        while True:
+            used[c0] = True
+            r0 = match[c0]
+            delta = inf
+            c1 = 0
+            
+            for c in range(1, cols + 1):
+                if used[c]: continue
+                
+                cur = matrix[r0 - 1][c - 1] - u[r0] - v[c]
+                if cur < min_v[c]:
+                    min_v[c] = cur
+                    way[c] = c0
+                if min_v[c] < delta:
+                    delta = min_v[c]
+                    c1 = c
+            
+            for c in range(cols + 1):
+                if used[c]:
+                    u[match[c]] += delta
+                    v[c] -= delta
+                else:
+                    min_v[c] -= delta
+            
+            c0 = c1
+            if match[c0] == 0:
+                break
+        
+        # Walk back along the augmenting path
+        while c0:
+            c1 = way[c0]
+            match[c0] = match[c1]
+            c0 = c1
+    
+    result = []
+    for c in range(1, cols + 1):
+        r = match[c]
+        if r == 0 or costs[r - 1][c - 1] is None:
+            continue
+        
+        if transposed:
+            result.append((c - 1, r - 1))
+        else:
+            result.append((r - 1, c - 1))
+    
+    result.sort()
+    return result
+
+def assign(costs, optimal_limit=None):
+    """Pairs up workers and tasks from a cost matrix, see assign_greedy.
+    Small problems are solved optimally, bigger ones greedily so the time
+    taken stays predictable."""
+    if optimal_limit is None:
+        optimal_limit = optimal_assignment_limit
+    
+    if len(costs) <= optimal_limit and (costs == [] or len(costs[0]) <= optimal_limit):
+        return assign_optimal(costs)
+    
+    return assign_greedy(costs)
@@ -1,7 +1,7 @@
 from __future__ import division
 import pygame
 import math
-import vectors
+from sequtus.libs import vectors
 
 def _convert(r):
     # Takes a pos, pos, size, size rect and returns a pos, pos, pos, pos rect
@@ -0,0 +1,106 @@
+"""
+Packs all the orders for a tick into a single network message. Each
+order is (actor, cmd, pos, target, tick, queued) where queued is True if
+the order goes on the end of the actor's order queue. Rather than a dict
+per order the message holds a list per field, a field that's the same
+for every order (e.g. a box selection all told to move to one place) is
+sent once instead.
+
+A group order is (actors, cmd, pos, target, tick, queued, formation), one
+order for a whole list of actors. It's expanded into an order per actor
+by each sim at the tick it's for, see expand_group.
+"""
+
+from __future__ import division
+
+import math
+
+# (name of the list, name used when every order has the same value)
+fields = (
+    ("actors",      "actor"),
+    ("cmds",        "cmd"),
+    ("positions",   "pos"),
+    ("targets",     "target"),
+    ("ticks",       "tick"),
+    ("queued",      "queue"),
+)
+
+# Gap between the slots of a formation
+formation_spacing = 40
+
+def pack_orders(orders, groups=None):
+    """Takes a list of order tuples and a list of group order tuples and
+    returns the message to Send"""
+    data = {"action": "orders", "count": len(orders)}
+    
+    if groups:
+        data['groups'] = [list(g) for g in groups]
+    
+    for i, (many, one) in enumerate(fields):
+        column = [o[i] for o in orders]
+        
+        if len(column) > 1 and column.count(column[0]) == len(column):
+            data[one] = column[0]
+        else:
+            data[many] = column
+    
+    return data
+
+def unpack_orders(data):
+    """The reverse of pack_orders, returns a list of order tuples"""
+    count = data['count']
+    
+    columns = []
+    for many, one in fields:
+        if many in data:
+            columns.append(data[many])
+        else:
+            columns.append([data[one]] * count)
+    
+    return list(zip(*columns))
+
+def unpack_groups(data):
+    """The group orders in a message from pack_orders"""
+    return [tuple(g) for g in data.get('groups', [])]
+
+def formation_offsets(formation, count, spacing=None):
+    """Returns a list of count (x, y) offsets centred on 0, 0. formation
+    is None (everybody on the same spot), "line" or "grid"."""
+    if spacing is None:
+        spacing = formation_spacing
+    
+    if formation is None:
+        return [(0, 0)] * count
+    
+    if formation == "line":
+        return [((i - (count - 1) / 2) * spacing, 0) for i in range(count)]
+    
+    if formation == "grid":
+        columns = int(math.ceil(math.sqrt(count)))
+        rows = int(math.ceil(count / columns)) if count > 0 else 0
+        
+        return [(
+            (i % columns - (columns - 1) / 2) * spacing,
+            (i // columns - (rows - 1) / 2) * spacing,
+        ) for i in range(count)]
+    
+    raise KeyError("No formation by the name of '%s'" % formation)
+
+def expand_group(actor_ids, cmd, pos, target, formation=None, spacing=None):
+    """Turns a group order into (actor, cmd, pos, target) for each actor.
+    Actors are taken in oid order so every sim hands out the same slots."""
+    actor_ids = sorted(actor_ids)
+    
+    if pos is None:
+        return [(a, cmd, None, target) for a in actor_ids]
+    
+    offsets = formation_offsets(formation, len(actor_ids), spacing)
+    
+    result = []
+    for a, (x, y) in zip(actor_ids, offsets):
+        slot = list(pos)
+        slot[0] += x
+        slot[1] += y
+        result.append((a, cmd, slot, target))
+    
+    return result
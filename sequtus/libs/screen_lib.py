@@ -72,7 +72,7 @@ keyboards = {
 }
 
 # Make reverse dictionaries
-keys = keyboards.keys()
+keys = list(keyboards.keys())
 for k in keys:
     a,b = k.split("-")
     new_key = "%s-%s" % (b,a)
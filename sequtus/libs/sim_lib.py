@@ -6,26 +6,147 @@ def set_speed(sim, cycles_per_second):
     sim.cycles_per_second = cycles_per_second
     sim._cycle_delay = 1 / cycles_per_second
 
-def get_collisions(actors):
-    collisions = []
-    collided = set()
-    for i, a in enumerate(actors):
-        for j, b in enumerate(actors):
-            if j in collided: continue
-            if i == j: continue
+def _actor_list(actors):
+    """Actors can be passed as the sim's dict of oid -> actor or as any
+    iterable of actors, either way we want a list in oid order"""
+    if type(actors) == dict:
+        actors = actors.values()
+    
+    return sorted(actors, key=lambda a: a.oid)
+
+def get_collisions(actors, spatial_hash=None):
+    """
+    Returns a list of (a, b) tuples of actors whose rects overlap. Each
+    pair is reported once with a.oid < b.oid and the list is ordered by
+    oid so every client resolves collisions in the same order.
+    
+    If a spatial hash is passed only the pairs sharing a cell are tested.
+    """
+    if spatial_hash != None:
+        collisions = []
+        for a, b in spatial_hash.candidate_pairs():
             if geometry.rect_collision(a.rect, b.rect, True):
                 collisions.append((a,b))
         
-        collided.add(i)
+        return collisions
+    
+    # Brute force, every pair is tested once with the lower oid first
+    actors = _actor_list(actors)
+    rects = [(a.rect.left, a.rect.top, a.rect.right, a.rect.bottom) for a in actors]
+    count = len(rects)
+    
+    collisions = []
+    for i in range(count):
+        left1, top1, right1, bottom1 = rects[i]
+        
+        for j in range(i+1, count):
+            left2, top2, right2, bottom2 = rects[j]
+            
+            # Inlined version of geometry.rect_collision
+            if right1 < left2 or left1 > right2: continue
+            if bottom1 < top2 or top1 > bottom2: continue
+            
+            collisions.append((actors[i], actors[j]))
     
     return collisions
 
-def test_possible_collision(actors, new_rect, convert=True):
+class SweepAndPrune (object):
+    """
+    Sort and sweep along the x axis. The actors are kept sorted by the
+    left edge of their rect between passes, units only move a few pixels
+    a tick so the list is almost sorted and an insertion sort puts it
+    back in order in close to linear time.
+    
+    Unlike a grid it doesn't degrade when lots of actors pile into the
+    same few cells, only when they overlap along the x axis.
+    """
+    def __init__(self):
+        super(SweepAndPrune, self).__init__()
+        
+        # List of [left, actor] pairs sorted by left
+        self.entries = []
+    
+    def _sync(self, actors):
+        """Drops actors no longer in the sim and adds new ones to the end,
+        the insertion sort will move them to the right place"""
+        if type(actors) != dict:
+            actors = dict([(a.oid, a) for a in actors])
+        
+        known = set()
+        entries = []
+        for e in self.entries:
+            a = e[1]
+            if actors.get(a.oid) is a:
+                entries.append(e)
+                known.add(a.oid)
+        
+        for oid in sorted(actors):
+            if oid not in known:
+                entries.append([0, actors[oid]])
+        
+        self.entries = entries
+    
+    def _sort(self):
+        entries = self.entries
+        
+        for e in entries:
+            e[0] = e[1].rect.left
+        
+        # Insertion sort, cheap when the list is nearly sorted already
+        for i in range(1, len(entries)):
+            e = entries[i]
+            left = e[0]
+            
+            j = i - 1
+            while j >= 0 and entries[j][0] > left:
+                entries[j+1] = entries[j]
+                j -= 1
+            
+            entries[j+1] = e
+    
+    def get_collisions(self, actors):
+        """Same output as sim_lib.get_collisions"""
+        self._sync(actors)
+        self._sort()
+        
+        entries = self.entries
+        count = len(entries)
+        
+        found = []
+        for i in range(count):
+            a = entries[i][1]
+            right1, top1, bottom1 = a.rect.right, a.rect.top, a.rect.bottom
+            
+            # Everything after this in the list starts to the right of
+            # our left edge, once one starts past our right edge so do
+            # all the rest of them
+            for j in range(i+1, count):
+                left2, b = entries[j]
+                if left2 > right1: break
+                
+                if bottom1 < b.rect.top or top1 > b.rect.bottom: continue
+                
+                if a.oid < b.oid:
+                    found.append((a.oid, b.oid, a, b))
+                else:
+                    found.append((b.oid, a.oid, b, a))
+        
+        found.sort(key=lambda p: (p[0], p[1]))
+        return [(a, b) for oid1, oid2, a, b in found]
+
+def test_possible_collision(actors, new_rect, convert=True, spatial_hash=None):
     """
     Used to test if a potential actor will collide with anything else
     returns True if there will be a collision
     """
     
+    # Only the actors near the rect can possibly collide with it
+    if spatial_hash != None:
+        actors = spatial_hash.query_rect(new_rect, convert)
+    
+    elif type(actors) == dict:
+        actors = actors.values()
+    
     for a in actors:
         if geometry.rect_collision(a.rect, new_rect, convert):
             return True
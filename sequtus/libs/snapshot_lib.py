@@ -0,0 +1,139 @@
+"""
+A fixed layout snapshot of the actors in a sim held in shared memory.
+The sim publishes into it and the AI processes read out of it, this
+replaces pickling a StrippedActor per actor into every AI's queue.
+
+Each AI team gets a Snapshot of its own holding only the actors that
+team can see, the sim never writes anything else into it so an AI has
+no way of reading what its team can't see.
+
+The block is a RawArray of doubles created before the AI process is
+started so the process inherits it. It starts with a header of
+[version, count] followed by one row per actor. The version acts as a
+sequence lock, it is odd while the sim is writing so a reader that sees
+an odd version or a version that changed while it was reading simply
+tries again.
+"""
+
+from __future__ import division
+
+import multiprocessing.sharedctypes
+
+from sequtus.libs import actor_lib, vectors
+
+# Column layout of a row, oid, team and actor type are stored as doubles
+# which is exact for any number we'd use
+columns = (
+    "oid", "team", "actor_type",
+    "pos_x", "pos_y", "pos_z",
+    "vel_x", "vel_y", "vel_z",
+    "hp", "completion",
+)
+row_width = len(columns)
+header_width = 2
+
+def type_ids(actor_types):
+    """Maps actor type names to ids, the AI gets the same actor_types so
+    it can build the same table with type_names"""
+    return dict([(name, i) for i, name in enumerate(sorted(actor_types))])
+
+def type_names(actor_types):
+    return sorted(actor_types)
+
+class Snapshot (object):
+    def __init__(self, capacity=2048):
+        super(Snapshot, self).__init__()
+        
+        self.capacity = capacity
+        self.block = multiprocessing.sharedctypes.RawArray('d', header_width + capacity * row_width)
+    
+    @property
+    def version(self):
+        return int(self.block[0])
+    
+    def publish(self, actors, actor_type_ids):
+        """Writes the actors into the block, returns the new version or
+        None if there are too many actors to fit. The sim passes only the
+        actors the team reading this block can see."""
+        if type(actors) == dict:
+            actors = [actors[k] for k in sorted(actors)]
+        
+        if len(actors) > self.capacity:
+            return None
+        
+        # Build the rows first so the block is only odd for one slice
+        rows = []
+        for a in actors:
+            pos = a.pos
+            vel = a.velocity
+            rows.extend((
+                a.oid, a.team, actor_type_ids[a.actor_type],
+                pos[0], pos[1], pos[2],
+                vel[0], vel[1], vel[2],
+                a.hp, a.completion,
+            ))
+        
+        block = self.block
+        version = int(block[0]) + 1
+        
+        block[0] = version
+        block[1] = len(actors)
+        block[header_width:header_width + len(rows)] = rows
+        block[0] = version + 1
+        
+        return version + 1
+    
+    def read_rows(self, retries=10):
+        """Returns (version, rows) where rows is a flat list of the row
+        values, returns (None, None) if the sim was always mid-write"""
+        block = self.block
+        
+        for i in range(retries):
+            version = block[0]
+            if version % 2 == 1:
+                continue
+            
+            count = int(block[1])
+            rows = block[header_width:header_width + count * row_width]
+            
+            if block[0] == version:
+                return int(version), rows
+        
+        return None, None
+    
+    def read(self, actor_type_names, retries=10):
+        """Returns (version, actors) where actors is a list of
+        StrippedActors in oid order"""
+        version, rows = self.read_rows(retries)
+        
+        if rows is None:
+            return None, None
+        
+        actors = []
+        for i in range(0, len(rows), row_width):
+            sa = actor_lib.StrippedActor()
+            sa.oid          = int(rows[i])
+            sa.team         = int(rows[i+1])
+            sa.actor_type   = actor_type_names[int(rows[i+2])]
+            sa.pos          = vectors.V(rows[i+3], rows[i+4], rows[i+5])
+            sa.velocity     = vectors.V(rows[i+6], rows[i+7], rows[i+8])
+            sa.hp           = rows[i+9]
+            sa.completion   = rows[i+10]
+            
+            # Only the owning team is sent these, see order_state
+            sa.current_order    = ("stop", -1, -1)
+            sa.order_queue      = []
+            sa.build_queue      = []
+            
+            actors.append(sa)
+        
+        return version, actors
+
+def order_state(the_actor):
+    """The parts of an actor that don't fit into the snapshot, only the
+    team that owns the actor needs them"""
+    return (
+        actor_lib.strip_order(the_actor.current_order),
+        [actor_lib.strip_order(o) for o in the_actor.order_queue],
+        list(the_actor.build_queue),
+    )
@@ -0,0 +1,161 @@
+"""
+Spatial indexes used to cut down the number of objects we need to compare
+against each other. Everything in here is a broad phase, it will happily
+return things that are close but not touching, the caller is expected to
+run the exact test (e.g. geometry.rect_collision) on the results.
+"""
+
+from __future__ import division
+
+def _rect_tuple(r, convert=True):
+    """Returns a (left, top, right, bottom) tuple from either a pygame.Rect
+    or a sequence. Sequences are assumed to be position and size if
+    convert is set, the same as geometry.rect_collision."""
+    if type(r) == tuple or type(r) == list:
+        if convert:
+            return (r[0], r[1], r[0] + r[2], r[1] + r[3])
+        return tuple(r)
+    
+    return (r.left, r.top, r.right, r.bottom)
+
+class SpatialHash (object):
+    """A uniform grid of buckets. Each object is stored in every cell its
+    rect touches, objects are keyed by their oid so results can be put into
+    a deterministic order.
+    
+    Objects are expected to call update() whenever their rect moves, the
+    buckets are only touched if the rect has crossed a cell boundary so a
+    slow moving actor costs a single tuple comparison per tick."""
+    
+    def __init__(self, cell_size=64):
+        super(SpatialHash, self).__init__()
+        
+        self.cell_size = cell_size
+        
+        # (cx, cy) -> {oid: obj}
+        self.cells = {}
+        
+        # oid -> (obj, (x1, y1, x2, y2)) where the span is in cells
+        self.objects = {}
+    
+    def __len__(self):
+        return len(self.objects)
+    
+    def __contains__(self, obj):
+        return obj.oid in self.objects
+    
+    def _span(self, rect, convert=True):
+        left, top, right, bottom = _rect_tuple(rect, convert)
+        cs = self.cell_size
+        
+        # Rect collisions are inclusive of the edge so we include the
+        # cell the right/bottom edge sits in
+        return (int(left // cs), int(top // cs), int(right // cs), int(bottom // cs))
+    
+    def _add_to_cells(self, obj, span):
+        x1, y1, x2, y2 = span
+        for cx in range(x1, x2+1):
+            for cy in range(y1, y2+1):
+                cell = self.cells.get((cx, cy))
+                if cell == None:
+                    cell = self.cells[(cx, cy)] = {}
+                cell[obj.oid] = obj
+    
+    def _remove_from_cells(self, obj, span):
+        x1, y1, x2, y2 = span
+        for cx in range(x1, x2+1):
+            for cy in range(y1, y2+1):
+                cell = self.cells[(cx, cy)]
+                del(cell[obj.oid])
+                
+                # Stop the dict growing with empty cells as things move around
+                if cell == {}:
+                    del(self.cells[(cx, cy)])
+    
+    def insert(self, obj):
+        if obj.oid in self.objects:
+            return self.update(obj)
+        
+        span = self._span(obj.rect)
+        self.objects[obj.oid] = (obj, span)
+        self._add_to_cells(obj, span)
+    
+    def remove(self, obj):
+        if obj.oid not in self.objects:
+            return
+        
+        stored, span = self.objects[obj.oid]
+        self._remove_from_cells(stored, span)
+        del(self.objects[obj.oid])
+    
+    def update(self, obj):
+        """Called when the rect of obj has moved"""
+        if obj.oid not in self.objects:
+            return self.insert(obj)
+        
+        stored, old_span = self.objects[obj.oid]
+        span = self._span(obj.rect)
+        
+        if span == old_span:
+            return
+        
+        self._remove_from_cells(stored, old_span)
+        self._add_to_cells(obj, span)
+        self.objects[obj.oid] = (obj, span)
+    
+    def clear(self):
+        self.cells = {}
+        self.objects = {}
+    
+    def query_rect(self, rect, convert=True):
+        """Returns a list of all objects sharing a cell with the rect,
+        ordered by oid"""
+        x1, y1, x2, y2 = self._span(rect, convert)
+        
+        found = {}
+        cells = self.cells
+        for cx in range(x1, x2+1):
+            for cy in range(y1, y2+1):
+                cell = cells.get((cx, cy))
+                if cell != None:
+                    found.update(cell)
+        
+        return [found[k] for k in sorted(found)]
+    
+    def query_radius(self, pos, radius):
+        """Returns all objects sharing a cell with the square around the
+        circle, ordered by oid. Anything whose centre is within radius of
+        pos is guaranteed to be in the result."""
+        return self.query_rect((
+            pos[0] - radius, pos[1] - radius,
+            pos[0] + radius, pos[1] + radius,
+        ), convert=False)
+    
+    def candidate_pairs(self):
+        """Returns a list of (a, b) pairs that share at least one cell,
+        a.oid is always less than b.oid and the list is ordered by oid.
+        
+        A pair that shares several cells is only reported from the
+        top-left cell of the overlap so we don't need a set to remove
+        duplicates."""
+        pairs = []
+        objects = self.objects
+        
+        for (cx, cy), cell in self.cells.items():
+            if len(cell) < 2: continue
+            
+            oids = sorted(cell)
+            for i, oid1 in enumerate(oids):
+                a, (ax1, ay1, ax2, ay2) = objects[oid1]
+                
+                for oid2 in oids[i+1:]:
+                    b, (bx1, by1, bx2, by2) = objects[oid2]
+                    
+                    # Only the top-left shared cell reports the pair
+                    if max(ax1, bx1) != cx or max(ay1, by1) != cy:
+                        continue
+                    
+                    pairs.append((oid1, oid2, a, b))
+        
+        pairs.sort(key=lambda p: (p[0], p[1]))
+        return [(a, b) for oid1, oid2, a, b in pairs]
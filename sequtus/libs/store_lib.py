@@ -0,0 +1,321 @@
+"""
+An optional structure-of-arrays store for actor kinematics. When a sim
+uses a store the positions, velocities etc of all its actors live in
+NumPy arrays indexed by slot and the movement of every actor is done in
+a handful of array operations per tick rather than one V allocation per
+actor.
+
+Actors attached to a store have their class swapped for a subclass that
+writes those attributes through to the arrays. Reading them costs the
+same as for any other actor: the values stay on the actor as ordinary
+lists and numbers, and step copies the new positions back onto the
+actors it moves. Actors that are not attached pay nothing for the store
+existing.
+"""
+
+from __future__ import division
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from sequtus.libs import vectors
+
+# Name -> width of the column, 0 means a scalar column
+vector_fields = (
+    ("pos",         3),
+    ("velocity",    3),
+    ("facing",      2),
+)
+
+scalar_fields = (
+    ("hp",          0),
+    ("completion",  0),
+)
+
+fields = vector_fields + scalar_fields
+
+class StoredV (vectors.V):
+    """The pos or velocity of an actor in a store. It holds its values in
+    a list like any other V and writes them to the store whenever it's
+    changed in place. Only the vector the actor currently holds writes
+    through, see StoreField."""
+    __slots__ = ("_store", "_slot", "_name")
+    
+    def _write_through(self):
+        store = self._store
+        if store is not None:
+            store.columns[self._name][self._slot] = self.v
+            
+            # Moved without the store, the rect needs updating next step
+            if self._name == "pos":
+                store.dirty[self._slot] = True
+    
+    def __setitem__(self, key, value):
+        vectors.V.__setitem__(self, key, value)
+        self._write_through()
+    
+    def __iadd__(self, other):
+        vectors.V.__iadd__(self, other)
+        self._write_through()
+        return self
+    
+    def __isub__(self, other):
+        vectors.V.__isub__(self, other)
+        self._write_through()
+        return self
+    
+    def __imul__(self, other):
+        vectors.V.__imul__(self, other)
+        self._write_through()
+        return self
+    
+    def __idiv__(self, other):
+        vectors.V.__idiv__(self, other)
+        self._write_through()
+        return self
+    __itruediv__ = __idiv__
+
+class StoreField (object):
+    """Descriptor placed on the stored subclass of an actor. It only
+    handles setting, reads find the value in the actor's __dict__ so
+    they cost no more than an ordinary attribute."""
+    def __init__(self, name, width):
+        super(StoreField, self).__init__()
+        self.name = name
+        self.width = width
+    
+    def __set__(self, obj, value):
+        store = obj._store
+        slot = obj._slot
+        column = store.columns[self.name]
+        
+        if self.width == 3:
+            current = obj.__dict__.get(self.name)
+            
+            # a.pos += v changes it in place and then assigns it back,
+            # it has already been written through
+            if value is current:
+                return
+            
+            # The old vector may still be held elsewhere, it mustn't
+            # write over the actor's slot any more
+            if isinstance(current, StoredV):
+                current._store = None
+            
+            value = StoredV(value)
+            value._store = store
+            value._slot = slot
+            value._name = self.name
+            column[slot] = value.v
+            
+            if self.name == "pos":
+                store.dirty[slot] = True
+        
+        elif self.width > 0:
+            # Facings are plain lists, changing one in place doesn't reach
+            # the store so they must be assigned back (see Actor._turn_ai)
+            row = column[slot]
+            for i in range(self.width):
+                row[i] = value[i] if i < len(value) else 0
+        
+        else:
+            column[slot] = value
+        
+        obj.__dict__[self.name] = value
+
+_stored_classes = {}
+def stored_class(cls):
+    """Returns a subclass of cls with the store fields as descriptors,
+    the subclass is cached so isinstance checks stay cheap"""
+    if cls not in _stored_classes:
+        attrs = {}
+        for name, width in fields:
+            attrs[name] = StoreField(name, width)
+        
+        _stored_classes[cls] = type(cls.__name__, (cls,), attrs)
+    
+    return _stored_classes[cls]
+
+class ActorStore (object):
+    def __init__(self, capacity=1024, cell_size=None):
+        super(ActorStore, self).__init__()
+        
+        if numpy is None:
+            raise Exception("The actor store requires numpy to be installed")
+        
+        self.capacity = 0
+        self.columns = {}
+        self.objects = []
+        self.free_slots = []
+        
+        # Only active slots are moved, dirty slots had their position
+        # set directly and need their rect updating
+        self.active = numpy.zeros(0, dtype=bool)
+        self.dirty = numpy.zeros(0, dtype=bool)
+        
+        # Width and height of the rect
+        self.size = numpy.zeros((0, 2))
+        
+        # If set to the cell size of the spatial hash the actors are in,
+        # the cells each rect spans are tracked here and the hash is
+        # only told about the actors that crossed into a new cell
+        self.cell_size = cell_size
+        self.spans = numpy.zeros((0, 4), dtype=int)
+        
+        self._grow(capacity)
+    
+    def __len__(self):
+        return len(self.objects) - len(self.free_slots)
+    
+    def _grow(self, capacity):
+        """Resizes the arrays. The actors' vectors look their column up
+        each time they write so they follow the new arrays, anything
+        else holding one of the old arrays from columns is left with a
+        stale copy."""
+        old = self.capacity
+        
+        for name, width in fields:
+            if width > 0:
+                new_column = numpy.zeros((capacity, width))
+            else:
+                new_column = numpy.zeros(capacity)
+            
+            if old > 0:
+                new_column[:old] = self.columns[name]
+            
+            self.columns[name] = new_column
+        
+        new_active = numpy.zeros(capacity, dtype=bool)
+        new_active[:old] = self.active
+        self.active = new_active
+        
+        new_dirty = numpy.zeros(capacity, dtype=bool)
+        new_dirty[:old] = self.dirty
+        self.dirty = new_dirty
+        
+        new_size = numpy.zeros((capacity, 2))
+        new_size[:old] = self.size
+        self.size = new_size
+        
+        new_spans = numpy.zeros((capacity, 4), dtype=int)
+        new_spans[:old] = self.spans
+        self.spans = new_spans
+        
+        self.capacity = capacity
+    
+    def attach(self, obj):
+        """Moves the values of the object into the store, from now on
+        setting the attributes writes them through to the arrays"""
+        if self.free_slots != []:
+            slot = self.free_slots.pop()
+        else:
+            slot = len(self.objects)
+            self.objects.append(None)
+            
+            if slot >= self.capacity:
+                self._grow(self.capacity * 2)
+        
+        values = dict([(name, getattr(obj, name)) for name, width in fields])
+        
+        obj.__class__ = stored_class(obj.__class__)
+        obj._store = self
+        obj._slot = slot
+        
+        for name, width in fields:
+            obj.__dict__.pop(name, None)
+            setattr(obj, name, values[name])
+        
+        self.objects[slot] = obj
+        self.active[slot] = True
+        self.size[slot] = (obj.rect.width, obj.rect.height)
+    
+    def detach(self, obj):
+        """Copies the values back onto the object and frees the slot,
+        used when an actor is removed from the sim"""
+        values = dict([(name, getattr(obj, name)) for name, width in fields])
+        
+        slot = obj._slot
+        obj.__class__ = obj.__class__.__bases__[0]
+        obj._store = None
+        obj._slot = None
+        
+        # Plain vectors from here on, the stored ones stop writing through
+        # so they don't follow the slot's next owner
+        for name in ('pos', 'velocity'):
+            values[name]._store = None
+            obj.__dict__[name] = vectors.V(values[name].v)
+        
+        obj.facing      = values['facing']
+        obj.hp          = values['hp']
+        obj.completion  = values['completion']
+        
+        self.objects[slot] = None
+        self.active[slot] = False
+        self.dirty[slot] = False
+        self.free_slots.append(slot)
+    
+    def step(self):
+        """Moves every active actor by its velocity and updates the rects
+        of those that moved. Returns the number of rects updated."""
+        count = len(self.objects)
+        if count == 0:
+            return 0
+        
+        pos = self.columns['pos'][:count]
+        velocity = self.columns['velocity'][:count]
+        
+        moving = self.active[:count] & velocity.any(axis=1)
+        pos[moving] += velocity[moving]
+        
+        dirty = self.dirty[:count]
+        slots = numpy.nonzero(moving | dirty)[0]
+        
+        if len(slots) == 0:
+            return 0
+        
+        xs = pos[slots, 0]
+        ys = pos[slots, 1]
+        
+        # Truncated the same as pygame 1.9 would so the spans we track
+        # match the ones the hash works out from the rects
+        widths = self.size[slots, 0]
+        heights = self.size[slots, 1]
+        lefts = (xs - widths/2).astype(int)
+        tops = (ys - heights/2).astype(int)
+        
+        if self.cell_size is None:
+            crossed = numpy.ones(len(slots), dtype=bool)
+        else:
+            cs = self.cell_size
+            spans = numpy.column_stack((
+                lefts // cs, tops // cs,
+                (lefts + widths.astype(int)) // cs, (tops + heights.astype(int)) // cs,
+            ))
+            
+            # Dirty actors may have been placed anywhere, always update them
+            crossed = (spans != self.spans[slots]).any(axis=1) | dirty[slots]
+            self.spans[slots] = spans
+        
+        self.dirty[:count] = False
+        
+        # The actors keep their own copy of pos and the rects are pygame
+        # objects so we still need to visit each mover, but only the
+        # movers and only to copy a few numbers. Copying a column at a
+        # time is much quicker than turning the rows into lists.
+        objects = self.objects
+        for slot, x, y, z, left, top, moved_cell in zip(slots.tolist(), xs.tolist(), ys.tolist(),
+                pos[slots, 2].tolist(), lefts.tolist(), tops.tolist(), crossed.tolist()):
+            obj = objects[slot]
+            
+            v = obj.pos.v
+            v[0] = x
+            v[1] = y
+            v[2] = z
+            obj.rect.topleft = (left, top)
+            
+            if moved_cell and obj.spatial_hash != None:
+                obj.spatial_hash.update(obj)
+        
+        return len(slots)
@@ -1,20 +1,93 @@
 from __future__ import division
 import math
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# Building an array from a list of V costs more than the maths it saves
+# so distances() only uses NumPy when handed an array (e.g. a column of
+# an ActorStore). pairwise_distances does N*M work for N+M conversions
+# so it switches over once there are this many pairs.
+numpy_threshold = 256
+
+_new_object = object.__new__
+
+def _xyz(other):
+    """Returns something indexable with 3 items from a V, sequence or
+    number without building a new V. A number is treated as (n, 0, 0)
+    the same as V(n)."""
+    t = type(other)
+    if t == V:
+        return other.v
+    
+    if t == list or t == tuple:
+        if len(other) > 2:
+            return other
+        return (other[0], other[1], 0)
+    
+    # Subclasses such as store_lib.StoredV
+    if isinstance(other, V):
+        return other.v
+    
+    if hasattr(other, "__len__"):
+        return other
+    
+    return (other, 0, 0)
+
+def _angle(v1, v2):
+    """The angle from v1 to v2, both must be indexable with 3 items.
+    0 is up the screen and angles go clockwise, the second value is the
+    elevation."""
+    x = v2[0] - v1[0]
+    y = v1[1] - v2[1]
+    
+    # atan2 gives us the quadrant for free, the bound keeps 270 etc
+    # positive. y is calculated from v1 so dead ahead is +0 rather
+    # than -0, which atan2 would turn into 180.
+    xy = math.degrees(math.atan2(x, y))
+    if xy < 0:
+        xy += 360
+    
+    # UP DOWN
+    hyp = math.sqrt(x*x + y*y)
+    if hyp > 0:
+        za = math.degrees(math.atan(abs(v1[2] - v2[2])/hyp))
+    else:
+        za = 0
+    
+    return [xy, za]
+
+def _new_v(x, y, z):
+    """Builds a V skipping the type checks in __init__"""
+    v = _new_object(V)
+    v.v = [x, y, z]
+    return v
+
 class V (object):
     """An object designed to allow vector math to be performed
-    A vector can represent a position or a velocity"""
+    A vector can represent a position or a velocity
+    
+    The in-place operators (+= etc) alter the vector rather than creating
+    a new one so anything else holding a reference to it will see the
+    change. Copy it with V(other) if you need it to stay put."""
+    __slots__ = ("v",)
+    
     def __init__(self, x, y=0, z=0):
-        super(V, self).__init__()
-        if type(x) == V:
+        t = type(x)
+        if t == V:
             self.v =  list(x.v)
         
-        elif type(x) == list or type(x) == tuple:
+        elif t == list or t == tuple or hasattr(x, "__len__"):
             # It tries to get the 3rd item but can handle a 2D input
             self.v = [x[0], x[1], x[2] if len(x) > 2 else 0]
         else:
             self.v = [x,y,z]
     
+    def __repr__(self):
+        return "V(%s, %s, %s)" % (self.v[0], self.v[1], self.v[2])
+    
     # Emulation of a sequence
     def __getitem__(self, key):
         if type(key) == int:
@@ -22,112 +95,211 @@ class V (object):
         else:
             raise IndexError("No key of %s" % key)
     
+    def __setitem__(self, key, value):
+        if type(key) == int:
+            self.v[key] = value
+        else:
+            raise IndexError("No key of %s" % key)
+    
+    def __len__(self):
+        return 3
+    
     # Using this we are able to ask if a Vector equals a list or tuple
     def __eq__(self, other):
-        if type(other) == list or type(other) == tuple:
-            other = V(other)
-        return self.v == other.v
+        if type(other) != list and type(other) != tuple and not isinstance(other, V):
+            return False
+        
+        # Compared item by item so a 2D list or tuple can equal a V
+        a = self.v
+        o = _xyz(other)
+        return a[0] == o[0] and a[1] == o[1] and a[2] == o[2]
+    
+    def __ne__(self, other):
+        return not self.__eq__(other)
     
     # At heart this is designed to be a mathematical object
     def __add__(self, other):
-        if type(other) != V: other = V(other)
-        return V([self.v[i] + other.v[i] for i in range(3)])
+        a = self.v
+        o = _xyz(other)
+        return _new_v(a[0] + o[0], a[1] + o[1], a[2] + o[2])
     
     def __sub__(self, other):
-        if type(other) != V: other = V(other)
-        return V([self.v[i] - other.v[i] for i in range(3)])
-        
+        a = self.v
+        o = _xyz(other)
+        return _new_v(a[0] - o[0], a[1] - o[1], a[2] - o[2])
+    
     def __mul__(self, other):
-        if type(other) != V: other = V(other)
-        return V([self.v[i] * other.v[i] for i in range(3)])
+        a = self.v
+        
+        # A number scales the whole vector
+        if isinstance(other, (int, float)):
+            return _new_v(a[0] * other, a[1] * other, a[2] * other)
+        
+        o = _xyz(other)
+        return _new_v(a[0] * o[0], a[1] * o[1], a[2] * o[2])
     
     def __div__(self, other):
-        if type(other) != V: other = V(other)
-        return V([self.v[i] / other.v[i] for i in range(3)])
+        a = self.v
+        
+        if isinstance(other, (int, float)):
+            return _new_v(a[0] / other, a[1] / other, a[2] / other)
+        
+        o = _xyz(other)
+        return _new_v(a[0] / o[0], a[1] / o[1], a[2] / o[2])
+    __truediv__ = __div__
+    
+    # In-place versions, these don't allocate anything
+    def __iadd__(self, other):
+        a = self.v
+        o = _xyz(other)
+        a[0] += o[0]
+        a[1] += o[1]
+        a[2] += o[2]
+        return self
+    
+    def __isub__(self, other):
+        a = self.v
+        o = _xyz(other)
+        a[0] -= o[0]
+        a[1] -= o[1]
+        a[2] -= o[2]
+        return self
+    
+    def __imul__(self, other):
+        a = self.v
+        
+        if isinstance(other, (int, float)):
+            a[0] *= other
+            a[1] *= other
+            a[2] *= other
+            return self
+        
+        o = _xyz(other)
+        a[0] *= o[0]
+        a[1] *= o[1]
+        a[2] *= o[2]
+        return self
+    
+    def __idiv__(self, other):
+        a = self.v
+        
+        if isinstance(other, (int, float)):
+            a[0] /= other
+            a[1] /= other
+            a[2] /= other
+            return self
+        
+        o = _xyz(other)
+        a[0] /= o[0]
+        a[1] /= o[1]
+        a[2] /= o[2]
+        return self
+    __itruediv__ = __idiv__
     
     # More math functions
     def __abs__(self):
-        return V([abs(self.v[i]) for i in range(3)])
+        a = self.v
+        return _new_v(abs(a[0]), abs(a[1]), abs(a[2]))
     
     def angle(self, v2=None):
         # If no second vector is passed we just want the angle of our
         # velocity, not the angle from 
-        if v2 == None:
-            v2 = self.v[:]
-            v1 = [0,0,0]
-        else:
-            v1 = self.v[:]
-        
-        # SOH CAH TOA
-        # We have the opposite and adjacent
-        x = abs(v1[0] - v2[0])
-        y = abs(v1[1] - v2[1])
-        z = abs(v1[2] - v2[2])
-
-        # Exacts, because in these cases we get a divide by 0 error
-        if x == 0:
-            if v1[1] >= v2[1]:# Up
-                xy = 0
-            elif v1[1] < v2[1]:# Down
-                xy = 180
-        elif y == 0:
-            if v1[0] <= v2[0]:# Right
-                xy = 90
-            elif v1[0] > v2[0]:# Left
-                xy = 270
-        else:
-            # Using trig
-            if v1[1] > v2[1]:# Up
-                if v1[0] < v2[0]:# Right
-                    xy = math.degrees(math.atan(x/y))
-                else:# Left
-                    xy = math.degrees(math.atan(y/x)) + 270
-            else:# Down
-                if v1[0] < v2[0]:# Right
-                    xy = math.degrees(math.atan(y/x)) + 90
-                else:# Left
-                    xy = math.degrees(math.atan(x/y)) + 180
-        
-        # UP DOWN
-        hyp = math.sqrt(x*x + y*y)
-        if hyp > 0:
-            za = math.atan(z/hyp)
-        else:
-            za = 0
-        
-        return [xy, math.degrees(za)]
+        if v2 is None:
+            return _angle((0, 0, 0), self.v)
+        return _angle(self.v, _xyz(v2))
     
     def magnitude(self):
         x,y,z = self.v
-        
-        a = math.sqrt(x**2 + y**2)
-        return math.sqrt(a*a + z*z)    
+        return math.sqrt(x*x + y*y + z*z)
     
     def as_move(self):
         return [self.angle(), self.magnitude()]
     
     def distance(self, the_point=None):
         """If pos2 is left out then it gives distance to pos1 from origin"""
-        if the_point == None:
-            the_point = [0 for i in range(3)]
+        a = self.v
         
-        if type(the_point) != V:
-            the_point = V(the_point)
+        if the_point is None:
+            return math.sqrt(a[0]*a[0] + a[1]*a[1] + a[2]*a[2])
         
-        x = abs(self.v[0] - the_point.v[0])
-        y = abs(self.v[1] - the_point.v[1])
-        z = abs(self.v[2] - the_point.v[2])
-        a = math.sqrt(x*x + y*y)
+        o = _xyz(the_point)
+        x = a[0] - o[0]
+        y = a[1] - o[1]
+        z = a[2] - o[2]
         
-        return math.sqrt(a*a + z*z)
+        return math.sqrt(x*x + y*y + z*z)
 
 def distance(point1, point2=None):
     """Returns the distance from the origin to the point. It's really just
     a wrapper around V.distance."""
-    if point2 == None:
-        return V(point1).distance()
+    p1 = _xyz(point1)
+    
+    if point2 is None:
+        return math.sqrt(p1[0]*p1[0] + p1[1]*p1[1] + p1[2]*p1[2])
+    
+    p2 = _xyz(point2)
+    x = p1[0] - p2[0]
+    y = p1[1] - p2[1]
+    z = p1[2] - p2[2]
+    
+    return math.sqrt(x*x + y*y + z*z)
+
+def angle(pos1, pos2=None):
+    """Returns the angle from pos1 to pos2, if pos2 is left out then it's
+    the angle of pos1 as a velocity"""
+    if pos2 is None:
+        return _angle((0, 0, 0), _xyz(pos1))
+    return _angle(_xyz(pos1), _xyz(pos2))
+
+def add_vectors(v1, v2):
+    """Adds two sequences item by item, works for angles as well as
+    positions"""
+    return [a + b for a, b in zip(v1, v2)]
+
+def total_velocity(velocity):
+    """The speed of a velocity regardless of direction"""
+    return distance(velocity)
+
+def _is_array(points):
+    return numpy is not None and isinstance(points, numpy.ndarray)
+
+def _as_array(points):
+    if _is_array(points):
+        return points
+    return numpy.array([_xyz(p)[:3] for p in points], dtype=float)
+
+def distances(origin, points):
+    """Returns a list of the distance from origin to each of the points,
+    the same as calling distance(origin, p) for each of them."""
+    o = _xyz(origin)
     
-    return V(point1).distance(point2)
+    if _is_array(points):
+        diff = points[:, :3] - numpy.array(o[:3], dtype=float)
+        return numpy.sqrt((diff * diff).sum(axis=1)).tolist()
+    
+    ox, oy, oz = o[0], o[1], o[2]
+    sqrt = math.sqrt
+    
+    results = []
+    for p in points:
+        p = p.v if type(p) == V else _xyz(p)
+        x = p[0] - ox
+        y = p[1] - oy
+        z = p[2] - oz
+        results.append(sqrt(x*x + y*y + z*z))
+    return results
+
+def pairwise_distances(points_a, points_b):
+    """Returns a list of lists where [i][j] is the distance between
+    points_a[i] and points_b[j]"""
+    if len(points_a) == 0:
+        return []
+    
+    if numpy is not None and len(points_a) * len(points_b) >= numpy_threshold:
+        diff = _as_array(points_a)[:, None, :] - _as_array(points_b)[None, :, :]
+        return numpy.sqrt((diff * diff).sum(axis=2)).tolist()
+    
+    return [distances(p, points_b) for p in points_a]
 
 def bound_angle(angle):
     """Returns an angle between the values of 0 and 360, preventing you
@@ -165,24 +337,78 @@ def angle_diff(angle1, angle2=0):
     else:
         return -left
 
-def move_to_vector(angle, distance):
+class TrigTable (object):
+    """Precomputed sin and cos at a fixed resolution (in degrees). Angles
+    are snapped to the nearest step so nearby angles give the same result.
+    The table is filled from math.sin and math.cos so other than the
+    cardinal angles, which are exact, values can still differ in the last
+    bit between platforms.
+    
+    Pass one as the trig argument of move_to_vector or get_midpoint."""
+    def __init__(self, resolution=0.25):
+        super(TrigTable, self).__init__()
+        
+        self.resolution = resolution
+        self.steps = int(round(360 / resolution))
+        self._scale = self.steps / 360
+        
+        self.sines = []
+        self.cosines = []
+        for i in range(self.steps):
+            r = math.radians(i * 360 / self.steps)
+            self.sines.append(math.sin(r))
+            self.cosines.append(math.cos(r))
+        
+        # sin(radians(180)) is 1.2e-16 rather than 0
+        quarter = self.steps / 4
+        if quarter == int(quarter):
+            quarter = int(quarter)
+            for i, (s, c) in enumerate(((0, 1), (1, 0), (0, -1), (-1, 0))):
+                self.sines[i * quarter] = s
+                self.cosines[i * quarter] = c
+    
+    def index(self, angle):
+        # floor rather than round, round differs between Python versions
+        return int(math.floor(angle * self._scale + 0.5)) % self.steps
+    
+    def sin(self, angle):
+        return self.sines[self.index(angle)]
+    
+    def cos(self, angle):
+        return self.cosines[self.index(angle)]
+    
+    def sin_cos(self, angle):
+        # The same sum as index(). The callers have already bound the
+        # angle so int() is the same as floor(), 360 - half a step wraps
+        # back round to 0.
+        i = int(angle * self._scale + 0.5)
+        if i >= self.steps or angle < 0:
+            i = self.index(angle)
+        return self.sines[i], self.cosines[i]
+
+def move_to_vector(angle, distance, trig=None):
     """
     Takes an angle (length 2 sequence) and a distance, returns a Vector
     """
-    angle = bound_angle(angle)
+    xy = angle[0]
+    za = angle[1]
+    
+    # Most of the time they're already bound so skip the call
+    if not 0 <= xy < 360: xy = bound_angle(xy)
+    if not 0 <= za < 360: za = bound_angle(za)
     
     # First we get the vertical plane
-    z, h = _move_to_vector_2d(angle[1], distance)
+    z, h = _move_to_vector_2d(za, distance, trig)
     
     # Hypotenuse cannot be negative in length
     h = abs(h)
     
     # Now horrizontal
-    x, y = _move_to_vector_2d(angle[0], h)
+    x, y = _move_to_vector_2d(xy, h, trig)
     
-    return V(x, y, z)
+    return _new_v(x, y, z)
 
-def _move_to_vector_2d(angle, distance):
+def _move_to_vector_2d(angle, distance, trig=None):
     """Returns an opposite and adjacent from the triangle"""
     
     if angle == 0:      return 0, -distance
@@ -190,20 +416,29 @@ def _move_to_vector_2d(angle, distance):
     if angle == 180:    return 0, distance
     if angle == 270:    return -distance, 0
     
+    if trig is not None:
+        s, c = trig.sin_cos(angle)
+        return [s * distance, -c * distance]
+    
     opp = math.sin(math.radians(angle)) * distance
     adj = math.cos(math.radians(angle)) * distance
     
     return [opp, -adj]
 
-def get_midpoint(pos1, pos2, distance):
+def get_midpoint(pos1, pos2, distance, trig=None):
     """
     Given pos1 and pos2 it determines where pos1 will end up if it travels "distance" towards pos2.
     """
-    a, za = V(pos1).angle(pos2)
+    a, za = _angle(_xyz(pos1), _xyz(pos2))
     
-    x = pos1[0] + (math.sin(math.radians(a)) * distance)
-    y = pos1[1] - (math.cos(math.radians(a)) * distance)
-    z = pos1[2] + (math.sin(math.radians(za)) * distance)
+    if trig is not None:
+        x = pos1[0] + (trig.sin(a) * distance)
+        y = pos1[1] - (trig.cos(a) * distance)
+        z = pos1[2] + (trig.sin(za) * distance)
+    else:
+        x = pos1[0] + (math.sin(math.radians(a)) * distance)
+        y = pos1[1] - (math.cos(math.radians(a)) * distance)
+        z = pos1[2] + (math.sin(math.radians(za)) * distance)
     
     return [x,y,z]
     
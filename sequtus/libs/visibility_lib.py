@@ -0,0 +1,191 @@
+"""
+Works out which actors each team can see so an AI is only told about
+things it could actually see. A team can always see its own actors and
+anything within the sight_radius of one of them.
+
+The results are kept between updates and only the actors that have
+moved since the last one are looked at again. A moved actor has what it
+can see worked out afresh and is checked against the observers around
+it, pairs where neither side moved keep their answer from last time.
+"""
+
+from __future__ import division
+
+from sequtus.libs import vectors
+
+class Visibility (object):
+    def __init__(self):
+        super(Visibility, self).__init__()
+        
+        # team -> set of oids that team can see
+        self.visible = {}
+        
+        # observer oid -> set of enemy oids it can see and the reverse
+        self.sees = {}
+        self.seen_by = {}
+        
+        # team -> {oid: number of that team's observers that can see it}
+        self._counts = {}
+        
+        # oid -> (team, x, y, z, sight_radius) as of the last update
+        self._state = {}
+        self._teams = set()
+    
+    def _see(self, observer, team, oid):
+        self.sees[observer].add(oid)
+        self.seen_by.setdefault(oid, set()).add(observer)
+        
+        counts = self._counts[team]
+        counts[oid] = counts.get(oid, 0) + 1
+    
+    def _unsee(self, observer, team, oid):
+        self.sees[observer].discard(oid)
+        self.seen_by[oid].discard(observer)
+        
+        counts = self._counts[team]
+        counts[oid] -= 1
+        if counts[oid] == 0:
+            del(counts[oid])
+    
+    def _forget(self, oid):
+        """Drops everything oid saw and everything that saw it"""
+        team = self._state[oid][0]
+        
+        for other in list(self.sees.get(oid, ())):
+            self._unsee(oid, team, other)
+        
+        for observer in list(self.seen_by.get(oid, ())):
+            self._unsee(observer, self._state[observer][0], oid)
+        
+        self.sees.pop(oid, None)
+        self.seen_by.pop(oid, None)
+    
+    def update(self, actors, teams, spatial_hash=None):
+        """Brings what each of the teams can see up to date. Returns a
+        dict of team -> (entered, left) where both are sets of oids that
+        have come into or gone out of view since the last update."""
+        if type(actors) == dict:
+            actors = [actors[k] for k in sorted(actors)]
+        
+        # A different set of teams invalidates all the counts
+        if set(teams) != self._teams:
+            self.sees = {}
+            self.seen_by = {}
+            self._state = {}
+            self._teams = set(teams)
+            self._counts = dict([(t, {}) for t in teams])
+        
+        tracked = self._teams
+        
+        moved = []
+        current = set()
+        max_radius = 0
+        for a in actors:
+            current.add(a.oid)
+            pos = a.pos
+            state = (a.team, pos[0], pos[1], pos[2], a.sight_radius)
+            
+            if a.team in tracked and a.sight_radius > max_radius:
+                max_radius = a.sight_radius
+            
+            if self._state.get(a.oid) != state:
+                moved.append((a, state))
+        
+        # Everything is worked out again when everything has moved, it's
+        # quicker to start from nothing than to undo each pair
+        if len(moved) == len(actors):
+            self.sees = {}
+            self.seen_by = {}
+            self._state = {}
+            self._counts = dict([(t, {}) for t in teams])
+        
+        for oid in [oid for oid in self._state if oid not in current]:
+            self._forget(oid)
+            del(self._state[oid])
+        
+        for a, state in moved:
+            if a.oid in self._state:
+                self._forget(a.oid)
+            self._state[a.oid] = state
+        
+        moved_oids = set([a.oid for a, state in moved])
+        
+        # What each moved observer can see, this covers the pairs where
+        # both sides moved
+        for a, state in moved:
+            if a.team not in tracked: continue
+            
+            radius = a.sight_radius
+            if radius <= 0:
+                self.sees[a.oid] = set()
+                continue
+            
+            if spatial_hash != None:
+                candidates = spatial_hash.query_radius(a.pos, radius)
+            else:
+                candidates = actors
+            
+            others = [c for c in candidates if c.team != a.team]
+            dists = vectors.distances(a.pos, [c.pos for c in others])
+            seen = [c.oid for c, dist in zip(others, dists) if dist <= radius]
+            
+            # The same as calling _see for each, inlined as every observer
+            # comes through here when everything is worked out from scratch
+            self.sees[a.oid] = set(seen)
+            counts = self._counts[a.team]
+            for oid in seen:
+                self.seen_by.setdefault(oid, set()).add(a.oid)
+                counts[oid] = counts.get(oid, 0) + 1
+        
+        # Which of the observers that stayed put can see the moved actors,
+        # we search around whichever of the two there are fewer of
+        still = [c for c in actors
+            if c.team in tracked and c.sight_radius > 0 and c.oid not in moved_oids]
+        
+        if len(still) < len(moved):
+            for c in still:
+                if spatial_hash != None:
+                    candidates = spatial_hash.query_radius(c.pos, c.sight_radius)
+                else:
+                    candidates = actors
+                
+                targets = [a for a in candidates if a.team != c.team and a.oid in moved_oids]
+                dists = vectors.distances(c.pos, [a.pos for a in targets])
+                
+                for a, dist in zip(targets, dists):
+                    if dist <= c.sight_radius:
+                        self._see(c.oid, c.team, a.oid)
+        
+        elif still != []:
+            for a, state in moved:
+                if spatial_hash != None:
+                    candidates = spatial_hash.query_radius(a.pos, max_radius)
+                else:
+                    candidates = actors
+                
+                observers = [c for c in candidates
+                    if c.team != a.team and c.team in tracked and c.sight_radius > 0 and c.oid not in moved_oids]
+                dists = vectors.distances(a.pos, [c.pos for c in observers])
+                
+                for c, dist in zip(observers, dists):
+                    if dist <= c.sight_radius:
+                        self._see(c.oid, c.team, a.oid)
+        
+        new_visible = {}
+        for t in teams:
+            new_visible[t] = set(self._counts[t])
+        
+        for a in actors:
+            if a.team in new_visible:
+                new_visible[a.team].add(a.oid)
+        
+        changes = {}
+        for t in teams:
+            old = self.visible.get(t, set())
+            changes[t] = (new_visible[t] - old, old - new_visible[t])
+        
+        self.visible = new_visible
+        return changes
+    
+    def can_see(self, team, oid):
+        return oid in self.visible.get(team, ())
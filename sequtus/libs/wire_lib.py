@@ -0,0 +1,333 @@
+"""
+Fixed layouts for the messages sent every tick so a channel using binary
+framing (see PodSixNet.Channel) can pack them with struct instead of
+rencoding a dict. Anything that doesn't fit a layout (e.g. a build order
+whose target is a type name) is left to rencode.
+
+encode returns (message type, body) or None, decode turns them back into
+the dict that was sent, except that positions with fractions come back
+as 32 bit floats.
+"""
+
+import struct
+
+from sequtus.libs import order_lib
+
+ORDER       = 1
+ORDERS      = 2
+TICK_ACK    = 3
+HASH_CHECK  = 4
+
+# Commands and formations are sent as their index in these
+commands = ("move", "stop", "build", "hold", "attack", "aid", "patrol")
+formations = (None, "line", "grid")
+
+command_ids = dict([(c, i) for i, c in enumerate(commands)])
+formation_ids = dict([(f, i) for i, f in enumerate(formations)])
+
+# Flags for an order
+QUEUED      = 1
+
+# actor, command, flags, tick
+order_struct = struct.Struct("!iBBI")
+
+# actor count, command, flags, formation, tick
+group_struct = struct.Struct("!HBBBI")
+
+# order count, group count, a bit per order_lib field sent once
+counts_struct = struct.Struct("!HHB")
+
+byte_struct = struct.Struct("!B")
+int_struct = struct.Struct("!i")
+
+# tick, player
+tick_ack_struct = struct.Struct("!IH")
+
+# tick, hash
+hash_check_struct = struct.Struct("!IQ")
+
+class DoesNotFit (Exception):
+    pass
+
+# Positions start with a byte holding their length (0 for None) and how
+# the values are packed. Whole numbers stay whole numbers, anything else
+# is sent as 32 bit floats, the same precision rencode sends floats with.
+SHORT_POS   = 4
+INT_POS     = 8
+pos_formats = ((0, "f"), (SHORT_POS, "h"), (INT_POS, "i"))
+
+def _pos_format(values):
+    if all([type(v) == int for v in values]):
+        if all([-32768 <= v < 32768 for v in values]):
+            return pos_formats[1]
+        return pos_formats[2]
+    return pos_formats[0]
+
+def _pack_pos(pos):
+    if pos is None:
+        return byte_struct.pack(0)
+    
+    if len(pos) not in (2, 3):
+        raise DoesNotFit()
+    
+    kind, fmt = _pos_format(pos)
+    return byte_struct.pack(len(pos) | kind) + struct.pack("!%d%s" % (len(pos), fmt), *pos)
+
+def _read_pos(body, offset):
+    kind = byte_struct.unpack_from(body, offset)[0]
+    offset += byte_struct.size
+    
+    length = kind & 3
+    if length == 0:
+        return None, offset
+    
+    fmt = "!%d%s" % (length, dict(pos_formats)[kind & ~3])
+    return list(struct.unpack_from(fmt, body, offset)), offset + struct.calcsize(fmt)
+
+def _pack_positions(positions):
+    """A column where every position is there and the same length is
+    sent as one array, otherwise position by position"""
+    if positions == [] or None in positions or len(set([len(p) for p in positions])) != 1:
+        return byte_struct.pack(0) + b"".join([_pack_pos(p) for p in positions])
+    
+    length = len(positions[0])
+    if length not in (2, 3):
+        raise DoesNotFit()
+    
+    values = [v for p in positions for v in p]
+    kind, fmt = _pos_format(values)
+    
+    return byte_struct.pack(length | kind) + struct.pack("!%d%s" % (len(values), fmt), *values)
+
+def _read_positions(body, offset, count):
+    kind = byte_struct.unpack_from(body, offset)[0]
+    offset += byte_struct.size
+    
+    length = kind & 3
+    if length == 0:
+        positions = []
+        for i in range(count):
+            p, offset = _read_pos(body, offset)
+            positions.append(p)
+        return positions, offset
+    
+    fmt = "!%d%s" % (length * count, dict(pos_formats)[kind & ~3])
+    values = struct.unpack_from(fmt, body, offset)
+    
+    return [list(values[i:i + length]) for i in range(0, len(values), length)], offset + struct.calcsize(fmt)
+
+# Targets are a flag followed by the oid if there is one, a target that
+# isn't an oid (e.g. what to build) doesn't fit
+def _pack_target(target):
+    if target is None:
+        return byte_struct.pack(0)
+    
+    if type(target) != int:
+        raise DoesNotFit()
+    
+    return byte_struct.pack(1) + int_struct.pack(target)
+
+def _read_target(body, offset):
+    present = byte_struct.unpack_from(body, offset)[0]
+    offset += byte_struct.size
+    
+    if not present:
+        return None, offset
+    
+    return int_struct.unpack_from(body, offset)[0], offset + int_struct.size
+
+# The order_lib columns, each is packed as a whole so a column of ints
+# only pays for the width its largest value needs
+int_formats = ("h", "i")
+
+def _pack_ints(values):
+    if not all([type(v) == int for v in values]):
+        raise DoesNotFit()
+    
+    fmt = int_formats[0]
+    if not all([-32768 <= v < 32768 for v in values]):
+        fmt = int_formats[1]
+    
+    return byte_struct.pack(int_formats.index(fmt)) + struct.pack("!%d%s" % (len(values), fmt), *values)
+
+def _read_ints(body, offset, count):
+    fmt = "!%d%s" % (count, int_formats[byte_struct.unpack_from(body, offset)[0]])
+    offset += byte_struct.size
+    
+    return list(struct.unpack_from(fmt, body, offset)), offset + struct.calcsize(fmt)
+
+def _pack_cmds(cmds):
+    if not all([c in command_ids for c in cmds]):
+        raise DoesNotFit()
+    return struct.pack("!%dB" % len(cmds), *[command_ids[c] for c in cmds])
+
+def _read_cmds(body, offset, count):
+    ids = struct.unpack_from("!%dB" % count, body, offset)
+    return [commands[i] for i in ids], offset + count
+
+def _pack_flags(values):
+    return struct.pack("!%dB" % len(values), *[1 if v else 0 for v in values])
+
+def _read_flags(body, offset, count):
+    return [v == 1 for v in struct.unpack_from("!%dB" % count, body, offset)], offset + count
+
+def _each(pack, read):
+    """Column codecs for values with a layout of their own"""
+    def pack_column(values):
+        return b"".join([pack(v) for v in values])
+    
+    def read_column(body, offset, count):
+        values = []
+        for i in range(count):
+            v, offset = read(body, offset)
+            values.append(v)
+        return values, offset
+    
+    return pack_column, read_column
+
+# (pack, read) for each of order_lib.fields
+column_codecs = (
+    (_pack_ints,    _read_ints),
+    (_pack_cmds,    _read_cmds),
+    (_pack_positions, _read_positions),
+    _each(_pack_target, _read_target),
+    (_pack_ints,    _read_ints),
+    (_pack_flags,   _read_flags),
+)
+
+def _pack_order(actor, cmd, pos, target, tick, queued):
+    if cmd not in command_ids:
+        raise DoesNotFit()
+    
+    return [
+        order_struct.pack(actor, command_ids[cmd], QUEUED if queued else 0, tick),
+        _pack_pos(pos),
+        _pack_target(target),
+    ]
+
+def _read_order(body, offset):
+    actor, cmd_id, flags, tick = order_struct.unpack_from(body, offset)
+    pos, offset = _read_pos(body, offset + order_struct.size)
+    target, offset = _read_target(body, offset)
+    
+    return (actor, commands[cmd_id], pos, target, tick, bool(flags & QUEUED)), offset
+
+def _pack_group(actors, cmd, pos, target, tick, queued, formation):
+    if cmd not in command_ids or formation not in formation_ids:
+        raise DoesNotFit()
+    
+    return [
+        group_struct.pack(len(actors), command_ids[cmd], QUEUED if queued else 0, formation_ids[formation], tick),
+        struct.pack("!%di" % len(actors), *actors),
+        _pack_pos(pos),
+        _pack_target(target),
+    ]
+
+def _read_group(body, offset):
+    count, cmd_id, flags, formation_id, tick = group_struct.unpack_from(body, offset)
+    offset += group_struct.size
+    
+    actors = list(struct.unpack_from("!%di" % count, body, offset))
+    offset += int_struct.size * count
+    
+    pos, offset = _read_pos(body, offset)
+    target, offset = _read_target(body, offset)
+    
+    return (actors, commands[cmd_id], pos, target, tick, bool(flags & QUEUED), formations[formation_id]), offset
+
+def _pack_orders(data):
+    """Keeps the columns of order_lib.pack_orders, a field sent once there
+    is sent once here"""
+    groups = order_lib.unpack_groups(data)
+    
+    shared = 0
+    parts = []
+    for i, (many, one) in enumerate(order_lib.fields):
+        pack = column_codecs[i][0]
+        
+        if many in data:
+            if len(data[many]) != data['count']:
+                raise DoesNotFit()
+            parts.append(pack(data[many]))
+        else:
+            shared |= 1 << i
+            parts.append(pack([data[one]]))
+    
+    for g in groups:
+        parts.extend(_pack_group(*g))
+    
+    return b"".join([counts_struct.pack(data['count'], len(groups), shared)] + parts)
+
+def _read_orders(body):
+    count, group_count, shared = counts_struct.unpack_from(body, 0)
+    offset = counts_struct.size
+    
+    data = {"action": "orders", "count": count}
+    for i, (many, one) in enumerate(order_lib.fields):
+        read = column_codecs[i][1]
+        
+        if shared & (1 << i):
+            values, offset = read(body, offset, 1)
+            data[one] = values[0]
+        else:
+            data[many], offset = read(body, offset, count)
+    
+    groups = []
+    for i in range(group_count):
+        g, offset = _read_group(body, offset)
+        groups.append(list(g))
+    
+    if groups:
+        data['groups'] = groups
+    
+    return data
+
+def encode(data):
+    """Returns (message type, body) for a message that fits one of the
+    layouts, otherwise None"""
+    action = data.get('action')
+    
+    try:
+        if action in ("issue_order", "queue_order"):
+            return ORDER, b"".join(_pack_order(data['actor'], data['cmd'], data['pos'],
+                data['target'], data['tick'], action == "queue_order"))
+        
+        if action == "orders":
+            return ORDERS, _pack_orders(data)
+        
+        if action == "tick_ack":
+            return TICK_ACK, tick_ack_struct.pack(data['tick'], data['player'])
+        
+        if action == "hash_check":
+            return HASH_CHECK, hash_check_struct.pack(data['tick'], data['hash'])
+    
+    except (DoesNotFit, KeyError, TypeError, struct.error):
+        return None
+    
+    return None
+
+def decode(message_type, body):
+    """The reverse of encode"""
+    if message_type == ORDER:
+        (actor, cmd, pos, target, tick, queued), offset = _read_order(body, 0)
+        return {
+            "action":   "queue_order" if queued else "issue_order",
+            "actor":    actor,
+            "cmd":      cmd,
+            "pos":      pos,
+            "target":   target,
+            "tick":     tick,
+        }
+    
+    if message_type == ORDERS:
+        return _read_orders(body)
+    
+    if message_type == TICK_ACK:
+        tick, player = tick_ack_struct.unpack(body)
+        return {"action": "tick_ack", "tick": tick, "player": player}
+    
+    if message_type == HASH_CHECK:
+        tick, hash_value = hash_check_struct.unpack(body)
+        return {"action": "hash_check", "tick": tick, "hash": hash_value}
+    
+    raise KeyError("No message type %s" % message_type)
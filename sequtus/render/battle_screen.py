@@ -78,6 +78,10 @@ class BattleScreen (screen.Screen):
         # be a waste to rebuild menus several times
         self._selection_has_changed = False
         self.selected_actors = []
+        
+        # How group moves are spread out around the target, see
+        # order_lib.formation_offsets
+        self.formation = None
     
     def activate(self, **kwargs):
         super(BattleScreen, self).activate(**kwargs)
@@ -283,12 +287,7 @@ class BattleScreen (screen.Screen):
                     self.mouse_mode = "move"
                     
                 if self.hotkeys[event.key] == "stop":
-                    for a in self.selected_actors:
-                        if a.team == self.sim.player_team:
-                            if KMOD_SHIFT & mods:
-                                self.sim.queue_order(a, "stop")
-                            else:
-                                self.sim.add_order(a, "stop")
+                    self.sim.add_group_order(self._own_selected_actors(), "stop", queued=bool(KMOD_SHIFT & mods))
                     
                 if self.hotkeys[event.key] == "attack":
                     self.mouse_mode = "attack"
@@ -412,14 +411,8 @@ class BattleScreen (screen.Screen):
                     break
             
             # Immidiate or Queued?
-            if KMOD_SHIFT & mods:
-                for a in self.selected_actors:
-                    if a.team == self.sim.player_team:
-                        self.sim.queue_order(a, self.key_mod, pos=scrolled_mouse_pos, target=actor_target)
-            else:
-                for a in self.selected_actors:
-                    if a.team == self.sim.player_team:
-                        self.sim.add_order(a, self.key_mod, pos=scrolled_mouse_pos, target=actor_target)
+            self.sim.add_group_order(self._own_selected_actors(), self.key_mod, pos=scrolled_mouse_pos,
+                target=actor_target, queued=bool(KMOD_SHIFT & mods), formation=self.formation)
         
         # No mouse order, we're just looking to select an actor
         else:
@@ -449,31 +442,24 @@ class BattleScreen (screen.Screen):
                 actor_target = weakref.ref(a)()
                 break
         
+        # The whole selection gets one group order
+        own_actors = self._own_selected_actors()
+        queued = bool(KMOD_SHIFT & mods)
+        
         # No actor clicked, this means we're moving
         if not actor_target:
-            for a in self.selected_actors:
-                if a.team == self.sim.player_team:
-                    if KMOD_SHIFT & mods:
-                        self.sim.queue_order(a, "move", pos=scrolled_mouse_pos)
-                    else:
-                        self.sim.add_order(a, "move", pos=scrolled_mouse_pos)
+            self.sim.add_group_order(own_actors, "move", pos=scrolled_mouse_pos, queued=queued, formation=self.formation)
         
         # An actor was clicked, we could be moving, attacking etc
         else:
             if actor_target.team != self.selected_actors[0].team:
-                for a in self.selected_actors:
-                    if a.team == self.sim.player_team:
-                        if KMOD_SHIFT & mods:
-                            self.sim.queue_order(a, "attack", target=actor_target)
-                        else:
-                            self.sim.add_order(a, "attack", target=actor_target)
+                self.sim.add_group_order(own_actors, "attack", target=actor_target, queued=queued)
             else:
-                for a in self.selected_actors:
-                    if a.team == self.sim.player_team:
-                        if KMOD_SHIFT & mods:
-                            self.sim.queue_order(a, "aid", target=actor_target)
-                        else:
-                            self.sim.add_order(a, "aid", target=actor_target)
+                self.sim.add_group_order(own_actors, "aid", target=actor_target, queued=queued)
+    
+    def _own_selected_actors(self):
+        """The selected actors we're allowed to give orders to"""
+        return [a for a in self.selected_actors if a.team == self.sim.player_team]
     
     def _handle_doubleclick(self, first_click, second_click):
         for i, c in self.controls.items():
@@ -31,10 +31,6 @@ class Screen (object):
         # This is the title drawn at the top of the window
         self.name = ""
         
-        # FPS (redraw rate)
-        self._next_redraw = 0
-        self._redraw_delay = 1/engine.fps
-        
         # Saved variables
         self.mouse_is_down = False
         self.keys_down = {}
@@ -81,19 +77,13 @@ class Screen (object):
         return pygame.transform.rotate(self.engine.images[image_name], -angle)
     
     def _redraw(self):
-        """Wrapper around redraw to not draw too fast"""
-        if time.time() < self._next_redraw: return
+        """Called by the engine's scheduler once per frame (see
+        application_core.Scheduler)"""
         self.redraw()
-        self._next_redraw = time.time() + self._redraw_delay
     
     def _update(self):
         # Does nothing but need it here for battle_screen to subclass
         pass
-        
-        """Wrapper around update to not update too fast"""
-        if time.time() < self._next_update: return
-        self.update()
-        self._next_update = time.time() + self._update_delay
     
     def redraw(self):
         """Basic screens do not have scrolling capabilities
@@ -1,7 +0,0 @@
-import application_t
-import vector_t, geometry_t, battle_t, actor_t
-import object_base_t
-import screen_lib_t, ai_lib_t
-import screen_t, battle_io_t, battle_screen_t, battle_sim_t, battle_network_t
-
-import network_tests
@@ -0,0 +1,180 @@
+import pickle
+import unittest
+from sequtus.ai import core_ai
+from sequtus.libs import actor_lib, geometry, vectors
+
+class DummyActor (object):
+    def __init__(self, oid, pos, size=(20, 20), max_velocity=2, velocity=(0, 0, 0)):
+        super(DummyActor, self).__init__()
+        self.oid = oid
+        self.pos = vectors.V(pos)
+        self.size = size
+        self.max_velocity = max_velocity
+        self.velocity = vectors.V(velocity)
+    
+    def rect(self):
+        return (
+            self.pos[0] - self.size[0]/2, self.pos[1] - self.size[1]/2,
+            self.pos[0] + self.size[0]/2, self.pos[1] + self.size[1]/2,
+        )
+
+class StateActor (DummyActor):
+    """Has everything strip_actor needs"""
+    def __init__(self, oid, pos, team=1):
+        super(StateActor, self).__init__(oid, pos)
+        self.team = team
+        self.facing = [0, 0]
+        self.actor_type = "Tank"
+        self.hp = 10
+        self.completion = 100
+        self.offence_flags = set()
+        self.defence_flags = set()
+        self.build_queue = []
+        self.current_order = ["stop", -1, -1]
+        self.order_queue = []
+
+class ActorLibTests(unittest.TestCase):
+    def test_bounce_both(self):
+        vals = (
+            # Overlap least on X so they get pushed apart along it
+            ((100, 100, 0), (115, 102, 0), (97, 100), (118, 102)),
+            
+            # And along Y
+            ((100, 100, 0), (98, 90, 0), (100, 105.5), (98, 84.5)),
+            
+            # Dead on top of each other, the lower oid goes right
+            ((100, 100, 0), (100, 100, 0), (110.5, 100), (89.5, 100)),
+        )
+        
+        for p1, p2, e1, e2 in vals:
+            a1 = DummyActor(1, p1)
+            a2 = DummyActor(2, p2)
+            
+            actor_lib.handle_pathing_collision(a1, a2)
+            
+            self.assertAlmostEqual(a1.pos[0], e1[0])
+            self.assertAlmostEqual(a1.pos[1], e1[1])
+            self.assertAlmostEqual(a2.pos[0], e2[0])
+            self.assertAlmostEqual(a2.pos[1], e2[1])
+            self.assertFalse(geometry.rect_collision(a1.rect(), a2.rect()))
+    
+    def test_bounce_one(self):
+        mover = DummyActor(1, (100, 100, 0), velocity=(2, 0, 0))
+        building = DummyActor(2, (120, 105, 0), size=(40, 40), max_velocity=0)
+        
+        actor_lib.handle_pathing_collision(mover, building)
+        
+        # Overlap on X is 10, then the margin and its speed
+        self.assertAlmostEqual(mover.pos[0], 87)
+        self.assertAlmostEqual(mover.pos[1], 100)
+        self.assertEqual(building.pos, [120, 105, 0])
+        self.assertFalse(geometry.rect_collision(mover.rect(), building.rect()))
+        
+        # Either way round
+        mover.pos = vectors.V(100, 100, 0)
+        actor_lib.handle_pathing_collision(building, mover)
+        self.assertAlmostEqual(mover.pos[0], 87)
+    
+    def test_no_overlap(self):
+        a1 = DummyActor(1, (100, 100, 0))
+        a2 = DummyActor(2, (200, 100, 0))
+        
+        actor_lib.handle_pathing_collision(a1, a2)
+        self.assertEqual(a1.pos, [100, 100, 0])
+        self.assertEqual(a2.pos, [200, 100, 0])
+    
+    def test_resolve_collisions(self):
+        a1 = DummyActor(1, (100, 100, 0))
+        a2 = DummyActor(2, (115, 102, 0))
+        a3 = DummyActor(3, (130, 104, 0))
+        
+        # The order of the pairs doesn't matter
+        pairs = [(a3, a2), (a1, a2)]
+        self.assertEqual(actor_lib.resolve_collisions(pairs), 3)
+        
+        # a2 is pushed from both sides and stays put on X
+        self.assertAlmostEqual(a1.pos[0], 97)
+        self.assertAlmostEqual(a2.pos[0], 115)
+        self.assertAlmostEqual(a3.pos[0], 133)
+        
+        self.assertEqual(actor_lib.resolve_collisions([]), 0)
+
+    def test_state_delta(self):
+        actors = dict([(i, StateActor(i, (i * 10, 0, 0), team=1 + i % 2)) for i in range(5)])
+        old = dict([(oid, actor_lib.actor_state(a)) for oid, a in actors.items()])
+        
+        ai = core_ai.AICore(None, None)
+        ai._init(team=1)
+        ai._recieve_actors(dict([(oid, actor_lib.strip_actor(a)) for oid, a in actors.items()]))
+        
+        # Move one, damage another, remove one and add a new one
+        actors[1].pos += [5, 0, 0]
+        actors[2].hp = 4
+        actors[2].current_order = ["move", [1, 2, 0], None]
+        del(actors[3])
+        actors[9] = StateActor(9, (90, 0, 0), team=2)
+        
+        new = dict([(oid, actor_lib.actor_state(a)) for oid, a in actors.items()])
+        spawned, removed, changed = actor_lib.state_delta(old, new, actors)
+        
+        self.assertEqual([a.oid for a in spawned], [9])
+        self.assertEqual(removed, [3])
+        self.assertEqual(changed, {
+            1: {"pos": (15.0, 0.0, 0.0)},
+            2: {"hp": 4, "current_order": ("move", [1, 2, 0], None)},
+        })
+        
+        # Round trip it through pickle with the protocol the queue uses
+        ai.changed_oids.clear()
+        delta = pickle.loads(pickle.dumps((spawned, removed, changed), pickle.HIGHEST_PROTOCOL))
+        ai._recieve_actors_delta(*delta)
+        
+        # Only what moved, came or went needs re-indexing
+        self.assertEqual(ai.changed_oids, set([1, 3, 9]))
+        
+        self.assertEqual(sorted(ai.known_actors), [0, 1, 2, 4, 9])
+        self.assertEqual([a.oid for a in ai.own_actors], [0, 2, 4])
+        self.assertEqual([a.oid for a in ai.enemy_actors], [1, 9])
+        self.assertEqual(ai.known_actors[1].pos, [15, 0, 0])
+        self.assertTrue(isinstance(ai.known_actors[1].pos, vectors.V))
+        self.assertEqual(ai.known_actors[2].hp, 4)
+        
+        # Changes alone update the actors in place
+        own_list = ai.own_actors
+        ai._recieve_actors_delta([], [], {0: {"hp": 1}})
+        self.assertTrue(ai.own_actors is own_list)
+        self.assertEqual(own_list[0].hp, 1)
+    
+    def test_build_matrix(self):
+        actor_types = {
+            "factory":  {"name": "factory", "flags": ["factory", "building"]},
+            "builder":  {"name": "builder", "flags": ["builder"]},
+            "tank":     {"name": "tank", "flags": []},
+            "mech":     {"name": "mech", "flags": [], "required_techs": ["legs"]},
+        }
+        build_lists = {
+            "factory":  ["tank", "builder", "mech"],
+            "builder":  ["factory"],
+            "nobody":   ["tank"],
+        }
+        
+        matrix = actor_lib.build_matrix(actor_types, build_lists)
+        self.assertEqual(matrix, {
+            "factory":  set(["tank", "builder"]),
+            "builder":  set(["factory"]),
+            "tank":     set(),
+            "mech":     set(),
+        })
+        
+        # It should agree with can_build for everything can_build handles
+        for builder_name, builder_type in actor_types.items():
+            for item_name, item_type in actor_types.items():
+                if "required_techs" in item_type: continue
+                
+                self.assertEqual(item_name in matrix[builder_name], actor_lib.can_build(
+                    builder_type = builder_type,
+                    item_type = item_type,
+                    build_lists = build_lists,
+                ))
+
+suite = unittest.TestLoader().loadTestsFromTestCase(ActorLibTests)
@@ -1,3 +1,5 @@
+import itertools
+import random
 import pygame
 import unittest
 from sequtus.libs import ai_lib
@@ -27,5 +29,49 @@ class AILibTests(unittest.TestCase):
         
         for actor_list, new_rect, expected in vals:
             self.assertEqual(expected, ai_lib.place_actor(actor_list, new_rect, distance=100))
+    
+    def test_assign(self):
+        costs = [
+            [1, 2],
+            [1, 10],
+        ]
+        
+        # Greedy grabs the cheapest first, optimal looks at the total
+        self.assertEqual(ai_lib.assign_greedy(costs), [(0, 0), (1, 1)])
+        self.assertEqual(ai_lib.assign_optimal(costs), [(0, 1), (1, 0)])
+        self.assertEqual(ai_lib.assign(costs), [(0, 1), (1, 0)])
+        self.assertEqual(ai_lib.assign(costs, optimal_limit=1), [(0, 0), (1, 1)])
+        
+        # None means that worker can't do the task at all
+        costs = [
+            [None, 1, 5],
+            [None, 2, None],
+        ]
+        self.assertEqual(ai_lib.assign_greedy(costs), [(0, 1)])
+        self.assertEqual(ai_lib.assign_optimal(costs), [(0, 2), (1, 1)])
+        
+        self.assertEqual(ai_lib.assign_optimal([]), [])
+        self.assertEqual(ai_lib.assign_greedy([[], []]), [])
+    
+    def test_assign_optimal_brute_force(self):
+        rand = random.Random(3)
+        
+        for i in range(50):
+            workers = rand.randint(1, 5)
+            tasks = rand.randint(1, 5)
+            costs = [[rand.choice((None, rand.randint(0, 20), rand.randint(0, 20)))
+                for t in range(tasks)] for w in range(workers)]
+            
+            # Best is the most tasks done then the lowest cost
+            best = None
+            for perm in itertools.permutations(range(max(workers, tasks)), workers):
+                pairs = [(w, t) for w, t in enumerate(perm) if t < tasks and costs[w][t] is not None]
+                score = (-len(pairs), sum([costs[w][t] for w, t in pairs]))
+                if best is None or score < best:
+                    best = score
+            
+            result = ai_lib.assign_optimal(costs)
+            self.assertEqual(len(set([t for w, t in result])), len(result))
+            self.assertEqual((-len(result), sum([costs[w][t] for w, t in result])), best, costs)
 
 suite = unittest.TestLoader().loadTestsFromTestCase(AILibTests)
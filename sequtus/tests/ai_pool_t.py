@@ -0,0 +1,87 @@
+import unittest
+from sequtus.ai import ai_pool, core_ai
+
+class EchoAI (core_ai.AICore):
+    def __init__(self, *args, **kwargs):
+        super(EchoAI, self).__init__(*args, **kwargs)
+        self.data_handlers['echo'] = self._echo
+    
+    def _echo(self, value):
+        self.out_queue.put({"data_type": "echo", "team": self.team, "value": value})
+
+core_ai.register_ai("ai_pool_t echo", EchoAI)
+
+class AIPoolTests(unittest.TestCase):
+    def test_routing(self):
+        pool = ai_pool.AIPool(workers=2)
+        
+        try:
+            queues = {}
+            for team in (1, 2, 3):
+                to_ai, from_ai = pool.make_ai("ai_pool_t echo")
+                to_ai.put({"cmd": "init", "team": team})
+                queues[team] = (to_ai, from_ai)
+            
+            # Spread across the workers
+            self.assertEqual(sorted(pool.clients[0].counts), [1, 2])
+            
+            for team, (to_ai, from_ai) in queues.items():
+                to_ai.put({"cmd": "echo", "value": team * 10})
+            
+            # Each AI only gets its own replies
+            for team in (3, 1, 2):
+                to_ai, from_ai = queues[team]
+                self.assertEqual(from_ai.get(timeout=5)['data_type'], "prefs")
+                
+                reply = from_ai.get(timeout=5)
+                self.assertEqual(reply['team'], team)
+                self.assertEqual(reply['value'], team * 10)
+            
+            # Quitting frees the slot on the worker
+            queues[1][0].put({"cmd": "quit"})
+            queues[2][0].put({"cmd": "quit"})
+            queues[3][0].put({"cmd": "echo", "value": 0})
+            queues[3][1].get(timeout=5)
+            
+            for i in range(50):
+                pool.pump(0.1)
+                if sum(pool.clients[0].counts) == 1: break
+            
+            self.assertEqual(sum(pool.clients[0].counts), 1)
+            self.assertTrue(queues[1][1].empty())
+        
+        finally:
+            pool.close()
+        
+        self.assertRaises(KeyError, pool.make_ai, "no such ai")
+    
+    def test_clients(self):
+        """AIs made through different clients share the workers but only
+        reply to the client that made them"""
+        pool = ai_pool.AIPool(workers=2, clients=2)
+        
+        try:
+            first, second = pool.clients
+            
+            queues = []
+            for client, team in ((first, 1), (second, 2)):
+                to_ai, from_ai = client.make_ai("ai_pool_t echo")
+                to_ai.put({"cmd": "init", "team": team})
+                to_ai.put({"cmd": "echo", "value": team})
+                queues.append(from_ai)
+            
+            # Each client starts with a different worker
+            self.assertEqual(first.counts, [1, 0])
+            self.assertEqual(second.counts, [0, 1])
+            
+            for team, from_ai in zip((1, 2), queues):
+                self.assertEqual(from_ai.get(timeout=5)['data_type'], "prefs")
+                self.assertEqual(from_ai.get(timeout=5)['value'], team)
+            
+            self.assertEqual(list(first.results.keys()), [(0, 0)])
+            self.assertEqual(list(second.results.keys()), [(1, 0)])
+        
+        finally:
+            pool.close()
+
+suite = unittest.TestLoader().loadTestsFromTestCase(AIPoolTests)
@@ -44,7 +44,67 @@ class TestCore (core.DefaultCore):
             raise
 
 
+class FakeClock (object):
+    def __init__(self):
+        super(FakeClock, self).__init__()
+        self.now = 100.0
+        self.slept = []
+    
+    def time(self):
+        return self.now
+    
+    def sleep(self, delay):
+        self.slept.append(delay)
+        self.now += delay
+
 class ApplicationTests(unittest.TestCase):
-    pass
+    def test_scheduler(self):
+        clock = FakeClock()
+        s = application_core.Scheduler(cps=10, fps=5, max_catch_up=3, now=clock.time, sleep=clock.sleep)
+        s.reset()
+        
+        # Both are due straight away
+        self.assertEqual(s.cycles_due(), 1)
+        self.assertTrue(s.frame_due())
+        self.assertEqual(s.cycles_due(), 0)
+        self.assertFalse(s.frame_due())
+        
+        # Nothing to do so it should sleep until the next cycle
+        s.wait()
+        self.assertAlmostEqual(clock.slept[-1], 0.1)
+        self.assertEqual(s.cycles_due(), 1)
+        self.assertFalse(s.frame_due())
+        
+        # A slow frame means catching up on the cycles we missed
+        clock.now += 0.25
+        self.assertEqual(s.cycles_due(), 2)
+        self.assertTrue(s.frame_due())
+        self.assertEqual(s.cycles_due(), 0)
+        
+        # Too far behind and it only runs max_catch_up of them
+        clock.now += 5
+        self.assertEqual(s.cycles_due(), 3)
+        self.assertEqual(s.dropped_cycles, 47)
+        self.assertEqual(s.cycles_due(), 0)
+        
+        # And it doesn't try to make up the missing frames either
+        self.assertTrue(s.frame_due())
+        self.assertFalse(s.frame_due())
+    
+    def test_scheduler_rate(self):
+        clock = FakeClock()
+        s = application_core.Scheduler(cps=30, fps=20, now=clock.time, sleep=clock.sleep)
+        s.reset()
+        
+        cycles, frames = 0, 0
+        while clock.now < 110:
+            cycles += s.cycles_due()
+            if s.frame_due(): frames += 1
+            s.wait()
+        
+        # Ten seconds at a steady rate without ever busy looping
+        self.assertTrue(299 <= cycles <= 301)
+        self.assertTrue(199 <= frames <= 201)
+        self.assertTrue(len(clock.slept) <= cycles + frames)
         
 suite = unittest.TestLoader().loadTestsFromTestCase(ApplicationTests)
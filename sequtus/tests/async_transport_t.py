@@ -0,0 +1,322 @@
+import json
+import time
+import unittest
+
+# The asyncio transport is Python 3 only
+try:
+    import asyncio
+except ImportError:
+    asyncio = None
+
+def pump_until(loop, endpoints, condition, timeout=5):
+    """Pumps the endpoints, each with its own loop as a client would be,
+    and runs the servers' loop until condition is true"""
+    start = time.time()
+    while not condition() and time.time() - start < timeout:
+        [e.Pump() for e in endpoints]
+        loop.run_until_complete(asyncio.sleep(0.001))
+
+@unittest.skipIf(asyncio is None, "asyncio isn't available")
+class AsyncTransportTests(unittest.TestCase):
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        
+        self.endpoints = []
+    
+    def tearDown(self):
+        for e in self.endpoints:
+            e.close()
+            e._loop.close()
+        self.loop.close()
+    
+    def endpoint(self, address):
+        from sequtus.PodSixNet.AsyncTransport import EndPoint
+        from sequtus.libs import wire_lib
+        
+        e = EndPoint(address)
+        e.codec = wire_lib
+        e.DoConnect()
+        
+        self.endpoints.append(e)
+        return e
+    
+    def test_round_trip(self):
+        from sequtus.PodSixNet.AsyncTransport import Channel, Server
+        from sequtus.libs import wire_lib
+        
+        class EchoChannel(Channel):
+            codec = wire_lib
+            
+            def Network_hello(self, data):
+                self.Send({"action": "gotit", "n": data['n']})
+            
+            def Network_tick_ack(self, data):
+                self.Send(data)
+        
+        class TestServer(Server):
+            connected = []
+            
+            def Connected(self, channel, addr):
+                self.connected.append(addr)
+        
+        server = TestServer(channelClass=EchoChannel, localaddr=("127.0.0.1", 0))
+        self.loop.run_until_complete(server.start())
+        
+        endpoint = self.endpoint(server.address)
+        
+        received = []
+        def collect():
+            received.extend(endpoint.GetQueue())
+            return len([d for d in received if d['action'] in ("gotit", "tick_ack")]) == 21
+        
+        for n in range(20):
+            endpoint.Send({"action": "hello", "n": n})
+        endpoint.Send({"action": "tick_ack", "tick": 5, "player": 1})
+        
+        pump_until(self.loop, [endpoint], collect)
+        
+        self.assertEqual(received[0]['action'], "socketConnect")
+        self.assertTrue(endpoint.isConnected)
+        self.assertEqual(len(server.connected), 1)
+        self.assertEqual([d['n'] for d in received if d['action'] == "gotit"], list(range(20)))
+        self.assertEqual(received[-1], {"action": "tick_ack", "tick": 5, "player": 1})
+        
+        # The server closing shows up as a disconnect
+        server.close()
+        pump_until(self.loop, [endpoint], lambda: not endpoint.isConnected)
+        self.assertIn({"action": "disconnected"}, endpoint.GetQueue())
+    
+    def exchange(self, endpoint, pump):
+        """Sends hellos and a packed message through endpoint to an echoing
+        server, pump runs both ends once"""
+        received = []
+        def collect():
+            pump()
+            received.extend(endpoint.GetQueue())
+            return len([d for d in received if d['action'] in ("gotit", "tick_ack")]) == 21
+        
+        for n in range(20):
+            endpoint.Send({"action": "hello", "n": n, "text": u"z\xe4\xf6"})
+        endpoint.Send({"action": "tick_ack", "tick": 5, "player": 1})
+        
+        start = time.time()
+        while not collect() and time.time() - start < 5:
+            time.sleep(0.001)
+        
+        self.assertEqual([d['n'] for d in received if d['action'] == "gotit"], list(range(20)))
+        self.assertEqual(received[-1], {"action": "tick_ack", "tick": 5, "player": 1})
+        
+        # The two ends agreed on binary framing
+        self.assertEqual(endpoint._framing_out, "binary")
+    
+    def test_asyncore_server(self):
+        # The asyncore stack went in Python 3.12
+        try:
+            from sequtus.PodSixNet.Channel import Channel
+            from sequtus.PodSixNet.Server import Server
+        except ImportError:
+            self.skipTest("asyncore isn't available")
+        
+        from sequtus.libs import wire_lib
+        
+        class EchoChannel(Channel):
+            codec = wire_lib
+            
+            def Network_hello(self, data):
+                self.Send({"action": "gotit", "n": data['n']})
+            
+            def Network_tick_ack(self, data):
+                self.Send(data)
+        
+        server = Server(channelClass=EchoChannel, localaddr=("127.0.0.1", 0))
+        endpoint = self.endpoint(server.socket.getsockname()[:2])
+        
+        try:
+            self.exchange(endpoint, lambda: server.Pump() or endpoint.Pump())
+        finally:
+            [c.close() for c in server.channels]
+            server.close()
+    
+    def test_asyncore_endpoint(self):
+        try:
+            from sequtus.PodSixNet.EndPoint import EndPoint
+        except ImportError:
+            self.skipTest("asyncore isn't available")
+        
+        from sequtus.PodSixNet.AsyncTransport import Channel, Server
+        from sequtus.libs import wire_lib
+        
+        class EchoChannel(Channel):
+            codec = wire_lib
+            
+            def Network_hello(self, data):
+                self.Send({"action": "gotit", "n": data['n']})
+            
+            def Network_tick_ack(self, data):
+                self.Send(data)
+        
+        server = Server(channelClass=EchoChannel, localaddr=("127.0.0.1", 0))
+        self.loop.run_until_complete(server.start())
+        
+        endpoint = EndPoint(server.address)
+        endpoint.codec = wire_lib
+        endpoint.DoConnect()
+        
+        try:
+            self.exchange(endpoint, lambda: endpoint.Pump() or self.loop.run_until_complete(asyncio.sleep(0)))
+        finally:
+            endpoint.close()
+            server.close()
+    
+    def test_connect_error(self):
+        # Nothing is listening on a port we've just closed
+        server = self.loop.run_until_complete(self.loop.create_server(asyncio.Protocol, "127.0.0.1", 0))
+        address = server.sockets[0].getsockname()[:2]
+        server.close()
+        self.loop.run_until_complete(server.wait_closed())
+        
+        endpoint = self.endpoint(address)
+        
+        errors = []
+        pump_until(self.loop, [endpoint], lambda: errors.extend([d for d in endpoint.GetQueue() if d['action'] == "error"]) or errors)
+        self.assertEqual(len(errors), 1)
+    
+    def test_matches(self):
+        from sequtus.game import async_server
+        from sequtus.libs import order_lib
+        
+        matches = async_server.make_matches(30)
+        for m in matches:
+            self.loop.run_until_complete(m.start())
+        
+        # Two players in each match
+        endpoints = []
+        for m in matches:
+            for p in range(2):
+                e = self.endpoint(m.address)
+                e.received = []
+                endpoints.append(e)
+        
+        def collect():
+            for e in endpoints:
+                e.received.extend(e.GetQueue())
+            return all([len(m.players) == 2 for m in matches])
+        
+        pump_until(self.loop, endpoints, collect)
+        
+        # The first player of each match gives an order with its match
+        # number as the actor, both players get it back on the next tick
+        for i, e in enumerate(endpoints[::2]):
+            e.Send(order_lib.pack_orders([(i, "move", [i, 10], None, 3, False)]))
+        
+        def orders_back():
+            collect()
+            return all([[d for d in e.received if d['action'] == "orders"] for e in endpoints])
+        
+        pump_until(self.loop, endpoints, orders_back)
+        
+        for i, e in enumerate(endpoints):
+            orders = [o for d in e.received if d['action'] == "orders" for o in order_lib.unpack_orders(d)]
+            self.assertEqual(orders, [(i // 2, "move", [i // 2, 10], None, 3, False)])
+        
+        # While idle the loop only wakes for ticks rather than spinning
+        start_cpu, start = time.process_time(), time.time()
+        self.loop.run_until_complete(asyncio.sleep(0.3))
+        cpu, wall = time.process_time() - start_cpu, time.time() - start
+        self.assertLess(cpu, wall / 2)
+        
+        # Quitting closes the match
+        endpoints[0].Send({"action": "quit"})
+        pump_until(self.loop, endpoints, lambda: not endpoints[0].isConnected)
+        self.assertFalse(matches[0].running)
+        self.assertEqual(matches[0].channels, [])
+        self.assertTrue(endpoints[2].isConnected)
+        
+        for m in matches:
+            m.close()
+            self.loop.run_until_complete(m.wait_closed())
+
+    def test_client(self):
+        from sequtus.game import async_server, async_client
+        from sequtus.libs import order_lib
+        
+        class OrderSim(object):
+            """Stands in for the sim, it only keeps the orders"""
+            player = None
+            
+            def __init__(self):
+                self.orders = []
+            
+            def _real_orders(self, orders, groups):
+                self.orders.extend(orders)
+        
+        match = async_server.MatchServer(localaddr=("127.0.0.1", 0))
+        self.loop.run_until_complete(match.start())
+        
+        sims = [OrderSim(), OrderSim()]
+        clients = [async_client.Client(s, *match.address) for s in sims]
+        self.endpoints.extend([c.connection for c in clients])
+        
+        # The clients are updated the way the sim updates them
+        def updated(condition):
+            def update():
+                [c.update() for c in clients]
+                return condition()
+            return update
+        
+        pump_until(self.loop, [], updated(lambda: sims[1].player is not None))
+        self.assertEqual([s.player for s in sims], [0, 1])
+        
+        order = (4, "move", [4, 10], None, 3, False)
+        clients[0].Send(order_lib.pack_orders([order]))
+        
+        pump_until(self.loop, [], updated(lambda: all([s.orders for s in sims])))
+        self.assertEqual([s.orders for s in sims], [[order], [order]])
+        
+        clients[0].quit()
+        pump_until(self.loop, [], updated(lambda: not clients[1].connection.isConnected))
+        self.assertFalse(match.running)
+        self.loop.run_until_complete(match.wait_closed())
+
+    def test_battle_sim(self):
+        """Two sims playing a match through a MatchServer"""
+        from sequtus.game import async_server, headless
+        from sequtus.tests import headless_t
+        
+        match = async_server.MatchServer(localaddr=("127.0.0.1", 0))
+        
+        # Orders come back for the tick they were sent for so the server
+        # has to keep up with the sims, which run flat out here
+        match.tick_delay = 0.001
+        self.loop.run_until_complete(match.start())
+        
+        sims = []
+        for i in range(2):
+            sim = headless.make_sim(json.loads(json.dumps(headless_t.scenario)), json.loads(json.dumps(headless_t.game_data)),
+                config={"async_client": True}, image_sizes={"walker": [41, 35]})
+            sim.connect(*match.address)
+            
+            sims.append(sim)
+            self.endpoints.append(sim.connection.connection)
+        
+        def updated(condition):
+            def update():
+                [s.update() for s in sims]
+                return condition()
+            return update
+        
+        pump_until(self.loop, [], updated(lambda: all([getattr(s, "player", None) is not None for s in sims])))
+        self.assertEqual([s.player for s in sims], [0, 1])
+        
+        oid = min(sims[0].actors)
+        sims[0].add_order(sims[0].actors[oid], "move", pos=[500, 100, 0])
+        
+        pump_until(self.loop, [], updated(lambda: all([s.actors[oid].pos[0] > 150 for s in sims])))
+        self.assertTrue(sims[0].actors[oid].pos[0] > 150)
+        self.assertEqual(sims[0].actors[oid].pos, sims[1].actors[oid].pos)
+        
+        for s in sims:
+            s.quit()
+        match.close()
+
+suite = unittest.TestLoader().loadTestsFromTestCase(AsyncTransportTests)
@@ -0,0 +1,66 @@
+import pygame
+import unittest
+
+from sequtus.ai import autotargeter
+from sequtus.libs import spatial_lib, vectors
+
+class TargetActor (object):
+    def __init__(self, oid, team, pos, max_attack_range=0):
+        super(TargetActor, self).__init__()
+        self.oid = oid
+        self.team = team
+        self.pos = vectors.V(pos)
+        self.rect = pygame.Rect(pos[0] - 5, pos[1] - 5, 10, 10)
+        self.max_attack_range = max_attack_range
+        self.enemy_targets = []
+
+class TargetSim (object):
+    """Only the parts of the sim the autotargeter looks at"""
+    def __init__(self, actors, spatial_hash=None):
+        super(TargetSim, self).__init__()
+        self.actors = dict([(a.oid, a) for a in actors])
+        
+        if spatial_hash != None:
+            self.spatial_hash = spatial_hash
+            for a in actors:
+                spatial_hash.insert(a)
+
+class AutotargeterTests(unittest.TestCase):
+    def make_actors(self):
+        return [
+            TargetActor(0, 1, [100, 100], max_attack_range=100),
+            TargetActor(1, 2, [150, 100]),# 50 away
+            TargetActor(2, 2, [100, 180]),# 80
+            TargetActor(3, 2, [100, 240]),# 140, out of range
+            TargetActor(4, 2, [170, 170]),# 99
+            TargetActor(5, 2, [190, 190]),# 127, in the queried square but out of range
+            TargetActor(6, 1, [110, 100]),# A friend
+            TargetActor(7, 2, [50, 100]),# 50, ties with 1
+        ]
+    
+    def test_spatial_hash(self):
+        actors = self.make_actors()
+        sim = TargetSim(actors, spatial_lib.SpatialHash(cell_size=50))
+        
+        t = autotargeter.Autotargeter(sim, 1)
+        t.update()
+        t.update_actor(actors[0])
+        
+        # Closest first, ties on oid
+        self.assertEqual([a.oid for a in actors[0].enemy_targets], [1, 7, 2, 4])
+        
+        # With a hash we never need a list of every enemy
+        self.assertEqual(t.enemy_actors, None)
+    
+    def test_no_spatial_hash(self):
+        actors = self.make_actors()
+        sim = TargetSim(actors)
+        
+        t = autotargeter.Autotargeter(sim, 1)
+        t.update()
+        t.update_actor(actors[0])
+        
+        self.assertEqual([a.oid for a in actors[0].enemy_targets], [1, 7, 2, 4])
+        self.assertEqual(sorted([a.oid for a in t.enemy_actors]), [1, 2, 3, 4, 5, 7])
+
+suite = unittest.TestLoader().loadTestsFromTestCase(AutotargeterTests)
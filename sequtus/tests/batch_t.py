@@ -0,0 +1,60 @@
+import unittest
+
+from sequtus.game import batch
+
+class FakeSim (object):
+    def find_collisions(self):
+        return [1, 2]
+
+class BatchTests(unittest.TestCase):
+    def test_make_jobs(self):
+        scenario = {"ais": {"1": {"type": "a"}, "2": {"type": "a"}}, "actors": []}
+        
+        jobs = batch.make_jobs([scenario], 2, seed=10)
+        self.assertEqual([(j['match'], j['seed'], j['ais']) for j in jobs], [(0, 10, None), (1, 11, None)])
+        
+        # Every pairing of AIs for the two teams, twice each
+        jobs = batch.make_jobs([scenario], 2, ais=["x", "y"])
+        self.assertEqual(len(jobs), 8)
+        self.assertEqual(jobs[0]['ais'], {"1": "x", "2": "x"})
+        self.assertEqual(jobs[2]['ais'], {"1": "x", "2": "y"})
+        self.assertEqual(jobs[7]['ais'], {"1": "y", "2": "y"})
+        self.assertEqual([j['match'] for j in jobs], list(range(8)))
+    
+    def test_default_scenario(self):
+        """Both teams have actors so a match runs until it's called a draw
+        rather than being won before it starts"""
+        jobs = batch.make_jobs([batch.default_scenario], 1, ais=["basic"])
+        self.assertEqual(jobs[0]['ais'], {"1": "basic", "2": "basic"})
+        
+        row = batch.run_job(jobs[0], "sequtus/defaults/game_data.json",
+            image_sizes="sequtus/defaults/image_sizes.json", max_ticks=50)
+        
+        self.assertTrue(row['ticks'] > 10)
+        self.assertEqual(sorted(row['teams'].keys()), [1, 2])
+        self.assertEqual(row['winner'], None)
+    
+    def test_time_subsystems(self):
+        sim = FakeSim()
+        timings = batch.time_subsystems(sim, ("find_collisions",))
+        
+        self.assertEqual(sim.find_collisions(), [1, 2])
+        self.assertEqual(list(timings.keys()), ["find_collisions"])
+        self.assertTrue(timings['find_collisions'] >= 0)
+    
+    def test_columns(self):
+        rows = [
+            {"match": 0, "winner": 1, "ticks": 50},
+            {"match": 1, "error": "KeyError: 'x'"},
+        ]
+        
+        self.assertEqual(batch.columns(rows), {
+            "error":    [None, "KeyError: 'x'"],
+            "match":    [0, 1],
+            "ticks":    [50, None],
+            "winner":   [1, None],
+        })
+        
+        self.assertEqual(batch.summarise(rows), "Winner 1: 1\nAverage ticks: 50.0\nErrors: 1")
+
+suite = unittest.TestLoader().loadTestsFromTestCase(BatchTests)
@@ -136,7 +136,7 @@ class BattleScreenTests(unittest.TestCase):
             self.assertEqual(0, len(c.current_screen.selected_actors))
             
             # Get index first, then get reference
-            index = c.current_screen.sim.actors.keys()[0]
+            index = list(c.current_screen.sim.actors.keys())[0]
             first_actor = c.current_screen.sim.actors[index]
             
             # Using direct references
@@ -148,27 +148,27 @@ class BattleScreenTests(unittest.TestCase):
     def test_calling_of_order(self):
         with application_t.TestCore() as c:
             data_holder = {}
-            def _f(self, *args, **kwargs):
+            def _f(*args, **kwargs):
                 data_holder['args'] = args
                 data_holder['kwargs'] = kwargs
             
-            # Move
+            # Move, the whole selection is given one group order
             c.current_screen.select_actor(0)
-            c.current_screen.sim.add_order = _f
+            c.current_screen.sim.add_group_order = _f
+            actors = list(c.current_screen.selected_actors)
             
             c.current_screen._handle_mousedown(pygame.event.Event(MOUSEBUTTONDOWN, button=3, pos=(1194, 1120)))
             c.current_screen._handle_mouseup(pygame.event.Event(MOUSEBUTTONUP, button=3, pos=(1194, 1120)))
             
             self.assertEqual(data_holder, {
-                "args":     ("move",),
-                "kwargs":   {"pos": (1194, 1120)}
+                "args":     (actors, "move"),
+                "kwargs":   {"pos": (1194, 1120), "queued": False, "formation": None}
             })
             
             # Now test it is queued
             data_holder = {}
             c.current_screen.unselect_all_actors()
             c.current_screen.select_actor(0)
-            c.current_screen.sim.queue_order = _f
             
             pygame.key.set_mods(KMOD_SHIFT)
             mods = pygame.key.get_mods()
@@ -178,8 +178,8 @@ class BattleScreenTests(unittest.TestCase):
             
             # TODO Shift isn't detected as held down so it doesn't work correctly
             # self.assertEqual(data_holder, {
-            #     "args":     ("move",),
-            #     "kwargs":   {"pos": (1194, 1120)}
+            #     "args":     (actors, "move"),
+            #     "kwargs":   {"pos": (1194, 1120), "queued": True, "formation": None}
             # })
             
             
@@ -187,7 +187,6 @@ class BattleScreenTests(unittest.TestCase):
             data_holder = {}
             c.current_screen.unselect_all_actors()
             c.current_screen.select_actor(0)
-            c.current_screen.sim.add_order = _f
             
             c.current_screen._handle_mousedown(pygame.event.Event(MOUSEBUTTONDOWN, button=1, pos=(1194, 1120)))
             c.current_screen._handle_mouseup(pygame.event.Event(MOUSEBUTTONUP, button=1, pos=(1194, 1120)))
@@ -2,8 +2,17 @@ import pygame
 import unittest
 
 from sequtus.game import actors
+from sequtus.libs import snapshot_lib
 from sequtus.tests import application_t
 
+class DummyQueue (object):
+    def __init__(self):
+        super(DummyQueue, self).__init__()
+        self.items = []
+    
+    def put(self, item):
+        self.items.append(item)
+
 
 class BattleSimTests(unittest.TestCase):
     def test_several_loop_cycles(self):
@@ -20,6 +29,31 @@ class BattleSimTests(unittest.TestCase):
             
             self.assertIn(oid, sim.actors)
     
+    def test_ai_snapshots(self):
+        """Each AI's snapshot only ever holds what its team can see"""
+        with application_t.TestCore() as c:
+            sim = c.current_screen.sim
+            
+            own = sim.actors[0]
+            near = sim.place_actor({"type":"Worker", "team":2, "pos":[own.pos[0] + 50, own.pos[1], 0]})
+            far = sim.place_actor({"type":"Worker", "team":2, "pos":[own.pos[0] + 5000, own.pos[1], 0]})
+            
+            sim._actor_type_ids = snapshot_lib.type_ids(sim.actor_types)
+            for t in (1, 2):
+                sim.snapshots[t] = snapshot_lib.Snapshot(16)
+                sim.out_queues[t] = DummyQueue()
+                sim.ai_prefs[t] = {}
+            
+            sim.update_ai_queues()
+            
+            names = snapshot_lib.type_names(sim.actor_types)
+            self.assertEqual([a.oid for a in sim.snapshots[1].read(names)[1]], [own.oid, near.oid])
+            self.assertEqual([a.oid for a in sim.snapshots[2].read(names)[1]], sorted([own.oid, near.oid, far.oid]))
+            
+            notice = sim.out_queues[1].items[-1]
+            self.assertEqual(notice['cmd'], "snapshot")
+            self.assertEqual(notice['version'], sim.snapshots[1].version)
+    
     def test_add_orders(self):
         with application_t.TestCore() as c:
             sim = c.current_screen.sim
@@ -1,5 +1,5 @@
 import unittest
-import sim_t
+from sequtus.tests import sim_t
 from sequtus.libs import drawing
 
 class BattleTests (sim_t.SimTester):
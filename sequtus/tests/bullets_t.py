@@ -0,0 +1,72 @@
+from __future__ import division
+
+import unittest
+from sequtus.game import bullets
+from sequtus.libs import spatial_lib, vectors
+from sequtus.tests import object_base_t
+
+def new_actor(oid, pos, hp=100):
+    a = object_base_t.new_base(pos=vectors.V(pos), size=[10,10])
+    a.oid = oid
+    a.hp = hp
+    return a
+
+def new_shell(pos, blast_radius=50):
+    return bullets.Shell(
+        pos=vectors.V(pos),
+        velocity=vectors.V(0,0,0),
+        blast_radius=blast_radius,
+        damage={"kinetic": 10},
+    )
+
+class BulletTests(unittest.TestCase):
+    def make_actors(self):
+        return {
+            0: new_actor(0, [100, 100, 0]),
+            1: new_actor(1, [125, 100, 0]),
+            2: new_actor(2, [300, 100, 0]),
+        }
+    
+    def test_explode(self):
+        actors = self.make_actors()
+        
+        effect = new_shell([100, 100, 0]).explode(actors)
+        self.assertNotEqual(effect, None)
+        
+        # Full damage at the centre, half at half the radius and none
+        # outside of it
+        self.assertAlmostEqual(actors[0].hp, 90)
+        self.assertAlmostEqual(actors[1].hp, 95)
+        self.assertAlmostEqual(actors[2].hp, 100)
+    
+    def test_explode_all(self):
+        shells = [
+            new_shell([100, 100, 0]),
+            new_shell([300, 100, 0]),
+            new_shell([1000, 1000, 0]),
+            new_shell([100, 100, 0], blast_radius=0),
+        ]
+        
+        # Both with and without a spatial hash should do the same damage
+        results = []
+        for use_hash in (False, True):
+            actors = self.make_actors()
+            
+            spatial_hash = None
+            if use_hash:
+                spatial_hash = spatial_lib.SpatialHash(32)
+                for aid, a in actors.items():
+                    spatial_hash.insert(a)
+            
+            effects = bullets.explode_all(shells, actors, spatial_hash)
+            self.assertEqual(len(effects), len(shells))
+            
+            results.append([actors[i].hp for i in range(3)])
+        
+        self.assertEqual(results[0], results[1])
+        
+        expected = [90, 95, 90]
+        for e, r in zip(expected, results[0]):
+            self.assertAlmostEqual(e, r)
+
+suite = unittest.TestLoader().loadTestsFromTestCase(BulletTests)
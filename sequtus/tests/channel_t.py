@@ -0,0 +1,153 @@
+import asynchat
+import time
+import unittest
+
+from sequtus.libs import wire_lib
+from sequtus.PodSixNet.Channel import Channel, frame_header
+from sequtus.PodSixNet.rencode import dumps, loads
+
+def binary_frame(data):
+    message_type, body = wire_lib.encode(data)
+    return frame_header.pack(len(body), message_type) + body
+
+class RecordingChannel (Channel):
+    """A channel without a socket, data is handed to it a chunk at a time
+    in place of reading it"""
+    def __init__(self):
+        Channel.__init__(self, map={})
+        self.received = []
+        self.chunks = []
+    
+    def recv(self, buffer_size):
+        return self.chunks.pop(0)
+    
+    def feed(self, data, chunk_size):
+        self.chunks = [data[i:i + chunk_size] for i in range(0, len(data), chunk_size)]
+        while self.chunks:
+            self.handle_read()
+    
+    def Network(self, data):
+        self.received.append(data)
+
+class OldChannel (RecordingChannel):
+    """Reads the way Channel used to, with asynchat's terminators and a
+    string for a buffer"""
+    def __init__(self):
+        RecordingChannel.__init__(self)
+        self.old_buffer = b""
+        self.set_terminator(self.endchars)
+    
+    handle_read = asynchat.async_chat.handle_read
+    
+    def collect_incoming_data(self, data):
+        self.old_buffer += data
+    
+    def found_terminator(self):
+        self.received.append(loads(self.old_buffer))
+        self.old_buffer = b""
+
+class ChannelTests(unittest.TestCase):
+    messages = [{"action": "hello", "n": i, "text": "x" * (i % 7)} for i in range(20)]
+    
+    def test_rencode_split(self):
+        data = b"".join([dumps(m) + Channel.endchars for m in self.messages])
+        
+        # Including terminators split across reads
+        for chunk_size in (1, 3, 7, 64, len(data)):
+            c = RecordingChannel()
+            c.feed(data, chunk_size)
+            
+            self.assertEqual(c.received, self.messages)
+            self.assertEqual(len(c._ibuffer), 0)
+    
+    def test_binary_split(self):
+        sender = RecordingChannel()
+        sender.codec = wire_lib
+        sender._framing_out = "binary"
+        
+        messages = self.messages + [
+            {"action": "tick_ack", "tick": 3, "player": 1},
+            {"action": "issue_order", "actor": 1, "cmd": "move", "pos": [5, 5], "target": None, "tick": 4},
+        ]
+        
+        for m in messages:
+            sender.Send(m)
+        data = b"".join(sender.sendqueue)
+        
+        for chunk_size in (1, 5, 64, len(data)):
+            c = RecordingChannel()
+            c.codec = wire_lib
+            c._framing_in = "binary"
+            c.feed(data, chunk_size)
+            
+            self.assertEqual(c.received, messages)
+    
+    def test_switch_mid_read(self):
+        # The switch and what follows it arrive in the same read
+        data = dumps({"action": "framing", "mode": "binary"}) + Channel.endchars
+        data += b"".join([binary_frame({"action": "tick_ack", "tick": t, "player": 0}) for t in range(3)])
+        
+        c = RecordingChannel()
+        c.codec = wire_lib
+        c.feed(data, len(data))
+        
+        self.assertEqual(c._framing_in, "binary")
+        self.assertEqual([m['tick'] for m in c.received[1:]], [0, 1, 2])
+    
+    def test_pump(self):
+        pushed = []
+        
+        c = RecordingChannel()
+        
+        # Everything sent between pumps goes out in one push
+        for m in self.messages:
+            c.Send(m)
+        
+        old_push = asynchat.async_chat.push
+        asynchat.async_chat.push = lambda self, data: pushed.append(data)
+        try:
+            c.Pump()
+            c.Pump()
+        finally:
+            asynchat.async_chat.push = old_push
+        
+        self.assertEqual(len(pushed), 1)
+        self.assertEqual(c.sendqueue, [])
+        
+        r = RecordingChannel()
+        r.feed(pushed[0], len(pushed[0]))
+        self.assertEqual(r.received, self.messages)
+
+class ChannelBenchmarks(unittest.TestCase):
+    """Compares reading through asynchat with a string buffer against the
+    bytearray buffer, for a burst of small messages and for one large
+    message, arriving in packet sized reads"""
+    chunk_size = 1400
+    
+    def test_read_benchmark(self):
+        print("")
+        
+        bursts = (
+            ("2000 small messages", [{"action": "issue_order", "actor": i, "cmd": "move",
+                "pos": [i, i], "target": None, "tick": 5} for i in range(2000)]),
+            ("one 500KB message", [{"action": "snapshot", "data": "x" * 500000}]),
+        )
+        
+        for name, messages in bursts:
+            data = b"".join([dumps(m) + Channel.endchars for m in messages])
+            
+            times = []
+            for channel_class in (OldChannel, RecordingChannel):
+                c = channel_class()
+                
+                start = time.time()
+                c.feed(data, self.chunk_size)
+                times.append(time.time() - start)
+                
+                self.assertEqual(len(c.received), len(messages))
+            
+            print("%s in %d byte reads, asynchat: %.4fs, bytearray: %.4fs" % (
+                name, self.chunk_size, times[0], times[1]))
+
+suite = unittest.TestLoader().loadTestsFromTestCase(ChannelTests)
+benchmark_suite = unittest.TestLoader().loadTestsFromTestCase(ChannelBenchmarks)
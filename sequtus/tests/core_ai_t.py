@@ -0,0 +1,124 @@
+import time
+import unittest
+
+try:
+    import queue
+except ImportError:
+    import Queue as queue
+
+from sequtus.ai import core_ai, basic_computer_ai
+from sequtus.libs import ai_lib, actor_lib, vectors
+
+class CountingAI (core_ai.AICore):
+    def __init__(self, *args, **kwargs):
+        super(CountingAI, self).__init__(*args, **kwargs)
+        self.cycles = 0
+        self.actor_messages = []
+    
+    def _recieve_actors(self, actor_list):
+        self.actor_messages.append(actor_list)
+    
+    def cycle(self):
+        self.cycles += 1
+
+class CoreAITests(unittest.TestCase):
+    def test_coalesce_messages(self):
+        messages = [
+            {"cmd": "actors", "actor_list": [1]},
+            {"cmd": "actors_delta", "spawned": [], "removed": [1], "changed": {}},
+            {"cmd": "actor_types", "actor_types": {}},
+            {"cmd": "actors", "actor_list": [2]},
+            {"cmd": "actors_delta", "spawned": [], "removed": [2], "changed": {}},
+        ]
+        
+        result = core_ai.coalesce_messages(messages)
+        self.assertEqual([m['cmd'] for m in result], ["actor_types", "actors", "actors_delta"])
+        self.assertEqual(result[1]['actor_list'], [2])
+        
+        # Deltas on their own are all needed
+        self.assertEqual(core_ai.coalesce_messages(messages[1:3]), messages[1:3])
+    
+    def test_core_cycle(self):
+        in_queue = queue.Queue()
+        out_queue = queue.Queue()
+        
+        ai = CountingAI(in_queue, out_queue)
+        ai_lib.set_speed(ai, 20)
+        
+        in_queue.put({"cmd": "actors", "actor_list": [1]})
+        in_queue.put({"cmd": "actors", "actor_list": [2]})
+        
+        # Only the newest of the backlog is handled
+        ai.core_cycle()
+        self.assertEqual(ai.actor_messages, [[2]])
+        self.assertEqual(ai.cycles, 1)
+        
+        # Nothing to do so it should wait on the queue until the next cycle
+        start = time.time()
+        ai.core_cycle()
+        self.assertTrue(time.time() - start >= 0.03)
+        self.assertEqual(ai.cycles, 2)
+        
+        ai.report_timing()
+        report = out_queue.get_nowait()
+        self.assertEqual(report['data_type'], "timing")
+        self.assertEqual(report['cycles'], 2)
+        self.assertEqual(report['messages'], 2)
+
+    def test_basic_computer_bases(self):
+        def make_actor(oid, actor_type, pos):
+            a = actor_lib.StrippedActor()
+            a.oid = oid
+            a.team = 1
+            a.actor_type = actor_type
+            a.pos = vectors.V(pos)
+            a.completion = 100
+            a.current_order = ("stop", -1, -1)
+            a.build_queue = []
+            return a
+        
+        ai = basic_computer_ai.BasicComputerAI(None, queue.Queue())
+        ai._init(team=1)
+        ai._recieve_actor_types({
+            "hq":       {"name": "hq", "flags": ["hq"], "can_construct": False},
+            "builder":  {"name": "builder", "flags": ["builder"], "can_construct": True},
+        })
+        ai._recieve_build_lists({"builder": ["hq"]})
+        self.assertTrue(ai.can_build("builder", "hq"))
+        self.assertFalse(ai.can_build("hq", "builder"))
+        
+        ai._recieve_actors({
+            1: make_actor(1, "hq", (100, 100, 0)),
+            2: make_actor(2, "builder", (500, 500, 0)),
+        })
+        ai._init(bases={"home": {
+            "location": (100, 100),
+            "size": (50, 50),
+            "actors": ["hq"],
+            "attacks": [],
+        }})
+        
+        ai.update_bases()
+        self.assertEqual(ai.base_members["home"], set([1]))
+        self.assertEqual(ai.constructors, set([2]))
+        self.assertEqual(ai.changed_oids, set())
+        
+        # Only the builder moves into the base, the hq isn't looked at
+        moved = make_actor(2, "builder", (120, 90, 0))
+        ai._recieve_actors({1: ai.own_actors[1], 2: moved})
+        self.assertEqual(ai.changed_oids, set([2]))
+        
+        ai.update_bases()
+        self.assertEqual(ai.base_members["home"], set([1, 2]))
+        
+        # Losing the hq takes it out of the base
+        ai._recieve_actors_delta([], [1], {})
+        ai.update_bases()
+        self.assertEqual(ai.base_members["home"], set([2]))
+        
+        # The builder is idle so it should be sent to rebuild the hq
+        ai.inspect_bases()
+        order = ai.out_queue.get_nowait()
+        self.assertEqual((order['actor'], order['cmd'], order['target']), (2, "build", "hq"))
+
+suite = unittest.TestLoader().loadTestsFromTestCase(CoreAITests)
@@ -1,19 +1,35 @@
 import sys
 import unittest
 
-import covers
-from sequtus.tests import *
+from sequtus.tests import covers
+from sequtus.tests import application_t
+from sequtus.tests import vector_t, geometry_t, battle_t, actor_t, actor_lib_t
+from sequtus.tests import object_base_t, bullets_t
+from sequtus.tests import screen_lib_t, ai_lib_t, core_ai_t, autotargeter_t, ai_pool_t, spatial_lib_t, sim_lib_t, store_lib_t, snapshot_lib_t, visibility_lib_t, order_lib_t, wire_lib_t, channel_t, async_transport_t
+from sequtus.tests import screen_t, battle_screen_t, battle_sim_t, headless_t, batch_t
 
 def run(args=None):
     # Tests that don't take long to run
     fast_tests = [
         ai_lib_t.suite,
+        core_ai_t.suite,
+        autotargeter_t.suite,
+        spatial_lib_t.suite,
+        sim_lib_t.suite,
+        store_lib_t.suite,
+        snapshot_lib_t.suite,
+        visibility_lib_t.suite,
+        order_lib_t.suite,
+        wire_lib_t.suite,
+        channel_t.suite,
         actor_t.suite,
+        actor_lib_t.suite,
         vector_t.suite,
         geometry_t.suite,
         # battle_t.suite,
         screen_lib_t.suite,
         object_base_t.suite,
+        bullets_t.suite,
     ]
     
     # Tests that take a while to run
@@ -27,6 +43,21 @@ def run(args=None):
         
         # Sim
         battle_sim_t.suite,
+        ai_pool_t.suite,
+        headless_t.suite,
+        batch_t.suite,
+        
+        # Network
+        async_transport_t.suite,
+        
+        # Benchmarks
+        sim_lib_t.benchmark_suite,
+        store_lib_t.benchmark_suite,
+        visibility_lib_t.benchmark_suite,
+        vector_t.benchmark_suite,
+        order_lib_t.benchmark_suite,
+        wire_lib_t.benchmark_suite,
+        channel_t.benchmark_suite,
     ]
     
     # Have args been passed?
@@ -0,0 +1,154 @@
+import json
+import os
+import random
+import tempfile
+import unittest
+
+import pygame
+
+from sequtus.ai import core_ai
+from sequtus.game import headless
+
+class WanderAI (core_ai.AICore):
+    """Sends its actors somewhere random whenever it's told about them"""
+    def cycle(self):
+        if not self.actors_updated: return
+        self.actors_updated = False
+        
+        for a in self.own_actors:
+            self.issue_orders(a.oid, "move", pos=[random.randint(0, 1000), random.randint(0, 1000), 0])
+
+core_ai.register_ai("headless_t wander", WanderAI)
+
+game_data = {
+    "resources":    [],
+    "abilities":    {},
+    "tech_trees":   {},
+    "build_lists":  {},
+    "actors": {
+        "Walker": {
+            "type":         "wheeled",
+            "image":        "walker",
+            "max_hp":       10,
+            "max_velocity": 5,
+            "acceleration": 1.5,
+            "turn_speed":   90,
+            "abilities":    [],
+            "flags":        [],
+        },
+        "Box": {
+            "type":         "wheeled",
+            "size":         [30, 20],
+            "max_hp":       10,
+            "max_velocity": 5,
+            "acceleration": 1.5,
+            "turn_speed":   90,
+            "abilities":    [],
+            "flags":        [],
+        },
+    },
+}
+
+scenario = {
+    "battlefield":  {"size": [2000, 2000]},
+    "teams":        {"1": {}, "2": {}},
+    "actors": [
+        {"type": "Walker", "pos": [100, 100, 0], "team": 1},
+        {"type": "Box", "pos": [1000, 500, 0], "team": 2},
+    ],
+}
+
+class HeadlessTests(unittest.TestCase):
+    def test_manifest(self):
+        images = {"walker": pygame.Surface((41, 35))}
+        self.assertEqual(headless.image_manifest(images), {"walker": [41, 35]})
+        
+        fd, path = tempfile.mkstemp(suffix=".json")
+        os.close(fd)
+        try:
+            headless.save_manifest(images, path)
+            engine = headless.HeadlessEngine(headless.load_manifest(path))
+        finally:
+            os.remove(path)
+        
+        self.assertEqual(engine.get_image("walker").get_rect(), pygame.Rect(0, 0, 41, 35))
+    
+    def test_sim(self):
+        sim = headless.make_sim(json.loads(json.dumps(scenario)), json.loads(json.dumps(game_data)),
+            image_sizes={"walker": [41, 35]})
+        
+        try:
+            # Sizes come from the manifest or straight from the template
+            self.assertEqual(sim.actors[0].rect.size, (41, 35))
+            self.assertEqual(sim.actors[1].rect.size, (30, 20))
+            
+            # Orders go round through the local connection
+            sim.add_order(the_actor=0, command="move", pos=[300, 100, 0])
+            for i in range(100):
+                sim.update()
+            
+            self.assertTrue(sim.actors[0].pos[0] > 250)
+            
+            result = headless.match_result(sim)
+            self.assertEqual(result['tick'], 100)
+            self.assertEqual(result['winner'], None)
+            self.assertEqual(result['teams'][2], {"actors": 1, "hp": 10})
+        finally:
+            sim.quit()
+    
+    def test_group_order(self):
+        sc = json.loads(json.dumps(scenario))
+        sc['actors'][1]['team'] = 1
+        sc['actors'][1]['pos'] = [100, 300, 0]
+        
+        sim = headless.make_sim(sc, json.loads(json.dumps(game_data)), image_sizes={"walker": [41, 35]})
+        
+        try:
+            sim.add_group_order(list(sim.actors.values()), "move", pos=[500, 200, 0], formation="line")
+            for i in range(150):
+                sim.update()
+            
+            # Side by side rather than fighting over the same spot
+            self.assertTrue(abs(sim.actors[0].pos[0] - 480) < 10)
+            self.assertTrue(abs(sim.actors[1].pos[0] - 520) < 10)
+        finally:
+            sim.quit()
+    
+    def test_stepped_ais(self):
+        """The AIs are run in step with the sim so the same seed gives the
+        same match"""
+        sc = json.loads(json.dumps(scenario))
+        sc['ais'] = {
+            "1": {"type": "headless_t wander"},
+            "2": {"type": "headless_t wander"},
+        }
+        
+        results = []
+        for i in range(2):
+            random.seed(3)
+            sim = headless.make_sim(json.loads(json.dumps(sc)), json.loads(json.dumps(game_data)),
+                image_sizes={"walker": [41, 35]})
+            
+            try:
+                self.assertNotEqual(sim.ai_host, None)
+                for t in range(200):
+                    sim.update()
+                
+                results.append([list(sim.actors[oid].pos.v) for oid in sorted(sim.actors)])
+            finally:
+                sim.quit()
+        
+        self.assertNotEqual(results[0][0], [100, 100, 0])
+        self.assertEqual(results[0], results[1])
+    
+    def test_run_match(self):
+        one_sided = json.loads(json.dumps(scenario))
+        del(one_sided['actors'][1])
+        
+        result = headless.run_match(one_sided, json.loads(json.dumps(game_data)),
+            image_sizes={"walker": [41, 35]}, max_ticks=50)
+        
+        self.assertEqual(result['winner'], 1)
+        self.assertEqual(result['tick'], 1)
+
+suite = unittest.TestLoader().loadTestsFromTestCase(HeadlessTests)
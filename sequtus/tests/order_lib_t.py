@@ -0,0 +1,111 @@
+import time
+import unittest
+
+from sequtus.libs import order_lib
+from sequtus.PodSixNet.rencode import dumps, loads
+
+class OrderLibTests(unittest.TestCase):
+    def test_round_trip(self):
+        orders = [
+            (1, "move", [100, 200], None, 7, False),
+            (2, "attack", None, 5, 7, False),
+            (3, "move", [300, 200], None, 7, True),
+        ]
+        
+        data = order_lib.pack_orders(orders)
+        self.assertEqual(data['action'], "orders")
+        
+        # The same tick for everything so it's only sent once
+        self.assertEqual(data['tick'], 7)
+        self.assertNotIn("ticks", data)
+        self.assertEqual(data['cmds'], ["move", "attack", "move"])
+        self.assertEqual(data['targets'], [None, 5, None])
+        
+        self.assertEqual(order_lib.unpack_orders(data), orders)
+        self.assertEqual(order_lib.unpack_orders(order_lib.pack_orders(orders[:1])), orders[:1])
+        self.assertEqual(order_lib.unpack_orders(order_lib.pack_orders([])), [])
+    
+    def test_encoded(self):
+        orders = [(i, "move", (500, 500), None, 12, False) for i in range(50)]
+        data = loads(dumps(order_lib.pack_orders(orders)))
+        
+        self.assertEqual(data['pos'], (500, 500))
+        self.assertEqual([o[0] for o in order_lib.unpack_orders(data)], list(range(50)))
+
+    def test_groups(self):
+        groups = [([4, 2, 9], "move", [100, 100], None, 7, False, "line")]
+        
+        data = loads(dumps(order_lib.pack_orders([], groups)))
+        self.assertEqual(order_lib.unpack_orders(data), [])
+        
+        actors, cmd, pos, target, tick, queued, formation = order_lib.unpack_groups(data)[0]
+        self.assertEqual((sorted(actors), cmd, tick, formation), ([2, 4, 9], "move", 7, "line"))
+        
+        self.assertEqual(order_lib.unpack_groups(order_lib.pack_orders([(1, "stop", None, None, 7, False)])), [])
+    
+    def test_expand_group(self):
+        # Always in oid order so every sim gives out the same slots
+        self.assertEqual(order_lib.expand_group([4, 2, 9], "move", [100, 100], None, "line", spacing=10), [
+            (2, "move", [90, 100], None),
+            (4, "move", [100, 100], None),
+            (9, "move", [110, 100], None),
+        ])
+        
+        self.assertEqual(order_lib.expand_group([3, 1], "attack", None, 5, "grid"), [
+            (1, "attack", None, 5),
+            (3, "attack", None, 5),
+        ])
+        
+        self.assertEqual(order_lib.expand_group([3, 1], "move", (5, 5, 0), None), [
+            (1, "move", [5, 5, 0], None),
+            (3, "move", [5, 5, 0], None),
+        ])
+    
+    def test_formation_offsets(self):
+        self.assertEqual(order_lib.formation_offsets(None, 2), [(0, 0), (0, 0)])
+        self.assertEqual(order_lib.formation_offsets("grid", 4, spacing=10), [
+            (-5, -5), (5, -5),
+            (-5, 5), (5, 5),
+        ])
+        
+        # Five needs a 3x2 grid
+        offsets = order_lib.formation_offsets("grid", 5, spacing=10)
+        self.assertEqual(offsets[0], (-10, -5))
+        self.assertEqual(offsets[4], (0, 5))
+        self.assertEqual(len(set(offsets)), 5)
+        
+        self.assertEqual(order_lib.formation_offsets("grid", 0), [])
+        self.assertRaises(KeyError, order_lib.formation_offsets, "wedge", 3)
+
+class OrderLibBenchmarks(unittest.TestCase):
+    """Compares sending a box selection's orders one message per order
+    against one batched message, for a tick's worth of orders sent on to
+    each client"""
+    clients = 4
+    
+    def test_framing_benchmark(self):
+        print("")
+        endchars = b'\0---\0'
+        
+        for amount in (1, 20, 200):
+            orders = [(i, "move", [500 + i % 10, 500], None, 12, False) for i in range(amount)]
+            
+            start = time.time()
+            single_bytes = 0
+            for c in range(self.clients):
+                for the_actor, cmd, pos, target, tick, queued in orders:
+                    single_bytes += len(dumps({"action": "issue_order",
+                        "actor": the_actor, "cmd": cmd, "pos": pos, "target": target, "tick": tick}) + endchars)
+            single_time = time.time() - start
+            
+            start = time.time()
+            batch_bytes = 0
+            for c in range(self.clients):
+                batch_bytes += len(dumps(order_lib.pack_orders(orders)) + endchars)
+            batch_time = time.time() - start
+            
+            print("%4d orders to %d clients, per order: %6d bytes %.5fs, batched: %6d bytes %.5fs" % (
+                amount, self.clients, single_bytes, single_time, batch_bytes, batch_time))
+
+suite = unittest.TestLoader().loadTestsFromTestCase(OrderLibTests)
+benchmark_suite = unittest.TestLoader().loadTestsFromTestCase(OrderLibBenchmarks)
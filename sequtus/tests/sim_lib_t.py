@@ -0,0 +1,134 @@
+from __future__ import division
+
+import time
+import random
+import pygame
+import unittest
+from sequtus.libs import sim_lib, spatial_lib
+
+class DummyActor (object):
+    def __init__(self, oid, *args):
+        super(DummyActor, self).__init__()
+        self.oid = oid
+        self.rect = pygame.Rect(*args)
+
+def make_actors(amount, field_size=2000, actor_size=41, seed=1):
+    """Scatters actors across a battlefield, the same seed always gives
+    the same layout"""
+    r = random.Random(seed)
+    
+    actors = {}
+    for i in range(amount):
+        actors[i] = DummyActor(i,
+            r.randint(0, field_size - actor_size),
+            r.randint(0, field_size - actor_size),
+            actor_size, actor_size)
+    
+    return actors
+
+class SimLibTests(unittest.TestCase):
+    def test_get_collisions(self):
+        actors = {
+            0: DummyActor(0, 0, 0, 20, 20),
+            1: DummyActor(1, 10, 10, 20, 20),
+            2: DummyActor(2, 500, 500, 20, 20),
+            3: DummyActor(3, 5, 5, 20, 20),
+        }
+        
+        # Pass as both the sim's dict and an unordered list
+        for actor_set in (actors, [actors[3], actors[1], actors[2], actors[0]]):
+            result = [(a.oid, b.oid) for a, b in sim_lib.get_collisions(actor_set)]
+            self.assertEqual([(0, 1), (0, 3), (1, 3)], result)
+    
+    def test_get_collisions_matches_spatial_hash(self):
+        actors = make_actors(500)
+        
+        h = spatial_lib.SpatialHash()
+        for aid, a in actors.items():
+            h.insert(a)
+        
+        brute = [(a.oid, b.oid) for a, b in sim_lib.get_collisions(actors)]
+        hashed = [(a.oid, b.oid) for a, b in sim_lib.get_collisions(actors, h)]
+        
+        self.assertEqual(brute, hashed)
+        self.assertEqual(brute, sorted(set(brute)))
+    
+    def test_sweep_and_prune(self):
+        actors = make_actors(500)
+        sap = sim_lib.SweepAndPrune()
+        
+        for i in range(3):
+            brute = [(a.oid, b.oid) for a, b in sim_lib.get_collisions(actors)]
+            swept = [(a.oid, b.oid) for a, b in sap.get_collisions(actors)]
+            self.assertEqual(brute, swept)
+            
+            # Move things about a bit and remove one, the next pass
+            # needs to pick up both
+            for aid, a in actors.items():
+                a.rect.left += (aid % 7) - 3
+            del(actors[i])
+    
+    def test_possible_collision(self):
+        actors = {0: DummyActor(0, 0, 0, 20, 20)}
+        
+        self.assertTrue(sim_lib.test_possible_collision(actors, (10, 10, 5, 5)))
+        self.assertFalse(sim_lib.test_possible_collision(actors, (30, 30, 5, 5)))
+
+class SimLibBenchmarks(unittest.TestCase):
+    """Not correctness tests, these print how long a collision pass takes
+    so different broad phases can be compared"""
+    sizes = (100, 1000, 10000)
+    
+    def _time(self, func, *args):
+        start = time.time()
+        result = func(*args)
+        return time.time() - start, result
+    
+    def test_collision_benchmark(self):
+        print("")
+        for amount in self.sizes:
+            actors = make_actors(amount)
+            
+            h = spatial_lib.SpatialHash()
+            for aid, a in actors.items():
+                h.insert(a)
+            
+            # The first sweep and prune pass has to sort from scratch
+            sap = sim_lib.SweepAndPrune()
+            sap.get_collisions(actors)
+            
+            brute_time, brute = self._time(sim_lib.get_collisions, actors)
+            hash_time, hashed = self._time(sim_lib.get_collisions, actors, h)
+            sap_time, swept = self._time(sap.get_collisions, actors)
+            
+            self.assertEqual(len(brute), len(hashed))
+            self.assertEqual(len(brute), len(swept))
+            
+            print("%6d actors, %6d collisions: brute force %.4fs, spatial hash %.4fs, sweep and prune %.4fs" % (
+                amount, len(brute), brute_time, hash_time, sap_time
+            ))
+    
+    def test_clump_benchmark(self):
+        """Everything piled into a small area, the worst case for a grid"""
+        print("")
+        for amount in self.sizes[:2]:
+            actors = make_actors(amount, field_size=400, actor_size=5)
+            
+            h = spatial_lib.SpatialHash()
+            for aid, a in actors.items():
+                h.insert(a)
+            
+            sap = sim_lib.SweepAndPrune()
+            sap.get_collisions(actors)
+            
+            hash_time, hashed = self._time(sim_lib.get_collisions, actors, h)
+            sap_time, swept = self._time(sap.get_collisions, actors)
+            
+            self.assertEqual(len(hashed), len(swept))
+            
+            print("%6d clumped actors, %6d collisions: spatial hash %.4fs, sweep and prune %.4fs" % (
+                amount, len(hashed), hash_time, sap_time
+            ))
+
+suite = unittest.TestLoader().loadTestsFromTestCase(SimLibTests)
+benchmark_suite = unittest.TestLoader().loadTestsFromTestCase(SimLibBenchmarks)
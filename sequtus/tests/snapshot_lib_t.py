@@ -0,0 +1,93 @@
+import unittest
+from sequtus.ai import core_ai
+from sequtus.libs import snapshot_lib, vectors
+
+class DummyActor (object):
+    def __init__(self, oid, team, actor_type, pos):
+        super(DummyActor, self).__init__()
+        self.oid = oid
+        self.team = team
+        self.actor_type = actor_type
+        self.pos = vectors.V(pos)
+        self.velocity = vectors.V(1, 2, 0)
+        self.hp = 50
+        self.completion = 100
+        
+        self.current_order = ["move", [10, 10, 0], None]
+        self.order_queue = []
+        self.build_queue = []
+
+class DummyQueue (object):
+    def __init__(self):
+        super(DummyQueue, self).__init__()
+        self.items = []
+    
+    def put(self, item):
+        self.items.append(item)
+
+actor_types = {"Tank": {}, "Factory": {}, "Worker": {}}
+
+def make_actors():
+    return {
+        3: DummyActor(3, 1, "Worker", [30, 40, 0]),
+        1: DummyActor(1, 2, "Tank", [10, 20, 0]),
+        7: DummyActor(7, 1, "Factory", [70, 80, 0]),
+    }
+
+class SnapshotTests(unittest.TestCase):
+    def test_round_trip(self):
+        s = snapshot_lib.Snapshot(capacity=10)
+        self.assertEqual(s.version, 0)
+        
+        version = s.publish(make_actors(), snapshot_lib.type_ids(actor_types))
+        self.assertEqual(version, 2)
+        
+        read_version, actors = s.read(snapshot_lib.type_names(actor_types))
+        self.assertEqual(read_version, 2)
+        
+        self.assertEqual([a.oid for a in actors], [1, 3, 7])
+        self.assertEqual([a.team for a in actors], [2, 1, 1])
+        self.assertEqual([a.actor_type for a in actors], ["Tank", "Worker", "Factory"])
+        self.assertEqual(actors[1].pos, [30, 40, 0])
+        self.assertEqual(actors[1].velocity, [1, 2, 0])
+        self.assertEqual(actors[1].hp, 50)
+        
+        # Publishing fewer actors leaves no stale rows behind
+        s.publish({1: make_actors()[1]}, snapshot_lib.type_ids(actor_types))
+        read_version, actors = s.read(snapshot_lib.type_names(actor_types))
+        self.assertEqual(read_version, 4)
+        self.assertEqual([a.oid for a in actors], [1])
+    
+    def test_capacity(self):
+        s = snapshot_lib.Snapshot(capacity=2)
+        self.assertEqual(s.publish(make_actors(), snapshot_lib.type_ids(actor_types)), None)
+        self.assertEqual(s.version, 0)
+    
+    def test_mid_write(self):
+        s = snapshot_lib.Snapshot(capacity=10)
+        s.publish(make_actors(), snapshot_lib.type_ids(actor_types))
+        
+        # An odd version means the sim is part way through writing
+        s.block[0] = 3
+        self.assertEqual(s.read(snapshot_lib.type_names(actor_types)), (None, None))
+    
+    def test_ai_reads_snapshot(self):
+        s = snapshot_lib.Snapshot(capacity=10)
+        actors = make_actors()
+        s.publish(actors, snapshot_lib.type_ids(actor_types))
+        
+        ai = core_ai.AICore(DummyQueue(), DummyQueue(), s)
+        ai._init(team=1)
+        ai._recieve_actor_types(actor_types)
+        ai._recieve_snapshot(version=2, orders={
+            3: snapshot_lib.order_state(actors[3]),
+            7: snapshot_lib.order_state(actors[7]),
+        })
+        
+        self.assertTrue(ai.actors_updated)
+        self.assertEqual(ai.snapshot_version, 2)
+        self.assertEqual([a.oid for a in ai.own_actors], [3, 7])
+        self.assertEqual([a.oid for a in ai.enemy_actors], [1])
+        self.assertEqual(ai.own_actors[0].current_order, ("move", [10, 10, 0], None))
+
+suite = unittest.TestLoader().loadTestsFromTestCase(SnapshotTests)
@@ -0,0 +1,99 @@
+import pygame
+import unittest
+from sequtus.libs import spatial_lib, sim_lib, geometry
+
+class DummyActor (object):
+    def __init__(self, oid, *args):
+        super(DummyActor, self).__init__()
+        self.oid = oid
+        self.rect = pygame.Rect(*args)
+
+class SpatialHashTests(unittest.TestCase):
+    def test_query_rect(self):
+        h = spatial_lib.SpatialHash(cell_size=50)
+        
+        actors = [
+            DummyActor(0, 10, 10, 20, 20),
+            DummyActor(1, 200, 200, 20, 20),
+            DummyActor(2, 40, 40, 20, 20),# Spans 4 cells
+        ]
+        
+        for a in actors:
+            h.insert(a)
+        
+        vals = (
+            ((0, 0, 10, 10), [0, 2]),
+            ((60, 60, 10, 10), [2]),
+            ((190, 190, 15, 15), [1]),
+            ((500, 500, 10, 10), []),
+        )
+        
+        for r, expected in vals:
+            self.assertEqual(expected, [a.oid for a in h.query_rect(r)])
+    
+    def test_query_radius(self):
+        h = spatial_lib.SpatialHash(cell_size=50)
+        
+        actors = [
+            DummyActor(0, 90, 90, 20, 20),
+            DummyActor(1, 300, 100, 20, 20),
+            DummyActor(2, 100, 400, 20, 20),
+        ]
+        
+        for a in actors:
+            h.insert(a)
+        
+        self.assertEqual([0], [a.oid for a in h.query_radius((100, 100), 30)])
+        self.assertEqual([0, 1], [a.oid for a in h.query_radius((100, 100), 200)])
+        self.assertEqual([], [a.oid for a in h.query_radius((1000, 1000), 200)])
+    
+    def test_update(self):
+        h = spatial_lib.SpatialHash(cell_size=50)
+        a = DummyActor(0, 10, 10, 20, 20)
+        h.insert(a)
+        
+        a.rect.topleft = (300, 300)
+        h.update(a)
+        
+        self.assertEqual([], h.query_rect((0, 0, 40, 40)))
+        self.assertEqual([a], h.query_rect((300, 300, 5, 5)))
+        
+        h.remove(a)
+        self.assertEqual(0, len(h))
+        self.assertEqual({}, h.cells)
+    
+    def test_candidate_pairs(self):
+        h = spatial_lib.SpatialHash(cell_size=50)
+        
+        actors = [
+            DummyActor(0, 40, 40, 20, 20),
+            DummyActor(1, 45, 45, 20, 20),# Shares 4 cells with 0
+            DummyActor(2, 400, 400, 20, 20),
+            DummyActor(3, 410, 410, 20, 20),
+        ]
+        
+        for a in actors:
+            h.insert(a)
+        
+        pairs = [(a.oid, b.oid) for a, b in h.candidate_pairs()]
+        self.assertEqual([(0, 1), (2, 3)], pairs)
+    
+    def test_matches_brute_force(self):
+        h = spatial_lib.SpatialHash(cell_size=32)
+        
+        actors = []
+        for i in range(60):
+            a = DummyActor(i, (i * 37) % 300, (i * 91) % 300, 25, 25)
+            actors.append(a)
+            h.insert(a)
+        
+        brute = set()
+        for a in actors:
+            for b in actors:
+                if a.oid < b.oid and geometry.rect_collision(a.rect, b.rect, True):
+                    brute.add((a.oid, b.oid))
+        
+        hashed = set((a.oid, b.oid) for a, b in sim_lib.get_collisions(actors, h))
+        self.assertEqual(brute, hashed)
+
+suite = unittest.TestLoader().loadTestsFromTestCase(SpatialHashTests)
@@ -0,0 +1,219 @@
+from __future__ import division
+
+import time
+import random
+import pygame
+import unittest
+from sequtus.game import actors
+from sequtus.libs import store_lib, spatial_lib, vectors
+
+def new_actor(oid, pos, velocity):
+    a = actors.Actor()
+    a.oid = oid
+    a.pos = vectors.V(pos)
+    a.velocity = vectors.V(velocity)
+    a.rect = pygame.Rect(0, 0, 10, 10)
+    a.rect.center = pos[0], pos[1]
+    return a
+
+@unittest.skipIf(store_lib.numpy is None, "numpy is not installed")
+class ActorStoreTests(unittest.TestCase):
+    def test_attach(self):
+        store = store_lib.ActorStore(capacity=2)
+        
+        a = new_actor(0, [10, 20, 0], [1, 2, 0])
+        a.hp = 5
+        store.attach(a)
+        
+        self.assertEqual(a.pos, [10, 20, 0])
+        self.assertEqual(a.velocity, [1, 2, 0])
+        self.assertEqual(a.hp, 5)
+        self.assertTrue(isinstance(a, actors.Actor))
+        
+        # Setting the attributes writes into the arrays
+        a.hp -= 2
+        a.pos = [50, 60]
+        self.assertEqual(store.columns['hp'][0], 3)
+        self.assertEqual(list(store.columns['pos'][0]), [50, 60, 0])
+    
+    def test_step(self):
+        h = spatial_lib.SpatialHash(cell_size=50)
+        store = store_lib.ActorStore(capacity=2, cell_size=50)
+        
+        moving = new_actor(0, [10, 10, 0], [5, 0, 0])
+        still = new_actor(1, [100, 100, 0], [0, 0, 0])
+        
+        # More than the capacity to make sure the store grows
+        extra = new_actor(2, [200, 200, 0], [0, -5, 0])
+        
+        for a in (moving, still, extra):
+            a.spatial_hash = h
+            h.insert(a)
+            store.attach(a)
+        
+        for i in range(10):
+            store.step()
+        
+        self.assertEqual(moving.pos, [60, 10, 0])
+        self.assertEqual(still.pos, [100, 100, 0])
+        self.assertEqual(extra.pos, [200, 150, 0])
+        
+        self.assertEqual(moving.rect.center, (60, 10))
+        self.assertEqual([moving], h.query_rect((55, 5, 1, 1)))
+        
+        # ObjectBase.update must not move it a second time
+        moving.update()
+        self.assertEqual(moving.pos, [60, 10, 0])
+    
+    def test_spatial_hash(self):
+        """Only actors crossing into a new cell update the hash, it must
+        still agree with the rects"""
+        h = spatial_lib.SpatialHash(cell_size=20)
+        store = store_lib.ActorStore(capacity=8, cell_size=20)
+        
+        actor_list = []
+        for i in range(50):
+            a = new_actor(i,
+                [random.randint(-100, 100), random.randint(-100, 100), 0],
+                [random.random() * 6 - 3, random.random() * 6 - 3, 0],
+            )
+            a.spatial_hash = h
+            h.insert(a)
+            store.attach(a)
+            actor_list.append(a)
+        
+        for i in range(40):
+            store.step()
+            
+            # Placed directly rather than moved
+            actor_list[i].pos = [random.randint(-100, 100), random.randint(-100, 100), 0]
+        
+        store.step()
+        for a in actor_list:
+            self.assertEqual(h.objects[a.oid][1], h._span(a.rect))
+    
+    def test_detach(self):
+        store = store_lib.ActorStore(capacity=2)
+        a = new_actor(0, [10, 10, 0], [5, 0, 0])
+        store.attach(a)
+        store.step()
+        store.detach(a)
+        
+        self.assertEqual(type(a), actors.Actor)
+        self.assertEqual(a.pos, [15, 10, 0])
+        self.assertEqual(0, len(store))
+        
+        # The slot is reused
+        b = new_actor(1, [0, 0, 0], [0, 0, 0])
+        store.attach(b)
+        self.assertEqual(0, b._slot)
+        self.assertEqual(a.pos, [15, 10, 0])
+    
+    def test_write_through(self):
+        store = store_lib.ActorStore(capacity=1)
+        a = new_actor(0, [10, 10, 0], [1, 0, 0])
+        store.attach(a)
+        
+        # Held from before the store grows
+        pos = a.pos
+        velocity = a.velocity
+        
+        b = new_actor(1, [0, 0, 0], [0, 0, 0])
+        store.attach(b)
+        self.assertEqual(2, store.capacity)
+        
+        # In place changes reach the new arrays
+        pos[0] = 20
+        velocity *= 2
+        a.velocity += [0, 1, 0]
+        self.assertEqual(list(store.columns['pos'][0]), [20, 10, 0])
+        self.assertEqual(list(store.columns['velocity'][0]), [2, 1, 0])
+        self.assertTrue(store.dirty[0])
+        
+        store.step()
+        self.assertEqual(pos, [22, 11, 0])
+        self.assertEqual(a.rect.center, (22, 11))
+        
+        # A vector the actor no longer holds stops writing through
+        a.pos = [50, 50, 0]
+        pos[0] = 0
+        self.assertEqual(list(store.columns['pos'][0]), [50, 50, 0])
+        self.assertEqual(a.pos, [50, 50, 0])
+        
+        # As does one held from before a detach
+        held = b.pos
+        store.detach(b)
+        held[0] = 30
+        self.assertEqual(list(store.columns['pos'][1]), [0, 0, 0])
+        self.assertEqual(b.pos, [0, 0, 0])
+
+@unittest.skipIf(store_lib.numpy is None, "numpy is not installed")
+class ActorStoreBenchmarks(unittest.TestCase):
+    """Not correctness tests, these print how long it takes to move 10k
+    actors against the 33ms a tick gets at 30 cycles per second"""
+    amount = 10000
+    ticks = 30
+    
+    def make_actors(self):
+        h = spatial_lib.SpatialHash()
+        
+        actor_list = []
+        for i in range(self.amount):
+            a = new_actor(i,
+                [random.randint(0, 5000), random.randint(0, 5000), 0],
+                [random.random() * 4 - 2, random.random() * 4 - 2, 0],
+            )
+            a.spatial_hash = h
+            h.insert(a)
+            actor_list.append(a)
+        
+        return actor_list
+    
+    def test_step_benchmark(self):
+        print("")
+        
+        unstored = self.make_actors()
+        start = time.time()
+        for t in range(self.ticks):
+            for a in unstored:
+                a.update()
+        update_time = (time.time() - start) * 1000 / self.ticks
+        
+        stored = self.make_actors()
+        store = store_lib.ActorStore(self.amount, stored[0].spatial_hash.cell_size)
+        for a in stored:
+            store.attach(a)
+        
+        start = time.time()
+        for t in range(self.ticks):
+            store.step()
+        step_time = (time.time() - start) * 1000 / self.ticks
+        
+        print("%d moving actors: ObjectBase.update %.1fms a tick, ActorStore.step %.1fms a tick, budget %.1fms" % (
+            self.amount, update_time, step_time, 1000/30
+        ))
+    
+    def test_read_benchmark(self):
+        """Reading an attribute shouldn't cost more for a stored actor"""
+        print("")
+        
+        unstored = self.make_actors()
+        stored = self.make_actors()
+        store = store_lib.ActorStore(self.amount)
+        for a in stored:
+            store.attach(a)
+        
+        times = []
+        for actor_list in (unstored, stored):
+            start = time.time()
+            for t in range(self.ticks):
+                for a in actor_list:
+                    a.pos[0] + a.velocity[1] + a.hp
+            times.append((time.time() - start) * 1000 / self.ticks)
+        
+        print("%d actors reading pos, velocity and hp: unstored %.1fms a tick, stored %.1fms a tick" % (
+            self.amount, times[0], times[1]
+        ))
+
+suite = unittest.TestLoader().loadTestsFromTestCase(ActorStoreTests)
+benchmark_suite = unittest.TestLoader().loadTestsFromTestCase(ActorStoreBenchmarks)
@@ -1,3 +1,5 @@
+import math
+import time
 import unittest
 from sequtus.libs import vectors
 
@@ -279,6 +281,273 @@ class VectorTests(unittest.TestCase):
                 print("\n\nTrying to midpoint({}, {}, {})\n\n".format(pos1, pos2, distance))
                 raise
     
+    
+    def test_in_place(self):
+        a = vectors.V(1, 2, 3)
+        b = a
+        
+        a += [1, 1, 1]
+        self.assertEqual(b, [2, 3, 4])
+        
+        a -= vectors.V(2, 2, 2)
+        self.assertEqual(b, [0, 1, 2])
+        
+        a *= 2
+        self.assertEqual(b, [0, 2, 4])
+        
+        a /= 2
+        self.assertEqual(b, [0, 1, 2])
+        
+        a[2] = 5
+        self.assertEqual(b, [0, 1, 5])
+    
+    def test_scalar(self):
+        # A number scales every axis. It used to be coerced to V(n, 0, 0),
+        # so * zeroed y and z and / divided them by 0.
+        a = vectors.V(2, 4, 6)
+        
+        self.assertEqual(a * 2, [4, 8, 12])
+        self.assertEqual(a * 0.5, [1, 2, 3])
+        self.assertEqual(a / 2, [1, 2, 3])
+        self.assertEqual(a / 4, [0.5, 1, 1.5])
+        
+        # Without touching the original
+        self.assertEqual(a, [2, 4, 6])
+        
+        self.assertRaises(ZeroDivisionError, lambda: a / 0)
+
+    def test_module_angle(self):
+        self.assertAlmostEqual(vectors.angle([0,0,0], [4,-4,0])[0], 45)
+        self.assertAlmostEqual(vectors.angle([-4,0,0])[0], 270)
+        self.assertEqual(vectors.add_vectors([1,2,3], [1,1,1]), [2,3,4])
+        self.assertEqual(vectors.total_velocity([3,4,0]), 5)
+    
+    def test_batch(self):
+        points = [[i, i * 2 - 30, i % 3] for i in range(50)]
+        origin = vectors.V(5, -3, 1)
+        
+        expected_dists = [vectors.distance(origin, p) for p in points]
+        
+        # Both the pure Python and (if installed) NumPy versions, NumPy
+        # is used when given an array
+        batches = [points]
+        if vectors.numpy is not None:
+            batches.append(vectors.numpy.array(points, dtype=float))
+        
+        old_threshold = vectors.numpy_threshold
+        try:
+            for threshold, batch in zip((100000, 1), batches):
+                vectors.numpy_threshold = threshold
+                
+                for e, r in zip(expected_dists, vectors.distances(origin, batch)):
+                    self.assertAlmostEqual(e, r)
+                
+                matrix = vectors.pairwise_distances(points[:5], points)
+                self.assertEqual(len(matrix), 5)
+                for i in range(5):
+                    for j, p in enumerate(points):
+                        self.assertAlmostEqual(matrix[i][j], vectors.distance(points[i], p))
+                
+                self.assertEqual(vectors.distances(origin, []), [])
+                self.assertEqual(vectors.pairwise_distances([], points), [])
+        finally:
+            vectors.numpy_threshold = old_threshold
+
+    def test_trig_table(self):
+        trig = vectors.TrigTable(0.25)
+        
+        # Cardinals are exact
+        for angle, s, c in ((0, 0, 1), (90, 1, 0), (180, 0, -1), (270, -1, 0), (360, 0, 1)):
+            self.assertEqual(trig.sin(angle), s)
+            self.assertEqual(trig.cos(angle), c)
+        
+        # Anything else is within the resolution of the real thing
+        for i in range(0, 3600, 7):
+            angle = i / 10
+            self.assertAlmostEqual(trig.sin(angle), math.sin(math.radians(angle)), places=2)
+            self.assertAlmostEqual(trig.cos(angle), math.cos(math.radians(angle)), places=2)
+        
+        # Snapped to the nearest step either side of 0
+        self.assertEqual(trig.index(0.1), 0)
+        self.assertEqual(trig.index(-0.1), 0)
+        self.assertEqual(trig.index(359.9), 0)
+        self.assertEqual(trig.index(0.2), 1)
+        
+        # sin_cos snaps the same way as sin and cos, including the half
+        # steps where the rounding of the sum matters
+        for resolution in (0.25, 0.1, 0.3, 0.7):
+            trig = vectors.TrigTable(resolution)
+            for i in range(trig.steps * 2):
+                angle = i * 180 / trig.steps
+                self.assertEqual(trig.sin_cos(angle), (trig.sin(angle), trig.cos(angle)))
+        
+        # angle * steps / 360 and angle * (steps / 360) round differently here
+        trig = vectors.TrigTable(0.1)
+        self.assertEqual(trig.sin_cos(251.04999999999998), (trig.sin(251.04999999999998), trig.cos(251.04999999999998)))
+        
+        trig = vectors.TrigTable(0.25)
+        for angle in ((0,0), (45,0), (123.4,0), (270,0), (300.1,0)):
+            expected = vectors.move_to_vector(angle, 10)
+            answer = vectors.move_to_vector(angle, 10, trig)
+            for i in range(3):
+                self.assertAlmostEqual(expected[i], answer[i], places=1)
+        
+        expected = vectors.get_midpoint([0,0,0], [40,-30,0], 10)
+        answer = vectors.get_midpoint([0,0,0], [40,-30,0], 10, trig)
+        for i in range(3):
+            self.assertAlmostEqual(expected[i], answer[i], places=1)
 
+class ListV (object):
+    """The list backed V from before vectors used __slots__, trimmed to
+    what the benchmark needs so it can print before and after numbers"""
+    def __init__(self, x, y=0, z=0):
+        super(ListV, self).__init__()
+        if type(x) == ListV:
+            self.v =  list(x.v)
+        
+        elif type(x) == list or type(x) == tuple:
+            # It tries to get the 3rd item but can handle a 2D input
+            self.v = [x[0], x[1], x[2] if len(x) > 2 else 0]
+        else:
+            self.v = [x,y,z]
+    
+    def __getitem__(self, key):
+        if type(key) == int:
+            return self.v[key]
+        else:
+            raise IndexError("No key of %s" % key)
+    
+    def __add__(self, other):
+        if type(other) != ListV: other = ListV(other)
+        return ListV([self.v[i] + other.v[i] for i in range(3)])
+    
+    def angle(self, v2=None):
+        if v2 == None:
+            v2 = self.v[:]
+            v1 = [0,0,0]
+        else:
+            v1 = self.v[:]
+        
+        x = abs(v1[0] - v2[0])
+        y = abs(v1[1] - v2[1])
+        z = abs(v1[2] - v2[2])
+        
+        if x == 0:
+            if v1[1] >= v2[1]:# Up
+                xy = 0
+            elif v1[1] < v2[1]:# Down
+                xy = 180
+        elif y == 0:
+            if v1[0] <= v2[0]:# Right
+                xy = 90
+            elif v1[0] > v2[0]:# Left
+                xy = 270
+        else:
+            if v1[1] > v2[1]:# Up
+                if v1[0] < v2[0]:# Right
+                    xy = math.degrees(math.atan(x/y))
+                else:# Left
+                    xy = math.degrees(math.atan(y/x)) + 270
+            else:# Down
+                if v1[0] < v2[0]:# Right
+                    xy = math.degrees(math.atan(y/x)) + 90
+                else:# Left
+                    xy = math.degrees(math.atan(x/y)) + 180
+        
+        hyp = math.sqrt(x*x + y*y)
+        if hyp > 0:
+            za = math.atan(z/hyp)
+        else:
+            za = 0
+        
+        return [xy, math.degrees(za)]
+    
+    def distance(self, the_point=None):
+        if the_point == None:
+            the_point = [0 for i in range(3)]
+        
+        if type(the_point) != ListV:
+            the_point = ListV(the_point)
+        
+        x = abs(self.v[0] - the_point.v[0])
+        y = abs(self.v[1] - the_point.v[1])
+        z = abs(self.v[2] - the_point.v[2])
+        a = math.sqrt(x*x + y*y)
+        
+        return math.sqrt(a*a + z*z)
+
+def list_distance(point1, point2=None):
+    if point2 == None:
+        return ListV(point1).distance()
+    
+    return ListV(point1).distance(point2)
+
+def list_move_to_vector(angle, distance):
+    angle = vectors.bound_angle(angle)
+    
+    z, h = _list_move_to_vector_2d(angle[1], distance)
+    h = abs(h)
+    x, y = _list_move_to_vector_2d(angle[0], h)
+    
+    return ListV(x, y, z)
+
+def _list_move_to_vector_2d(angle, distance):
+    if angle == 0:      return 0, -distance
+    if angle == 90:     return distance, 0
+    if angle == 180:    return 0, distance
+    if angle == 270:    return -distance, 0
+    
+    opp = math.sin(math.radians(angle)) * distance
+    adj = math.cos(math.radians(angle)) * distance
+    
+    return [opp, -adj]
+
+class VectorBenchmarks(unittest.TestCase):
+    """Prints the cost of the operations run for every actor every tick,
+    before with the list backed vectors (ListV) and after with V"""
+    number = 100000
+    
+    def _time(self, func):
+        start = time.time()
+        for i in range(self.number):
+            func()
+        return (time.time() - start) / self.number * 1000000
+    
+    def _compare(self, label, before, after):
+        print("%-22s before %8.3fus  after %8.3fus" % (label, self._time(before), self._time(after)))
+    
+    def test_vector_benchmark(self):
+        print("")
+        
+        old_pos = ListV(1.0, 2.0, 0.0)
+        old_vel = ListV(0.5, 0.25, 0.0)
+        
+        pos = vectors.V(1.0, 2.0, 0.0)
+        vel = vectors.V(0.5, 0.25, 0.0)
+        
+        def in_place_move():
+            pos.__iadd__(vel)
+        
+        def in_place_scale():
+            vel.__imul__(1)
+        
+        self._compare("pos + vel", lambda: old_pos + old_vel, lambda: pos + vel)
+        
+        # ListV has no __iadd__ so += allocated a new vector
+        self._compare("pos += vel", lambda: old_pos + old_vel, in_place_move)
+        self._compare("vel / d", lambda: ListV([v / 2 for v in old_vel]), in_place_scale)
+        self._compare("distance(pos, vel)", lambda: list_distance(old_pos, old_vel), lambda: vectors.distance(pos, vel))
+        
+        old_points = [ListV(i, i * 2, 0) for i in range(200)]
+        points = [vectors.V(i, i * 2, 0) for i in range(200)]
+        self.number = 1000
+        self._compare("distances to 200", lambda: [list_distance(old_pos, p) for p in old_points],
+            lambda: vectors.distances(pos, points))
+        
+        trig = vectors.TrigTable()
+        self.number = 100000
+        self._compare("move_to_vector()", lambda: list_move_to_vector([123.4, 0], 5),
+            lambda: vectors.move_to_vector([123.4, 0], 5, trig))
 
 suite = unittest.TestLoader().loadTestsFromTestCase(VectorTests)
+benchmark_suite = unittest.TestLoader().loadTestsFromTestCase(VectorBenchmarks)
@@ -0,0 +1,126 @@
+import time
+import random
+import unittest
+import pygame
+from sequtus.libs import visibility_lib, spatial_lib, vectors
+
+class DummyActor (object):
+    def __init__(self, oid, team, pos, sight_radius=100):
+        super(DummyActor, self).__init__()
+        self.oid = oid
+        self.team = team
+        self.pos = vectors.V(pos)
+        self.sight_radius = sight_radius
+        self.rect = pygame.Rect(pos[0] - 5, pos[1] - 5, 10, 10)
+
+def make_actors():
+    return {
+        0: DummyActor(0, 1, [100, 100, 0]),
+        1: DummyActor(1, 1, [500, 500, 0], sight_radius=0),
+        2: DummyActor(2, 2, [150, 100, 0]),
+        3: DummyActor(3, 2, [450, 500, 0]),
+        4: DummyActor(4, 2, [900, 900, 0]),
+        5: DummyActor(5, 3, [180, 100, 0]),
+    }
+
+class VisibilityTests(unittest.TestCase):
+    def test_update(self):
+        actors = make_actors()
+        
+        h = spatial_lib.SpatialHash(64)
+        for aid, a in actors.items():
+            h.insert(a)
+        
+        for spatial_hash in (None, h):
+            v = visibility_lib.Visibility()
+            changes = v.update(actors, [1, 2], spatial_hash)
+            
+            # Team 1's second actor is blind so it can't see actor 3
+            self.assertEqual(v.visible[1], set([0, 1, 2, 5]))
+            self.assertEqual(v.visible[2], set([0, 1, 2, 3, 4, 5]))
+            self.assertEqual(changes[1], (set([0, 1, 2, 5]), set()))
+            
+            self.assertTrue(v.can_see(1, 2))
+            self.assertFalse(v.can_see(1, 4))
+            self.assertFalse(v.can_see(3, 0))
+            
+        
+        # Move one out of sight and another into it
+        actors[2].pos = vectors.V(100, 700, 0)
+        actors[3].pos = vectors.V(130, 130, 0)
+        changes = v.update(actors, [1, 2])
+        
+        self.assertEqual(changes[1], (set([3]), set([2])))
+    
+    def test_incremental(self):
+        """Updating as things move, die and spawn gives the same answer as
+        working it out from scratch"""
+        random.seed(3)
+        actors = {}
+        h = spatial_lib.SpatialHash(64)
+        for i in range(60):
+            actors[i] = DummyActor(i, random.randint(1, 3),
+                [random.randint(0, 800), random.randint(0, 800), 0],
+                sight_radius=random.choice((0, 100, 150)))
+            h.insert(actors[i])
+        
+        v = visibility_lib.Visibility()
+        for step in range(20):
+            # Now and then everything moves at once
+            movers = len(actors) if step % 5 == 4 else 15
+            
+            for a in random.sample(list(actors.values()), movers):
+                a.pos = vectors.V(random.randint(0, 800), random.randint(0, 800), 0)
+                a.rect.center = (a.pos[0], a.pos[1])
+                h.update(a)
+            
+            dead = random.choice(list(actors))
+            h.remove(actors[dead])
+            del(actors[dead])
+            
+            new_actor = DummyActor(100 + step, random.randint(1, 3),
+                [random.randint(0, 800), random.randint(0, 800), 0])
+            actors[new_actor.oid] = new_actor
+            h.insert(new_actor)
+            
+            for spatial_hash in (None, h):
+                v.update(actors, [1, 2], spatial_hash)
+                
+                fresh = visibility_lib.Visibility()
+                fresh.update(actors, [1, 2])
+                self.assertEqual(v.visible, fresh.visible)
+
+class VisibilityBenchmarks(unittest.TestCase):
+    """Not correctness tests, these print how long an update takes when
+    everything has been worked out from scratch and when only some of the
+    actors have moved since the last one"""
+    sizes = ((200, 2000), (1000, 4000), (2000, 6000))
+    
+    def test_update_benchmark(self):
+        print("")
+        for amount, field_size in self.sizes:
+            actors = {}
+            h = spatial_lib.SpatialHash(64)
+            for i in range(amount):
+                actors[i] = DummyActor(i, 1 + i % 2,
+                    [random.randint(0, field_size), random.randint(0, field_size), 0], 300)
+                h.insert(actors[i])
+            
+            results = []
+            v = visibility_lib.Visibility()
+            for moving in (amount, amount, amount // 10, 0):
+                for a in list(actors.values())[:moving]:
+                    a.pos = vectors.V(a.pos[0] + random.randint(-30, 30), a.pos[1] + random.randint(-30, 30), 0)
+                    a.rect.center = (a.pos[0], a.pos[1])
+                    h.update(a)
+                
+                start = time.time()
+                v.update(actors, [1, 2], h)
+                results.append(time.time() - start)
+            
+            print("%5d actors: from scratch %.4fs, all moved %.4fs, 10%% moved %.4fs, none moved %.4fs" % (
+                amount, results[0], results[1], results[2], results[3]
+            ))
+
+suite = unittest.TestLoader().loadTestsFromTestCase(VisibilityTests)
+benchmark_suite = unittest.TestLoader().loadTestsFromTestCase(VisibilityBenchmarks)
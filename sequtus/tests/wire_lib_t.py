@@ -0,0 +1,100 @@
+import time
+import unittest
+
+from sequtus.libs import order_lib, wire_lib
+from sequtus.PodSixNet.rencode import dumps, loads
+
+def round_trip(data):
+    message_type, body = wire_lib.encode(data)
+    return wire_lib.decode(message_type, body)
+
+class WireLibTests(unittest.TestCase):
+    def test_order(self):
+        data = {"action": "issue_order", "actor": 4, "cmd": "move", "pos": [100, 200], "target": None, "tick": 12}
+        self.assertEqual(round_trip(data), data)
+        
+        data = {"action": "queue_order", "actor": 4, "cmd": "attack", "pos": None, "target": 9, "tick": 12}
+        self.assertEqual(round_trip(data), data)
+        
+        data = {"action": "issue_order", "actor": 4, "cmd": "move", "pos": [1.5, 2, 3], "target": None, "tick": 12}
+        self.assertEqual(round_trip(data), data)
+        
+        # Whole numbers are sent exactly whatever their size
+        data = {"action": "issue_order", "actor": 4, "cmd": "move", "pos": [-40000, 70000], "target": None, "tick": 12}
+        self.assertEqual(round_trip(data), data)
+        self.assertEqual(type(round_trip(data)['pos'][0]), int)
+    
+    def test_orders(self):
+        orders = [
+            (1, "move", [100, 200], None, 7, False),
+            (2, "attack", None, 5, 7, False),
+            (3, "move", [300, 200], None, 7, True),
+        ]
+        groups = [([4, 2, 9], "move", [100, 100], None, 7, False, "line")]
+        
+        data = round_trip(order_lib.pack_orders(orders, groups))
+        self.assertEqual(order_lib.unpack_orders(data), orders)
+        self.assertEqual(order_lib.unpack_groups(data), [tuple(g) for g in groups])
+        
+        # Every order has a position so they go as one array
+        orders = [(i, "move", [i * 100, 50000, 0.5], None, 7, False) for i in range(3)]
+        self.assertEqual(order_lib.unpack_orders(round_trip(order_lib.pack_orders(orders))), orders)
+        
+        data = round_trip(order_lib.pack_orders([]))
+        self.assertEqual(order_lib.unpack_orders(data), [])
+    
+    def test_small_messages(self):
+        data = {"action": "tick_ack", "tick": 40, "player": 2}
+        self.assertEqual(round_trip(data), data)
+        
+        data = {"action": "hash_check", "tick": 40, "hash": 2**40 + 7}
+        self.assertEqual(round_trip(data), data)
+    
+    def test_does_not_fit(self):
+        # Left to rencode
+        self.assertEqual(wire_lib.encode({"action": "issue_order", "actor": 4,
+            "cmd": "build", "pos": None, "target": "red_factory", "tick": 12}), None)
+        
+        self.assertEqual(wire_lib.encode({"action": "issue_order", "actor": 4,
+            "cmd": "dance", "pos": None, "target": None, "tick": 12}), None)
+        
+        self.assertEqual(wire_lib.encode(order_lib.pack_orders([],
+            [([1, 2], "move", [5, 5], None, 7, False, "wedge")])), None)
+        
+        self.assertEqual(wire_lib.encode({"action": "tick_ack", "tick": -1, "player": 2}), None)
+        self.assertEqual(wire_lib.encode({"action": "connected"}), None)
+        
+        self.assertRaises(KeyError, wire_lib.decode, 99, b"")
+
+class WireLibBenchmarks(unittest.TestCase):
+    """Compares a tick's batched orders rencoded with terminators against
+    the same orders packed with binary framing"""
+    def test_framing_benchmark(self):
+        from sequtus.PodSixNet.Channel import frame_header
+        
+        print("")
+        endchars = b'\0---\0'
+        repeats = 100
+        
+        for amount, offset in ((1, 0), (20, 0), (200, 0), (200, 0.5)):
+            orders = [(i, "move", [500 + i * 3 + offset, 500 - i], None, 12, False) for i in range(amount)]
+            data = order_lib.pack_orders(orders)
+            
+            start = time.time()
+            for r in range(repeats):
+                rencoded = dumps(data) + endchars
+                loads(rencoded[:-len(endchars)])
+            rencode_time = time.time() - start
+            
+            start = time.time()
+            for r in range(repeats):
+                message_type, body = wire_lib.encode(data)
+                packed = frame_header.pack(len(body), message_type) + body
+                wire_lib.decode(message_type, packed[frame_header.size:])
+            binary_time = time.time() - start
+            
+            print("%4d orders%s x%d, rencode: %6d bytes %.5fs, binary: %6d bytes %.5fs" % (
+                amount, " (float positions)" if offset else "", repeats, len(rencoded), rencode_time, len(packed), binary_time))
+
+suite = unittest.TestLoader().loadTestsFromTestCase(WireLibTests)
+benchmark_suite = unittest.TestLoader().loadTestsFromTestCase(WireLibBenchmarks)